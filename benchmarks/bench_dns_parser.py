@@ -0,0 +1,128 @@
+"""
+Benchmark: DNS response parsing (answer address -> queried name)
+Compares parse_dns_message with dnspython on recorded or synthetic responses
+
+Usage: python benchmarks/bench_dns_parser.py [capture.pcap|capture.pcapng]
+       Without a file, synthetic responses with compressed names and CNAME
+       chains are generated.
+"""
+
+import random
+import string
+import struct
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from network.dns_parser import parse_dns_message
+from network.pcap_replay import iter_capture_file
+
+try:
+    import dns.message
+    DNSPYTHON_AVAILABLE = True
+except ImportError:
+    DNSPYTHON_AVAILABLE = False
+
+SYNTHETIC_RESPONSES = 5000
+ROUNDS = 5
+
+
+def encode_name(name: str, offsets: dict, message: bytearray) -> bytes:
+    """Encode a name, compressing against suffixes already in the message"""
+    labels = name.split('.')
+    out = bytearray()
+    for i in range(len(labels)):
+        suffix = '.'.join(labels[i:])
+        if suffix in offsets:
+            out += struct.pack('!H', 0xC000 | offsets[suffix])
+            return bytes(out)
+        offsets[suffix] = len(message) + len(out)
+        out.append(len(labels[i]))
+        out += labels[i].encode('ascii')
+    out.append(0)
+    return bytes(out)
+
+
+def make_response(rng: random.Random) -> bytes:
+    """Response to an A query with an optional CNAME chain (CDN style)"""
+    label = ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+    qname = f"www.{label}.com"
+    chain = [qname] + [f"edge{i}.{label}.cdn-provider.net" for i in range(rng.randint(0, 2))]
+    address_count = rng.randint(1, 4)
+
+    message = bytearray(struct.pack('!HHHHHH', rng.getrandbits(16), 0x8180, 1,
+                                    len(chain) - 1 + address_count, 0, 0))
+    offsets = {}
+    message += encode_name(qname, offsets, message)
+    message += struct.pack('!HH', 1, 1)
+
+    for owner, target in zip(chain, chain[1:]):
+        message += encode_name(owner, offsets, message)
+        rdata_start = len(message) + 10
+        target_bytes = encode_name(target, offsets, bytearray(rdata_start))
+        message += struct.pack('!HHIH', 5, 1, 300, len(target_bytes)) + target_bytes
+
+    for _ in range(address_count):
+        message += encode_name(chain[-1], offsets, message)
+        message += struct.pack('!HHIH', 1, 1, rng.randint(30, 3600), 4) + rng.getrandbits(32).to_bytes(4, 'big')
+
+    return bytes(message)
+
+
+def recorded_responses(path: Path) -> list:
+    """UDP payloads with source port 53 from a capture file"""
+    responses = []
+    for _, packet in iter_capture_file(path):
+        header_length = 40 if packet[0] >> 4 == 6 else (packet[0] & 0x0F) * 4
+        protocol = packet[6] if packet[0] >> 4 == 6 else packet[9]
+        if protocol == 17 and struct.unpack_from('!H', packet, header_length)[0] == 53:
+            responses.append(packet[header_length + 8:])
+    return responses
+
+
+def time_per_message(parse, messages: list) -> float:
+    best = None
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for message in messages:
+            parse(message)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(messages) * 1e6
+
+
+def dnspython_answers(wire: bytes) -> list:
+    """Equivalent work with dnspython: decode and collect A/AAAA addresses"""
+    message = dns.message.from_wire(wire)
+    return [item.address for rrset in message.answer if rrset.rdtype in (1, 28) for item in rrset]
+
+
+def main():
+    if len(sys.argv) > 1:
+        messages = recorded_responses(Path(sys.argv[1]))
+        source = sys.argv[1]
+    else:
+        rng = random.Random(7)
+        messages = [make_response(rng) for _ in range(SYNTHETIC_RESPONSES)]
+        source = 'synthetic'
+
+    if not messages:
+        print("No DNS responses found")
+        return
+
+    parsed = [parse_dns_message(m) for m in messages]
+    mapped = sum(len(p.answers) for p in parsed if p is not None)
+    print(f"responses: {len(messages)} ({source}), answer addresses mapped: {mapped}")
+    print(f"parse_dns_message: {time_per_message(parse_dns_message, messages):.2f} us/response")
+
+    if DNSPYTHON_AVAILABLE:
+        print(f"dnspython:         {time_per_message(dnspython_answers, messages):.2f} us/response")
+    else:
+        print("dnspython:         not installed (pip install dnspython to compare)")
+
+
+if __name__ == '__main__':
+    main()
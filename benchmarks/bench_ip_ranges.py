@@ -0,0 +1,68 @@
+"""
+Benchmark: IP range blocklist lookups against a 500k-prefix feed
+Measures IPRangeIndex build time and packed-address lookup latency
+
+Usage: python benchmarks/bench_ip_ranges.py [prefix_count]
+"""
+
+import random
+import socket
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from rules.ip_ranges import IPRangeIndex, normalize_ip_entry
+
+DEFAULT_PREFIXES = 500000
+LOOKUPS = 200000
+
+
+def make_feed(rng: random.Random, count: int) -> dict:
+    """Generate a DROP/FireHOL-like feed: mostly IPv4 /16-/32, some IPv6 /32-/64"""
+    feed = {}
+    while len(feed) < count:
+        if rng.random() < 0.9:
+            prefix = rng.choice([16, 20, 22, 24, 24, 24, 28, 32])
+            address = socket.inet_ntop(socket.AF_INET, rng.getrandbits(32).to_bytes(4, 'big'))
+            entry = f"{address}/{prefix}"
+        else:
+            prefix = rng.choice([32, 48, 56, 64])
+            address = socket.inet_ntop(socket.AF_INET6, rng.getrandbits(128).to_bytes(16, 'big'))
+            entry = f"{address}/{prefix}"
+        feed[normalize_ip_entry(entry)] = 'malware'
+    return feed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PREFIXES
+    rng = random.Random(7)
+
+    feed = make_feed(rng, count)
+
+    start = time.perf_counter()
+    index = IPRangeIndex(feed)
+    build_s = time.perf_counter() - start
+
+    addresses = [rng.getrandbits(32).to_bytes(4, 'big') for _ in range(LOOKUPS)]
+    addresses6 = [rng.getrandbits(128).to_bytes(16, 'big') for _ in range(LOOKUPS // 10)]
+
+    start = time.perf_counter()
+    hits = sum(1 for a in addresses if index.lookup_packed(a) is not None)
+    v4_us = (time.perf_counter() - start) / len(addresses) * 1e6
+
+    start = time.perf_counter()
+    for a in addresses6:
+        index.lookup_packed(a)
+    v6_us = (time.perf_counter() - start) / len(addresses6) * 1e6
+
+    print(f"prefixes: {count}  stats: {index.get_statistics()}")
+    print(f"build: {build_s:.2f} s")
+    print(f"IPv4 lookup: {v4_us:.2f} us ({hits} hits / {len(addresses)})")
+    print(f"IPv6 lookup: {v6_us:.2f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: blocklist pattern matching miss latency
+Compares the old linear regex scan with PatternMatcher as the pattern count grows
+
+Usage: python benchmarks/bench_patterns.py
+"""
+
+import random
+import re
+import string
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from rules.pattern_matcher import PatternMatcher
+
+PATTERN_COUNTS = [10, 100, 1000, 10000]
+LOOKUPS = 20000
+
+
+def random_label(rng: random.Random, low: int = 4, high: int = 10) -> str:
+    return ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(low, high)))
+
+
+def make_patterns(rng: random.Random, count: int) -> list:
+    """Generate adblock-style wildcard rules translated to regex"""
+    templates = [
+        r'^{0}\d*\.',
+        r'(^|\.){0}\.(com|net)$',
+        r'{0}-[a-z]+\.{1}\.',
+        r'^[a-z0-9]+\.{0}{1}\.',
+        r'\.{0}[0-9]?\.',
+    ]
+    patterns = []
+    for _ in range(count):
+        source = rng.choice(templates).format(random_label(rng), random_label(rng))
+        patterns.append((re.compile(source, re.IGNORECASE), 'advertising'))
+    return patterns
+
+
+def make_domains(rng: random.Random, count: int) -> list:
+    return [f"{random_label(rng)}.{random_label(rng)}.{rng.choice(['com', 'net', 'org'])}"
+            for _ in range(count)]
+
+
+def linear_scan(patterns: list, domain: str):
+    for pattern, category in patterns:
+        if pattern.search(domain):
+            return (pattern, category)
+    return None
+
+
+def time_per_lookup(func, domains: list) -> float:
+    start = time.perf_counter()
+    for domain in domains:
+        func(domain)
+    return (time.perf_counter() - start) / len(domains) * 1e6
+
+
+def main():
+    rng = random.Random(42)
+    domains = make_domains(rng, LOOKUPS)
+
+    print(f"{'patterns':>10} {'build ms':>10} {'linear us':>10} {'matcher us':>11} {'misses':>8}")
+    for count in PATTERN_COUNTS:
+        patterns = make_patterns(rng, count)
+
+        start = time.perf_counter()
+        matcher = PatternMatcher(patterns)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        misses = sum(1 for d in domains if matcher.search(d) is None)
+        linear_us = time_per_lookup(lambda d: linear_scan(patterns, d), domains[:2000])
+        matcher_us = time_per_lookup(matcher.search, domains)
+
+        print(f"{count:>10} {build_ms:>10.1f} {linear_us:>10.2f} {matcher_us:>11.2f} {misses:>8}")
+
+
+if __name__ == '__main__':
+    main()
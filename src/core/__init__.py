@@ -1,5 +1,7 @@
 # Core package initialization
-from .config import ConfigManager, get_config
+from .config import ConfigManager, Settings, get_config
+from .file_watcher import FileWatcher, get_file_watcher
 from .logger import DefensiqLogger, get_logger, EventType
 
-__all__ = ['ConfigManager', 'get_config', 'DefensiqLogger', 'get_logger', 'EventType']
+__all__ = ['ConfigManager', 'Settings', 'get_config', 'FileWatcher', 'get_file_watcher',
+           'DefensiqLogger', 'get_logger', 'EventType']
@@ -3,12 +3,83 @@ Configuration Manager for Defensiq Network Security
 Handles loading, saving, and managing application settings
 """
 
+import atexit
+import copy
 import json
 import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
 import hashlib
 
+from .file_watcher import get_file_watcher
+
+
+@dataclass(frozen=True)
+class AppSettings:
+    theme: str
+    auto_start: bool
+    minimize_to_tray: bool
+    show_notifications: bool
+
+
+@dataclass(frozen=True)
+class MonitoringSettings:
+    enabled: bool
+    capture_mode: str
+    update_interval: int
+    log_all_traffic: bool
+
+
+@dataclass(frozen=True)
+class FilteringSettings:
+    enabled: bool
+    block_mode: str
+    log_blocked: bool
+    flow_cache_size: int
+    flow_idle_timeout: int
+    workers: int
+    queue_depth: int
+    batch_size: int
+    dns_cache_size: int
+    quic_mode: str
+
+
+@dataclass(frozen=True)
+class CIATriadSettings:
+    confidentiality_checks: bool
+    integrity_checks: bool
+    availability_checks: bool
+    http_warning: bool
+    dos_threshold: int
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Immutable, typed snapshot of the configuration
+    
+    Rebuilt and swapped in whole on every change, so readers on hot paths
+    can hold a reference and read plain attributes without locking.
+    """
+    version: int
+    app: AppSettings
+    monitoring: MonitoringSettings
+    filtering: FilteringSettings
+    cia_triad: CIATriadSettings
+
+
+# Settings sections with a typed view
+_SECTION_TYPES = {
+    'app': AppSettings,
+    'monitoring': MonitoringSettings,
+    'filtering': FilteringSettings,
+    'cia_triad': CIATriadSettings
+}
+
+
 class ConfigManager:
     """Manages application configuration with integrity checks"""
     
@@ -28,7 +99,14 @@ class ConfigManager:
         'filtering': {
             'enabled': False,  # Must be explicitly enabled by user
             'block_mode': 'drop',  # 'drop' or 'reject'
-            'log_blocked': True
+            'log_blocked': True,
+            'flow_cache_size': 65536,  # flows with a cached verdict
+            'flow_idle_timeout': 120,  # seconds
+            'workers': 2,  # filter worker threads (packets hashed by flow)
+            'queue_depth': 4096,  # packets per worker queue / driver queue
+            'batch_size': 64,  # packets judged and reinjected per batch
+            'dns_cache_size': 65536,  # IP addresses mapped to resolved names
+            'quic_mode': 'inspect'  # 'inspect' (block by SNI), 'block' (force TCP) or 'allow'
         },
         'cia_triad': {
             'confidentiality_checks': True,
@@ -54,14 +132,32 @@ class ConfigManager:
         },
         'logging': {
             'level': 'INFO',  # DEBUG, INFO, WARNING, ERROR
-            'max_log_size_mb': 100,
-            'retention_days': 30,
-            'export_format': 'csv'  # csv, json, txt
+            'max_log_size_mb': 100,  # per file before it is rotated
+            'max_total_size_mb': 1024,  # compressed segments kept per log
+            'retention_days': 30,  # rotated segments and stored events
+            'event_store': True,  # indexed history for exports and reports
+            'export_format': 'csv',  # csv, json, txt
+            'async_writes': True,  # write on a background thread
+            'queue_size': 65536,  # events waiting for the writer
+            'flush_interval': 0.5,  # seconds
+            'overflow_policy': 'drop',  # 'drop' or 'sample' (traffic events) when the queue fills
+            'sample_rate': 16,  # keep 1 in N traffic events while sampling
+            'aggregate_traffic': True,  # one summary per flow and window instead of per packet
+            'aggregate_window': 10,  # seconds
+            'aggregate_max_keys': 10000  # distinct flows per window before folding
         }
     }
     
-    def __init__(self, config_dir: str = 'config'):
-        """Initialize configuration manager"""
+    # Seconds a debounced save waits for further changes
+    SAVE_DELAY = 1.0
+    
+    def __init__(self, config_dir: str = 'config', watch: bool = True):
+        """
+        Initialize configuration manager
+        Args:
+            config_dir: Directory holding settings.json
+            watch: Reload when another process changes settings.json
+        """
         self.config_dir = Path(config_dir)
         self.config_file = self.config_dir / 'settings.json'
         self.checksum_file = self.config_dir / '.settings.checksum'
@@ -69,15 +165,56 @@ class ConfigManager:
         # Ensure config directory exists
         self.config_dir.mkdir(exist_ok=True)
         
+        # Compiled snapshot and change subscribers
+        self.settings: Optional[Settings] = None
+        self._published: Dict[str, Any] = {}
+        self._subscribers: List[tuple] = []
+        self._publish_lock = threading.RLock()
+        
+        # Batched / debounced saves
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._batch_depth = 0
+        self._batch_backup: Optional[Dict[str, Any]] = None
+        self._save_timer: Optional[threading.Timer] = None
+        
+        # (mtime, size) of settings.json when last written or verified
+        self._file_state: Optional[Tuple[int, int]] = None
+        
+        # Shared watcher noticing edits by other processes (service / GUI)
+        self.watcher = get_file_watcher() if watch else None
+        
         # Load or create config
+        self.config: Dict[str, Any] = {}
         self.config = self.load()
+        self._publish()
+        atexit.register(self.flush)
+        
+        if self.watcher is not None:
+            self.watcher.watch(self.config_file, self._on_file_changed)
+    
+    def _stat_config_file(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.config_file.stat()
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
     
     def load(self) -> Dict[str, Any]:
-        """Load configuration from file with integrity check"""
+        """
+        Load configuration from file with integrity check
+        The file is not re-read (or re-verified) if its mtime and size are
+        unchanged since it was last written or verified.
+        """
         if not self.config_file.exists():
             # Create default config
-            self.save(self.DEFAULT_CONFIG)
-            return self.DEFAULT_CONFIG.copy()
+            config = copy.deepcopy(self.DEFAULT_CONFIG)
+            self.save(config)
+            return config
+        
+        file_state = self._stat_config_file()
+        if self.config and file_state is not None and file_state == self._file_state:
+            return self.config
         
         try:
             with open(self.config_file, 'r', encoding='utf-8') as f:
@@ -93,39 +230,203 @@ class ConfigManager:
                     print("[WARNING] Configuration file integrity check failed!")
                     # Log this event but continue - user may have manually edited
             
+            self._file_state = file_state
+            
             # Merge with defaults to ensure all keys exist
             return self._merge_with_defaults(config)
         
         except Exception as e:
             print(f"[ERROR] Failed to load config: {e}")
-            return self.DEFAULT_CONFIG.copy()
+            return copy.deepcopy(self.DEFAULT_CONFIG)
+    
+    def reload(self) -> bool:
+        """
+        Re-read settings.json if it changed on disk
+        Returns: True if a changed file was loaded (subscribers are notified)
+        """
+        with self._lock:
+            config = self.load()
+            if config is self.config:
+                return False
+            self.config = config
+            self._dirty = False
+            self._publish()
+            return True
     
     def save(self, config: Dict[str, Any] = None) -> bool:
-        """Save configuration to file with integrity checksum"""
-        if config is None:
-            config = self.config
+        """
+        Save configuration to file with integrity checksum
+        Each file is written to a temporary file and swapped in with
+        os.replace, so a crash never leaves a torn settings.json.
+        """
+        with self._lock:
+            if config is None:
+                config = self.config
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            
+            try:
+                # Write config
+                self._write_atomic(self.config_file, json.dumps(config, indent=4))
+                
+                # Calculate and save checksum
+                self._write_atomic(self.checksum_file, self._calculate_checksum(config))
+                
+                self.config = config
+                self._dirty = False
+                self._file_state = self._stat_config_file()
+                if self.watcher is not None:
+                    self.watcher.note_write(self.config_file)
+                return True
+            
+            except Exception as e:
+                print(f"[ERROR] Failed to save config: {e}")
+                return False
+            
+            finally:
+                # set() changes the live config even if writing it failed
+                self._publish()
+    
+    def _on_file_changed(self, path: Path, external: bool):
+        """File watcher: settings.json was changed by another process"""
+        with self._lock:
+            if self._dirty:
+                # Local changes are still waiting for their debounced save
+                print("[WARNING] settings.json changed on disk while local changes are pending; keeping local changes")
+                return
+        if self.reload():
+            print("[INFO] Configuration reloaded after external change")
+    
+    @staticmethod
+    def _write_atomic(path: Path, text: str):
+        """Write text to path via a temporary file and os.replace"""
+        temp_path = path.with_name(f".{path.name}.tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    
+    @contextmanager
+    def batch(self) -> Iterator['ConfigManager']:
+        """
+        Apply several set() calls, then save and notify subscribers once
+        Example:
+            with config.batch():
+                config.set('monitoring.log_all_traffic', True)
+                config.set('cia_triad.dos_threshold', 2000)
+        If the block raises, the configuration is rolled back.
+        """
+        with self._lock:
+            if self._batch_depth == 0:
+                self._batch_backup = copy.deepcopy(self.config)
+            self._batch_depth += 1
         
         try:
-            # Write config
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=4)
+            yield self
+        except BaseException:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self.config = self._batch_backup
+                    self._batch_backup = None
+                    self._dirty = False
+                    self._publish()
+            raise
+        
+        with self._lock:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._batch_backup = None
+                if self._dirty:
+                    self.save()
+    
+    def save_later(self, delay: float = None):
+        """Save after delay seconds without further changes (debounced)"""
+        with self._lock:
+            self._dirty = True
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(self.SAVE_DELAY if delay is None else delay, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+    
+    def flush(self) -> bool:
+        """Write pending debounced changes now"""
+        with self._lock:
+            if not self._dirty:
+                return True
+            return self.save()
+    
+    def subscribe(self, callback: Callable[[Settings, Set[str]], None], sections: List[str] = None):
+        """
+        Call callback(settings, changed_sections) after configuration changes
+        Args:
+            callback: Receives the new snapshot and the names of changed sections
+            sections: Only notify for changes to these sections (default: any)
+        """
+        with self._publish_lock:
+            self._subscribers.append((callback, set(sections) if sections else None))
+    
+    def unsubscribe(self, callback: Callable[[Settings, Set[str]], None]):
+        with self._publish_lock:
+            self._subscribers = [s for s in self._subscribers if s[0] != callback]
+    
+    def _publish(self):
+        """Rebuild the settings snapshot if the config changed and notify subscribers"""
+        with self._publish_lock:
+            config = self.config
+            changed = {
+                name for name in set(config) | set(self._published)
+                if config.get(name) != self._published.get(name)
+            }
+            if not changed and self.settings is not None:
+                return
             
-            # Calculate and save checksum
-            checksum = self._calculate_checksum(config)
-            with open(self.checksum_file, 'w') as f:
-                f.write(checksum)
+            previous = self.settings
+            sections = {
+                name: self._compile_section(name, section_type)
+                if previous is None or name in changed else getattr(previous, name)
+                for name, section_type in _SECTION_TYPES.items()
+            }
+            self._published = copy.deepcopy(config)
+            self.settings = Settings(version=previous.version + 1 if previous is not None else 1, **sections)
             
-            self.config = config
-            return True
+            settings = self.settings
+            subscribers = list(self._subscribers)
         
-        except Exception as e:
-            print(f"[ERROR] Failed to save config: {e}")
-            return False
+        for callback, sections in subscribers:
+            if sections is None or sections & changed:
+                try:
+                    callback(settings, changed)
+                except Exception as e:
+                    print(f"[ERROR] Configuration subscriber failed: {e}")
+    
+    def _compile_section(self, name: str, section_type: type):
+        """Typed view of one section; invalid values fall back to the defaults"""
+        values = self.config.get(name)
+        if not isinstance(values, dict):
+            values = {}
+        defaults = self.DEFAULT_CONFIG[name]
+        
+        compiled = {}
+        for field in fields(section_type):
+            value = values.get(field.name, defaults[field.name])
+            try:
+                if field.type is bool and not isinstance(value, bool):
+                    raise ValueError(f"expected true/false, got {value!r}")
+                compiled[field.name] = field.type(value)
+            except (TypeError, ValueError) as e:
+                print(f"[WARNING] Invalid setting {name}.{field.name} ({e}), using default")
+                compiled[field.name] = defaults[field.name]
+        return section_type(**compiled)
     
     def get(self, key_path: str, default: Any = None) -> Any:
         """
         Get configuration value by dot-notation path
         Example: get('monitoring.enabled')
+        Hot paths should read the typed snapshot instead (config.settings).
         """
         keys = key_path.split('.')
         value = self.config
@@ -138,29 +439,43 @@ class ConfigManager:
         
         return value
     
-    def set(self, key_path: str, value: Any) -> bool:
+    def set(self, key_path: str, value: Any, debounce: bool = False) -> bool:
         """
         Set configuration value by dot-notation path
         Example: set('monitoring.enabled', True)
+        Args:
+            debounce: Apply now but save after SAVE_DELAY seconds without
+                      further changes (for bursty UI controls)
+        Inside batch() the value is saved when the batch ends.
         """
-        keys = key_path.split('.')
-        config = self.config
-        
-        # Navigate to the parent dictionary
-        for key in keys[:-1]:
-            if key not in config:
-                config[key] = {}
-            config = config[key]
-        
-        # Set the value
-        config[keys[-1]] = value
-        
-        # Save to disk
-        return self.save()
+        with self._lock:
+            keys = key_path.split('.')
+            config = self.config
+            
+            # Navigate to the parent dictionary
+            for key in keys[:-1]:
+                if key not in config:
+                    config[key] = {}
+                config = config[key]
+            
+            # Set the value
+            config[keys[-1]] = value
+            
+            if self._batch_depth:
+                self._dirty = True
+                return True
+            
+            if debounce:
+                self._publish()
+                self.save_later()
+                return True
+            
+            # Save to disk
+            return self.save()
     
     def reset_to_defaults(self) -> bool:
         """Reset configuration to default values"""
-        return self.save(self.DEFAULT_CONFIG.copy())
+        return self.save(copy.deepcopy(self.DEFAULT_CONFIG))
     
     def _merge_with_defaults(self, config: Dict[str, Any]) -> Dict[str, Any]:
         """Merge loaded config with defaults to ensure all keys exist"""
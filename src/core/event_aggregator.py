@@ -0,0 +1,104 @@
+"""
+Event Aggregator for Defensiq Network Security
+Folds repeated traffic events into one summary per flow key and window
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class TrafficAggregator:
+    """
+    Per-window counters keyed by (allowed, protocol, dst_ip, dst_port, reason)
+
+    A blocked host retrying thousands of times a minute becomes one summary
+    per window carrying packet/byte counts and first/last seen times, so log
+    volume follows the number of distinct flows, not packets. Keys beyond
+    max_keys in one window are folded into a per-verdict "other" bucket.
+    """
+
+    def __init__(self, emit: Callable[[Tuple, Dict[str, Any]], None],
+                 window: float = 10.0, max_keys: int = 10000):
+        """
+        Args:
+            emit: Called with (key, summary) for every key when a window closes
+            window: Seconds per aggregation window
+            max_keys: Distinct keys tracked per window
+        """
+        self.emit = emit
+        self.window = window
+        self.max_keys = max(1, max_keys)
+
+        self._entries: Dict[Tuple, list] = {}
+        self._window_end = time.time() + window
+        self._lock = threading.Lock()
+
+        self.packets = 0
+        self.summaries = 0
+        self.folded = 0
+
+    def add(self, allowed: bool, protocol: str, src_ip: str, dst_ip: str, dst_port: int,
+            reason: str, size: int = 0):
+        """Count one packet; closes the window first if it has elapsed"""
+        now = time.time()
+        if now >= self._window_end:
+            self.flush(now)
+
+        key = (allowed, protocol, dst_ip, dst_port, reason)
+        with self._lock:
+            self.packets += 1
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.max_keys:
+                    self.folded += 1
+                    key = (allowed, protocol, None, None, None)
+                    entry = self._entries.get(key)
+                if entry is None:
+                    # count, bytes, first seen, last seen, last source
+                    self._entries[key] = [1, size, now, now, src_ip]
+                    return
+            entry[0] += 1
+            entry[1] += size
+            entry[3] = now
+            entry[4] = src_ip
+
+    def flush(self, now: float = None, force: bool = False) -> int:
+        """
+        Emit summaries if the window has elapsed (or force)
+        Returns: number of summaries emitted
+        """
+        if now is None:
+            now = time.time()
+
+        with self._lock:
+            if not force and now < self._window_end:
+                return 0
+            entries, self._entries = self._entries, {}
+            self._window_end = now + self.window
+
+        for key, (count, size, first_seen, last_seen, src_ip) in entries.items():
+            allowed, protocol, dst_ip, dst_port, reason = key
+            self.emit(key, {
+                'protocol': protocol,
+                'src_ip': src_ip,
+                'dst_ip': dst_ip if dst_ip is not None else '*',
+                'dst_port': dst_port if dst_port is not None else 0,
+                'reason': reason if reason is not None else 'other destinations (aggregation table full)',
+                'count': count,
+                'bytes': size,
+                'first_seen': first_seen,
+                'last_seen': last_seen
+            })
+        self.summaries += len(entries)
+        return len(entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get packet / summary counters and the open window size"""
+        return {
+            'packets': self.packets,
+            'summaries': self.summaries,
+            'folded': self.folded,
+            'open_keys': len(self._entries),
+            'window_seconds': self.window
+        }
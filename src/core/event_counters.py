@@ -0,0 +1,232 @@
+"""
+Event Counters for Defensiq Network Security
+Rolling per-minute / hour / day event counts for summaries and trends
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .file_lock import FileLock
+
+# (name, bucket width in seconds, buckets kept); days are UTC days
+LEVELS = (
+    ('minute', 60, 360),
+    ('hour', 3600, 24 * 90),
+    ('day', 86400, 730)
+)
+
+COUNTERS_VERSION = 1
+
+
+class RollingCounters:
+    """
+    Event counts in time buckets at three resolutions
+
+    Every event increments one counter per dimension ("type:...",
+    "verdict:...", "protocol:...", "category:...") in its minute, hour and
+    day bucket, so adding is O(1) and a summary over any range is a sum
+    over a handful of buckets: whole days, then whole hours, then minutes
+    at the edges. Buckets older than a level's retention are dropped as
+    new ones open; a range edge beyond minute retention is answered from
+    the enclosing hour (or day) bucket.
+
+    Several processes (service and GUI) may share one file: each save adds
+    only the counts made since the previous save to what is on disk, under
+    a lock file, and adopts the merged result.
+    """
+
+    def __init__(self, path=None, save_interval: float = 300.0):
+        """
+        Args:
+            path: JSON file the counters persist to (None: memory only)
+            save_interval: Minimum seconds between periodic saves
+        """
+        self.path = Path(path) if path is not None else None
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._buckets: List[Dict[int, Dict[str, int]]] = [{} for _ in LEVELS]
+        self._newest: List[Optional[int]] = [None] * len(LEVELS)
+        # Counts added since the last save, same layout as _buckets
+        self._unsaved: List[Dict[int, Dict[str, int]]] = [{} for _ in LEVELS]
+        self._file_lock = FileLock(self.path.with_name(self.path.name + '.lock')) if self.path else None
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self.load()
+
+    def add(self, timestamp: float, keys: Iterable[str], count: int = 1):
+        """Count an event (count occurrences) under each key"""
+        keys = tuple(keys)
+        with self._lock:
+            for level, (_, width, keep) in enumerate(LEVELS):
+                index = int(timestamp // width)
+                newest = self._newest[level]
+                if newest is not None and index <= newest - keep:
+                    continue  # beyond retention at this resolution
+
+                buckets = self._buckets[level]
+                bucket = buckets.get(index)
+                if bucket is None:
+                    bucket = buckets[index] = {}
+                    if newest is None or index > newest:
+                        self._newest[level] = index
+                        self._expire(level)
+                unsaved = self._unsaved[level].setdefault(index, {})
+                for key in keys:
+                    bucket[key] = bucket.get(key, 0) + count
+                    unsaved[key] = unsaved.get(key, 0) + count
+            self._dirty = True
+
+    def _expire(self, level: int):
+        """Drop buckets that fell out of a level's retention (holding _lock)"""
+        floor = self._newest[level] - LEVELS[level][2]
+        for buckets in (self._buckets[level], self._unsaved[level]):
+            for index in [index for index in buckets if index <= floor]:
+                del buckets[index]
+
+    def _retained(self, level: int, index: int) -> bool:
+        newest = self._newest[level]
+        return newest is not None and index > newest - LEVELS[level][2]
+
+    def totals(self, start: float, end: float = None) -> Dict[str, int]:
+        """Counts per key for events in [start, end] (minute granularity)"""
+        end = time.time() if end is None else end
+        position = int(start // 60) * 60
+        stop = (int(end // 60) + 1) * 60
+        totals: Dict[str, int] = {}
+
+        with self._lock:
+            while position < stop:
+                bucket = None
+                # Coarsest whole bucket that starts here and fits in the range
+                for level in range(len(LEVELS) - 1, -1, -1):
+                    width = LEVELS[level][1]
+                    index = position // width
+                    if position % width == 0 and position + width <= stop and self._retained(level, index):
+                        bucket = self._buckets[level].get(index)
+                        position += width
+                        break
+                else:
+                    # Edge beyond minute retention: finest retained enclosing bucket
+                    for level, (_, width, _) in enumerate(LEVELS):
+                        index = position // width
+                        if self._retained(level, index):
+                            bucket = self._buckets[level].get(index)
+                            position = (index + 1) * width
+                            break
+                    else:
+                        # Nothing kept this far back: skip to the oldest retained bucket
+                        floors = [
+                            (newest - keep + 1) * width
+                            for (_, width, keep), newest in zip(LEVELS, self._newest) if newest is not None
+                        ]
+                        floors = [floor for floor in floors if floor > position]
+                        if not floors:
+                            break
+                        position = min(floors)
+                        continue
+
+                if bucket:
+                    for key, count in bucket.items():
+                        totals[key] = totals.get(key, 0) + count
+
+        return totals
+
+    def series(self, key: str, start: float, end: float = None, resolution: str = 'hour') -> List[Tuple[float, int]]:
+        """(bucket start, count) for one key at one resolution, oldest first"""
+        level = [name for name, _, _ in LEVELS].index(resolution)
+        width = LEVELS[level][1]
+        end = time.time() if end is None else end
+        with self._lock:
+            buckets = self._buckets[level]
+            return [
+                (index * width, buckets.get(index, {}).get(key, 0))
+                for index in range(int(start // width), int(end // width) + 1)
+            ]
+
+    def maybe_save(self):
+        """Save if anything changed and save_interval has passed"""
+        if self._dirty and time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
+
+    def save(self):
+        """Add the counts since the last save to the file and adopt the merged result"""
+        if self.path is None:
+            return
+        self._last_save = time.monotonic()
+
+        with self._file_lock:
+            # Another process may have saved its own counts since we read the file
+            stored = self._read()
+            with self._lock:
+                unsaved = self._unsaved
+                self._unsaved = [{} for _ in LEVELS]
+                self._dirty = False
+                if stored is not None:
+                    for level, buckets in enumerate(unsaved):
+                        merged = stored[level]
+                        for index, bucket in buckets.items():
+                            target = merged.setdefault(index, {})
+                            for key, count in bucket.items():
+                                target[key] = target.get(key, 0) + count
+                    self._adopt(stored)
+                data = json.dumps({
+                    'version': COUNTERS_VERSION,
+                    'levels': {
+                        name: {str(index): bucket for index, bucket in self._buckets[level].items()}
+                        for level, (name, _, _) in enumerate(LEVELS)
+                    }
+                }, separators=(',', ':'))
+
+            temp_path = self.path.with_name(self.path.name + '.tmp')
+            try:
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                print(f"[WARNING] Could not save event counters: {e}")
+                with self._lock:
+                    # Retry these counts with the next save
+                    for level, buckets in enumerate(unsaved):
+                        for index, bucket in buckets.items():
+                            target = self._unsaved[level].setdefault(index, {})
+                            for key, count in bucket.items():
+                                target[key] = target.get(key, 0) + count
+                    self._dirty = True
+
+    def load(self):
+        """Load counters saved by a previous run (or another process)"""
+        if self.path is None:
+            return
+        stored = self._read()
+        if stored is not None:
+            with self._lock:
+                self._adopt(stored)
+
+    def _read(self) -> Optional[List[Dict[int, Dict[str, int]]]]:
+        """Buckets per level from the file, None if missing or unreadable"""
+        if not self.path.exists():
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != COUNTERS_VERSION:
+                return None
+            return [
+                {int(index): bucket for index, bucket in data['levels'].get(name, {}).items()}
+                for name, _, _ in LEVELS
+            ]
+        except (OSError, ValueError, KeyError, AttributeError) as e:
+            print(f"[WARNING] Could not load event counters, starting fresh: {e}")
+            return None
+
+    def _adopt(self, stored: List[Dict[int, Dict[str, int]]]):
+        """Replace the buckets with stored ones (holding _lock)"""
+        for level, buckets in enumerate(stored):
+            self._buckets[level] = buckets
+            self._newest[level] = max(buckets) if buckets else None
+            if buckets:
+                self._expire(level)
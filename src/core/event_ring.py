@@ -0,0 +1,111 @@
+"""
+Event Ring for Defensiq Network Security
+Fixed-size buffers of recent events addressed by sequence number
+"""
+
+import threading
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class _Ring:
+    """Preallocated circular buffer of (seq, event), oldest overwritten first"""
+
+    __slots__ = ('capacity', 'slots', 'count')
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self.slots: List[Optional[Tuple[int, Any]]] = [None] * self.capacity
+        self.count = 0  # entries ever appended
+
+    def append(self, seq: int, event: Any):
+        self.slots[self.count % self.capacity] = (seq, event)
+        self.count += 1
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def _entry(self, index: int) -> Tuple[int, Any]:
+        """index-th oldest entry still held"""
+        start = self.count - len(self)
+        return self.slots[(start + index) % self.capacity]
+
+    def after(self, seq: int, limit: Optional[int] = None) -> List[Tuple[int, Any]]:
+        """Entries with a sequence number greater than seq, oldest first"""
+        size = len(self)
+        first = bisect_right(range(size), seq, key=lambda i: self._entry(i)[0])
+        if limit is not None:
+            first = max(first, size - limit)
+        return [self._entry(i) for i in range(first, size)]
+
+    def last(self, count: int) -> List[Tuple[int, Any]]:
+        size = len(self)
+        return [self._entry(i) for i in range(max(0, size - count), size)]
+
+
+class EventRing:
+    """
+    Recent events with monotonically increasing sequence numbers
+
+    Every event goes into the main ring and into a ring of its type, so a
+    flood of one type (traffic) doesn't push rare ones (errors, threats)
+    out of reach. Appends and reads are O(1) / O(log n + k); readers that
+    remember the last sequence number they saw fetch only the delta.
+    """
+
+    def __init__(self, capacity: int = 1000, type_capacity: int = None):
+        """
+        Args:
+            capacity: Events kept across all types
+            type_capacity: Events kept per type (default: capacity)
+        """
+        self.capacity = capacity
+        self.type_capacity = type_capacity or capacity
+        self._ring = _Ring(capacity)
+        self._type_rings: Dict[Any, _Ring] = {}
+        self._lock = threading.Lock()
+        self.last_seq = 0
+
+    def append(self, event: Any, event_type: Any = None) -> int:
+        """Add an event; returns its sequence number (starting at 1)"""
+        with self._lock:
+            self.last_seq += 1
+            seq = self.last_seq
+            self._ring.append(seq, event)
+            if event_type is not None:
+                ring = self._type_rings.get(event_type)
+                if ring is None:
+                    ring = self._type_rings[event_type] = _Ring(self.type_capacity)
+                ring.append(seq, event)
+            return seq
+
+    def since(self, seq: int, event_type: Any = None, limit: Optional[int] = None) -> List[Tuple[int, Any]]:
+        """
+        (seq, event) pairs added after seq, oldest first
+        limit keeps only the newest entries of the delta
+        """
+        with self._lock:
+            if event_type is None:
+                # Main ring sequence numbers are contiguous: no search needed
+                count = self.last_seq - seq
+                if limit is not None:
+                    count = min(count, limit)
+                return self._ring.last(count) if count > 0 else []
+
+            ring = self._type_rings.get(event_type)
+            return ring.after(seq, limit) if ring is not None else []
+
+    def latest(self, count: int, event_type: Any = None) -> List[Any]:
+        """Newest count events (of a type), oldest first"""
+        with self._lock:
+            ring = self._ring if event_type is None else self._type_rings.get(event_type)
+            return [event for _, event in ring.last(count)] if ring is not None else []
+
+    def __len__(self) -> int:
+        return len(self._ring)
+
+    def clear(self):
+        """Drop all events (sequence numbers keep increasing)"""
+        with self._lock:
+            self._ring = _Ring(self.capacity)
+            self._type_rings = {}
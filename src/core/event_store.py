@@ -0,0 +1,159 @@
+"""
+Event Store for Defensiq Network Security
+Persistent, time-indexed event history (SQLite in WAL mode)
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    type TEXT NOT NULL,
+    message TEXT NOT NULL,
+    protocol TEXT,
+    src_ip TEXT,
+    dst_ip TEXT,
+    dst_port INTEGER,
+    count INTEGER NOT NULL DEFAULT 1,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS events_ts ON events (ts, type, count);
+CREATE INDEX IF NOT EXISTS events_type_ts ON events (type, ts);
+CREATE INDEX IF NOT EXISTS events_src_ts ON events (src_ip, ts);
+CREATE INDEX IF NOT EXISTS events_dst_ts ON events (dst_ip, ts);
+"""
+
+# Rows deleted per statement when pruning (keeps the write lock short)
+PRUNE_CHUNK = 50000
+
+
+class EventStore:
+    """
+    Append-mostly event table indexed by time, type and address
+
+    The log writer thread inserts each batch in one transaction; readers
+    open their own connections (WAL lets them run alongside the writer),
+    so queries never block logging and only touch the indexed range.
+    """
+
+    def __init__(self, path):
+        """Open (or create) the store at path"""
+        self.path = Path(path)
+        self._write_lock = threading.Lock()
+        self._connection = self._connect()
+        self._connection.executescript(SCHEMA)
+        self._connection.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30.0)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def add_batch(self, events: Sequence[Tuple[float, str, str, Dict[str, Any]]]):
+        """Insert (timestamp, type, message, metadata) tuples in one transaction"""
+        rows = []
+        for timestamp, event_type, message, metadata in events:
+            metadata = metadata or {}
+            rows.append((
+                timestamp, event_type, message,
+                metadata.get('protocol'), metadata.get('src_ip'), metadata.get('dst_ip'),
+                metadata.get('dst_port'), metadata.get('count', 1),
+                json.dumps(metadata, default=str) if metadata else None
+            ))
+
+        with self._write_lock:
+            with self._connection:
+                self._connection.executemany(
+                    'INSERT INTO events (ts, type, message, protocol, src_ip, dst_ip, dst_port, count, metadata) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    rows
+                )
+
+    def _where(self, start: Optional[float], end: Optional[float], event_types: Optional[List[str]],
+               ip: Optional[str]) -> Tuple[str, list]:
+        clauses = []
+        params = []
+        if start is not None:
+            clauses.append('ts >= ?')
+            params.append(start)
+        if end is not None:
+            clauses.append('ts <= ?')
+            params.append(end)
+        if event_types:
+            clauses.append(f"type IN ({', '.join('?' * len(event_types))})")
+            params.extend(event_types)
+        if ip:
+            clauses.append('(src_ip = ? OR dst_ip = ?)')
+            params.extend((ip, ip))
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else '', params)
+
+    def query(self, start: float = None, end: float = None, event_types: List[str] = None,
+              ip: str = None, limit: int = None) -> Iterator[Dict[str, Any]]:
+        """
+        Events in [start, end] (epoch seconds) of the given types / address,
+        oldest first, streamed from a private read connection
+        """
+        where, params = self._where(start, end, event_types, ip)
+        sql = f'SELECT ts, type, message, metadata FROM events{where} ORDER BY ts, id'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+
+        connection = self._connect()
+        try:
+            cursor = connection.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(1000)
+                if not rows:
+                    break
+                for ts, event_type, message, metadata in rows:
+                    yield {
+                        'timestamp': datetime.fromtimestamp(ts).isoformat(),
+                        'type': event_type,
+                        'message': message,
+                        'metadata': json.loads(metadata) if metadata else {}
+                    }
+        finally:
+            connection.close()
+
+    def count(self, start: float = None, end: float = None, event_types: List[str] = None,
+              ip: str = None) -> int:
+        """Number of stored events matching the filters"""
+        where, params = self._where(start, end, event_types, ip)
+        connection = self._connect()
+        try:
+            return connection.execute(f'SELECT COUNT(*) FROM events{where}', params).fetchone()[0]
+        finally:
+            connection.close()
+
+    def prune(self, retention_days: int):
+        """Delete events older than retention_days (in short chunks)"""
+        if not retention_days:
+            return
+        cutoff = time.time() - retention_days * 86400
+
+        while True:
+            with self._write_lock:
+                with self._connection:
+                    deleted = self._connection.execute(
+                        'DELETE FROM events WHERE id IN '
+                        '(SELECT id FROM events WHERE ts < ? ORDER BY ts LIMIT ?)',
+                        (cutoff, PRUNE_CHUNK)
+                    ).rowcount
+            if deleted < PRUNE_CHUNK:
+                break
+
+        with self._write_lock:
+            self._connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def close(self):
+        with self._write_lock:
+            self._connection.close()
@@ -0,0 +1,85 @@
+"""
+File Lock for Defensiq Network Security
+Lock files serializing writers across the service and GUI processes
+"""
+
+import os
+import threading
+from pathlib import Path
+
+# POSIX: flock; Windows: msvcrt byte-range locks
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    import msvcrt
+    FCNTL_AVAILABLE = False
+
+
+class FileLock:
+    """
+    Exclusive lock held across processes and threads
+
+    The lock file stays open for the lifetime of the object; acquiring
+    takes a thread lock first, then the OS lock on the file. Not
+    reentrant. Usable as a context manager.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: Lock file (created if missing, its content is unused)
+        """
+        self.path = Path(path)
+        self._thread_lock = threading.Lock()
+        self._fd = None
+
+    def acquire(self):
+        """Block until this process holds the lock"""
+        self._thread_lock.acquire()
+        try:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            if FCNTL_AVAILABLE:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                while True:
+                    try:
+                        # LK_LOCK gives up after ~10 s of retries; keep waiting
+                        msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue
+        except BaseException:
+            self._thread_lock.release()
+            raise
+
+    def release(self):
+        """Release the lock"""
+        try:
+            if FCNTL_AVAILABLE:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            self._thread_lock.release()
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+def fsync_directory(path):
+    """Flush a directory entry change (rename/unlink) to disk (no-op on Windows)"""
+    if os.name == 'nt':
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
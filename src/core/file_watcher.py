@@ -0,0 +1,418 @@
+"""
+File Watcher for Defensiq Network Security
+Notices changes other processes make to configuration and rule files
+"""
+
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Linux: inotify through libc
+import ctypes
+import ctypes.util
+INOTIFY_AVAILABLE = sys.platform.startswith('linux')
+
+# Windows: ReadDirectoryChangesW through pywin32
+try:
+    import pywintypes
+    import win32con
+    import win32event
+    import win32file
+    PYWIN32_AVAILABLE = True
+except ImportError:
+    PYWIN32_AVAILABLE = False
+
+# Callback(path, external): external is False for the process's own writes
+WatchCallback = Callable[[Path, bool], None]
+
+# (mtime_ns, size) of a file, None if it does not exist
+FileState = Optional[Tuple[int, int]]
+
+
+def _stat(path: Path) -> FileState:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class _InotifyBackend:
+    """Directory watches on an inotify descriptor, read by one thread"""
+
+    name = 'inotify'
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+    def __init__(self, notify: Callable[[Path], None], notify_all: Callable[[], None]):
+        self.notify = notify
+        self.notify_all = notify_all
+
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._add_watch.restype = ctypes.c_int
+
+        self._fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+        self._directories: Dict[int, Path] = {}
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    def add_directory(self, directory: Path):
+        wd = self._add_watch(self._fd, os.fsencode(str(directory)), self.MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, f"inotify_add_watch {directory}: {os.strerror(error)}")
+        self._directories[wd] = directory
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='defensiq-inotify', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping = True
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        os.close(self._fd)
+
+    def _run(self):
+        header = self.EVENT_HEADER
+        while not self._stopping:
+            readable, _, _ = select.select([self._fd], [], [], 0.5)
+            if not readable:
+                continue
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                continue
+            except OSError as e:
+                print(f"[ERROR] inotify read failed: {e}")
+                return
+
+            offset = 0
+            while offset + header.size <= len(data):
+                wd, mask, _, length = header.unpack_from(data, offset)
+                name = data[offset + header.size:offset + header.size + length].rstrip(b'\0')
+                offset += header.size + length
+
+                if mask & self.IN_Q_OVERFLOW:
+                    self.notify_all()
+                    continue
+                directory = self._directories.get(wd)
+                if directory is not None and name:
+                    self.notify(directory / os.fsdecode(name))
+
+
+class _DirectoryChangesBackend:
+    """One overlapped ReadDirectoryChangesW loop per watched directory"""
+
+    name = 'ReadDirectoryChangesW'
+
+    FILE_LIST_DIRECTORY = 0x0001
+    BUFFER_SIZE = 16384
+
+    def __init__(self, notify: Callable[[Path], None], notify_all: Callable[[], None]):
+        if not PYWIN32_AVAILABLE:
+            raise OSError("pywin32 not available")
+        self.notify = notify
+        self.notify_all = notify_all
+        self._stopping = False
+        self._threads: List[threading.Thread] = []
+
+    def add_directory(self, directory: Path):
+        handle = win32file.CreateFile(
+            str(directory),
+            self.FILE_LIST_DIRECTORY,
+            win32con.FILE_SHARE_READ | win32con.FILE_SHARE_WRITE | win32con.FILE_SHARE_DELETE,
+            None,
+            win32con.OPEN_EXISTING,
+            win32con.FILE_FLAG_BACKUP_SEMANTICS | win32con.FILE_FLAG_OVERLAPPED,
+            None
+        )
+        thread = threading.Thread(target=self._run, args=(directory, handle),
+                                  name='defensiq-dirchanges', daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def start(self):
+        pass
+
+    def stop(self):
+        self._stopping = True
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+
+    def _run(self, directory: Path, handle):
+        overlapped = pywintypes.OVERLAPPED()
+        overlapped.hEvent = win32event.CreateEvent(None, True, False, None)
+        buffer = win32file.AllocateReadBuffer(self.BUFFER_SIZE)
+        changes = (win32con.FILE_NOTIFY_CHANGE_FILE_NAME | win32con.FILE_NOTIFY_CHANGE_LAST_WRITE |
+                   win32con.FILE_NOTIFY_CHANGE_SIZE)
+
+        try:
+            while not self._stopping:
+                win32file.ReadDirectoryChangesW(handle, buffer, False, changes, overlapped)
+                while not self._stopping:
+                    if win32event.WaitForSingleObject(overlapped.hEvent, 500) == win32event.WAIT_OBJECT_0:
+                        break
+                if self._stopping:
+                    win32file.CancelIo(handle)
+                    break
+
+                size = win32file.GetOverlappedResult(handle, overlapped, True)
+                if size == 0:
+                    # Buffer overflowed: the changed names are lost
+                    self.notify_all()
+                    continue
+                for _, name in win32file.FILE_NOTIFY_INFORMATION(buffer, size):
+                    self.notify(directory / name)
+        except pywintypes.error as e:
+            print(f"[ERROR] Watching {directory} failed: {e}")
+        finally:
+            handle.Close()
+
+
+class _PollingBackend:
+    """Re-checks every watched file each interval (mtime and size only)"""
+
+    name = 'polling'
+
+    def __init__(self, notify_all: Callable[[], None], interval: float):
+        self.notify_all = notify_all
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_directory(self, directory: Path):
+        pass
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='defensiq-file-poll', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.notify_all()
+
+
+class FileWatcher:
+    """
+    Shared watcher for files other processes may change
+
+    OS notifications (inotify on Linux, ReadDirectoryChangesW on Windows,
+    otherwise mtime polling) only mark a file as possibly changed; once its
+    events have settled for `debounce` seconds, the dispatcher thread
+    compares the file's mtime and size with the last state it saw and calls
+    the callbacks only if they differ. Components report their own writes
+    with note_write(), so those are delivered as self-writes (only to
+    callbacks that ask for them) rather than as external edits.
+    """
+
+    # Longest a file changing continuously can delay its callbacks
+    MAX_DELAY = 2.0
+
+    def __init__(self, debounce: float = 0.3, poll_interval: float = 2.0, backend: str = None):
+        """
+        Args:
+            debounce: Seconds without events before a change is dispatched
+            poll_interval: Seconds between checks for the polling backend
+            backend: 'inotify', 'ReadDirectoryChangesW' or 'polling' (default: best available)
+        """
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.requested_backend = backend
+
+        self._lock = threading.Lock()
+        self._watches: Dict[Path, List[Tuple[WatchCallback, bool]]] = {}
+        self._states: Dict[Path, FileState] = {}
+        self._self_states: Dict[Path, FileState] = {}
+        self._directories = set()
+        self._pending: Dict[Path, Tuple[float, float]] = {}  # path -> (first event, due)
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self.backend = None
+
+        self.changes = 0
+        self.self_writes = 0
+
+    @staticmethod
+    def _key(path) -> Path:
+        return Path(os.path.abspath(path))
+
+    def _create_backend(self):
+        candidates = []
+        if self.requested_backend in (None, _InotifyBackend.name) and INOTIFY_AVAILABLE:
+            candidates.append(lambda: _InotifyBackend(self._touch, self._touch_all))
+        if self.requested_backend in (None, _DirectoryChangesBackend.name) and PYWIN32_AVAILABLE:
+            candidates.append(lambda: _DirectoryChangesBackend(self._touch, self._touch_all))
+
+        for create in candidates:
+            try:
+                return create()
+            except Exception as e:
+                print(f"[WARNING] File change notifications unavailable, polling instead: {e}")
+        return _PollingBackend(self._touch_all, self.poll_interval)
+
+    def start(self):
+        """Start the backend and dispatcher threads (done by the first watch)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.backend = self._create_backend()
+            self.backend.start()
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='defensiq-file-watcher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        thread = self._thread
+        if thread is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        thread.join(timeout=2.0)
+        self.backend.stop()
+        self._thread = None
+        self._directories.clear()
+
+    def watch(self, path, callback: WatchCallback, self_writes: bool = False):
+        """
+        Call callback(path, external) when path changes
+        Args:
+            path: File to watch (need not exist yet; its directory must)
+            callback: Runs on the dispatcher thread
+            self_writes: Also call back (external=False) for changes reported with note_write
+        """
+        self.start()
+        key = self._key(path)
+
+        with self._lock:
+            if key not in self._watches:
+                self._watches[key] = []
+                self._states[key] = _stat(key)
+            self._watches[key].append((callback, self_writes))
+
+            directory = key.parent
+            if directory in self._directories:
+                return
+            self._directories.add(directory)
+
+        try:
+            self.backend.add_directory(directory)
+        except Exception as e:
+            print(f"[WARNING] Could not watch {directory}, changes there are not noticed: {e}")
+
+    def unwatch(self, path, callback: WatchCallback = None):
+        """Stop calling callback (default: every callback) for path"""
+        key = self._key(path)
+        with self._lock:
+            watches = [w for w in self._watches.get(key, []) if callback is not None and w[0] != callback]
+            if watches:
+                self._watches[key] = watches
+            else:
+                self._watches.pop(key, None)
+                self._states.pop(key, None)
+                self._self_states.pop(key, None)
+
+    def note_write(self, path):
+        """Record that this process just wrote path (call right after the write)"""
+        key = self._key(path)
+        if key in self._watches:
+            self._self_states[key] = _stat(key)
+
+    def _touch(self, path: Path):
+        """Backend: path may have changed"""
+        if path not in self._watches:
+            return
+        now = time.monotonic()
+        with self._lock:
+            first = self._pending[path][0] if path in self._pending else now
+            self._pending[path] = (first, min(now + self.debounce, first + self.MAX_DELAY))
+        self._wake.set()
+
+    def _touch_all(self):
+        """Backend: events were lost (or polling) - re-check every file"""
+        for path in list(self._watches):
+            self._touch(path)
+
+    def _run(self):
+        while not self._stopping:
+            now = time.monotonic()
+            with self._lock:
+                due = [path for path, (_, at) in self._pending.items() if at <= now]
+                for path in due:
+                    del self._pending[path]
+                wait = min((at for _, at in self._pending.values()), default=now + 1.0) - now
+
+            for path in due:
+                self._dispatch(path)
+
+            self._wake.wait(max(wait, 0.01))
+            self._wake.clear()
+
+    def _dispatch(self, path: Path):
+        state = _stat(path)
+        with self._lock:
+            if path not in self._watches or state == self._states.get(path):
+                return
+            self._states[path] = state
+            external = path not in self._self_states or state != self._self_states[path]
+            callbacks = [callback for callback, self_writes in self._watches[path] if external or self_writes]
+
+        if external:
+            self.changes += 1
+        else:
+            self.self_writes += 1
+
+        for callback in callbacks:
+            try:
+                callback(path, external)
+            except Exception as e:
+                print(f"[ERROR] File watch callback for {path.name} failed: {e}")
+
+    def get_stats(self) -> dict:
+        return {
+            'backend': self.backend.name if self.backend is not None else None,
+            'files': len(self._watches),
+            'directories': len(self._directories),
+            'external_changes': self.changes,
+            'self_writes': self.self_writes
+        }
+
+
+# Global watcher instance
+_watcher_instance = None
+
+def get_file_watcher() -> FileWatcher:
+    """Get global file watcher instance"""
+    global _watcher_instance
+    if _watcher_instance is None:
+        _watcher_instance = FileWatcher()
+    return _watcher_instance
@@ -0,0 +1,178 @@
+"""
+Log Export for Defensiq Network Security
+Streams events to CSV / JSONL / JSON / text / Parquet in constant memory
+"""
+
+import csv
+import gzip
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Optional Parquet support
+try:
+    import pyarrow
+    import pyarrow.parquet
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+EXPORT_FORMATS = ('csv', 'jsonl', 'json', 'txt', 'parquet')
+
+# Metadata keys flattened into their own columns; others go to metadata_other
+METADATA_COLUMNS = (
+    'protocol', 'src_ip', 'dst_ip', 'dst_port', 'reason',
+    'count', 'bytes', 'first_seen', 'last_seen'
+)
+COLUMNS = ('timestamp', 'type', 'message') + METADATA_COLUMNS + ('metadata_other',)
+
+# Rows between progress callbacks / cancellation checks (and per Parquet row group)
+CHUNK_ROWS = 5000
+
+
+class ExportCancelled(Exception):
+    """Raised inside export_events when the cancel event is set"""
+
+
+def flatten_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Event as one flat row of COLUMNS"""
+    metadata = event.get('metadata') or {}
+    row = {
+        'timestamp': event.get('timestamp'),
+        'type': event.get('type'),
+        'message': event.get('message')
+    }
+    for key in METADATA_COLUMNS:
+        row[key] = metadata.get(key)
+    other = {key: value for key, value in metadata.items() if key not in METADATA_COLUMNS}
+    row['metadata_other'] = json.dumps(other, default=str) if other else None
+    return row
+
+
+def export_events(events: Iterable[Dict[str, Any]], output_path: str, format: str = 'csv',
+                  compress: bool = None, progress: Callable[[int, Optional[int]], None] = None,
+                  cancel: threading.Event = None, total: int = None) -> int:
+    """
+    Write events to a file without holding them in memory
+    Args:
+        events: Iterable of event dicts (e.g. EventStore.query)
+        output_path: Target file; a partial file is removed on failure/cancel
+        format: One of EXPORT_FORMATS
+        compress: gzip the output (default: when output_path ends in .gz)
+        progress: Called with (rows written, total) every CHUNK_ROWS rows and at the end
+        cancel: Set to abort the export (raises ExportCancelled)
+        total: Expected row count, passed through to progress
+    Returns: number of events written
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {format}")
+    if compress is None:
+        compress = output_path.endswith('.gz')
+
+    def checkpoint(written: int):
+        if cancel is not None and cancel.is_set():
+            raise ExportCancelled()
+        if progress is not None:
+            progress(written, total)
+
+    try:
+        if format == 'parquet':
+            written = _export_parquet(events, output_path, compress, checkpoint)
+        else:
+            opener = gzip.open if compress else open
+            newline = '' if format == 'csv' else None
+            with opener(output_path, 'wt', encoding='utf-8', newline=newline) as f:
+                written = _WRITERS[format](events, f, checkpoint)
+    except BaseException:
+        try:
+            os.remove(output_path)
+        except OSError:
+            pass
+        raise
+
+    if progress is not None:
+        progress(written, total)
+    return written
+
+
+def _export_csv(events, f, checkpoint) -> int:
+    writer = csv.DictWriter(f, fieldnames=COLUMNS)
+    writer.writeheader()
+    written = 0
+    for event in events:
+        writer.writerow(flatten_event(event))
+        written += 1
+        if written % CHUNK_ROWS == 0:
+            checkpoint(written)
+    return written
+
+
+def _export_jsonl(events, f, checkpoint) -> int:
+    written = 0
+    for event in events:
+        f.write(json.dumps(event, default=str))
+        f.write('\n')
+        written += 1
+        if written % CHUNK_ROWS == 0:
+            checkpoint(written)
+    return written
+
+
+def _export_json(events, f, checkpoint) -> int:
+    """JSON array written element by element"""
+    written = 0
+    f.write('[')
+    for event in events:
+        f.write(',\n  ' if written else '\n  ')
+        f.write(json.dumps(event, default=str))
+        written += 1
+        if written % CHUNK_ROWS == 0:
+            checkpoint(written)
+    f.write('\n]\n' if written else ']\n')
+    return written
+
+
+def _export_txt(events, f, checkpoint) -> int:
+    written = 0
+    for event in events:
+        f.write(f"[{event['timestamp']}] {event['type']}: {event['message']}\n")
+        written += 1
+        if written % CHUNK_ROWS == 0:
+            checkpoint(written)
+    return written
+
+
+_WRITERS = {
+    'csv': _export_csv,
+    'jsonl': _export_jsonl,
+    'json': _export_json,
+    'txt': _export_txt
+}
+
+
+def _export_parquet(events, output_path: str, compress: bool, checkpoint) -> int:
+    """One row group per CHUNK_ROWS events"""
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+
+    schema = pyarrow.schema([
+        (name, pyarrow.int64() if name in ('dst_port', 'count', 'bytes') else pyarrow.string())
+        for name in COLUMNS
+    ])
+    written = 0
+    chunk: List[Dict[str, Any]] = []
+
+    with pyarrow.parquet.ParquetWriter(output_path, schema, compression='gzip' if compress else 'snappy') as writer:
+        for event in events:
+            chunk.append(flatten_event(event))
+            if len(chunk) == CHUNK_ROWS:
+                writer.write_table(pyarrow.Table.from_pylist(chunk, schema=schema))
+                written += len(chunk)
+                chunk = []
+                checkpoint(written)
+        if chunk:
+            writer.write_table(pyarrow.Table.from_pylist(chunk, schema=schema))
+            written += len(chunk)
+
+    return written
@@ -0,0 +1,263 @@
+"""
+Log Rotation for Defensiq Network Security
+Size/daily rotation of log files with background compression and pruning
+"""
+
+import gzip
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from .file_lock import FileLock
+from .log_writer import BufferedFileHandler
+
+# Rotated segments: activity.log.20240131-235959 -> activity.log.20240131-235959.gz
+SEGMENT_TIME_FORMAT = '%Y%m%d-%H%M%S'
+
+# Lock file in the log directory serializing rotation across processes
+# (not named <log>.*, which would make it a segment)
+ROTATION_LOCK_NAME = 'rotation.lock'
+
+# Seconds to wait before retrying a rotation that failed
+ROTATE_RETRY_INTERVAL = 60.0
+
+
+class RotatingBufferedFileHandler(BufferedFileHandler):
+    """
+    BufferedFileHandler that rolls over by size and at midnight
+
+    Rolling over is a close and a rename; the renamed segment is handed to
+    on_rotate (LogMaintenance) to be compressed off the logging path.
+    Processes sharing the file rotate under one lock, and only the process
+    still writing to the file that is due rotates it; the others reopen.
+    """
+
+    def __init__(self, filename, max_bytes: int, on_rotate: Optional[Callable[[Path], None]] = None,
+                 encoding: str = 'utf-8'):
+        self._inode: Optional[int] = None
+        super().__init__(filename, encoding=encoding)
+        self.max_bytes = max_bytes
+        self.on_rotate = on_rotate
+        self.path = Path(self.baseFilename)
+        self._size = self.path.stat().st_size if self.path.exists() else 0
+        self._rollover_at = self._next_midnight(time.time())
+        self._retry_at = 0.0
+        self._rotation_lock = FileLock(self.path.with_name(ROTATION_LOCK_NAME))
+
+    def _open(self):
+        stream = super()._open()
+        self._inode = os.fstat(stream.fileno()).st_ino
+        return stream
+
+    @staticmethod
+    def _next_midnight(now: float) -> float:
+        tomorrow = datetime.fromtimestamp(now).date() + timedelta(days=1)
+        return datetime.combine(tomorrow, datetime.min.time()).timestamp()
+
+    def emit(self, record):
+        if record.created >= self._rollover_at or (
+                self.max_bytes and self._size >= self.max_bytes and record.created >= self._retry_at):
+            self.rotate()
+        if self.stream is None:
+            self.stream = self._open()
+        try:
+            text = self.format(record) + self.terminator
+            self.stream.write(text)
+            self._size += len(text) if text.isascii() else len(text.encode(self.encoding or 'utf-8'))
+        except Exception:
+            self.handleError(record)
+
+    def rotate(self):
+        """Close the current file and rename it to a timestamped segment"""
+        self._rollover_at = self._next_midnight(time.time())
+        inode = self._inode
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+        with self._rotation_lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                self._size = 0
+                return
+            if stat.st_ino != inode or stat.st_size == 0:
+                # Another process already rotated it: continue in the new file
+                self._size = stat.st_size
+                return
+
+            segment = self.path.with_name(f"{self.path.name}.{datetime.now().strftime(SEGMENT_TIME_FORMAT)}")
+            suffix = 1
+            while segment.exists() or segment.with_name(segment.name + '.gz').exists():
+                segment = self.path.with_name(
+                    f"{self.path.name}.{datetime.now().strftime(SEGMENT_TIME_FORMAT)}-{suffix}"
+                )
+                suffix += 1
+
+            try:
+                os.replace(self.path, segment)
+                error = None
+            except OSError as e:
+                error = e
+
+        if error is not None:
+            # Keep appending to the current file and retry later; logged
+            # outside the lock, as the record may reach another rotating handler
+            self._retry_at = time.time() + ROTATE_RETRY_INTERVAL
+            logging.getLogger('defensiq.general').warning(
+                "Could not rotate %s (retrying in %.0f s): %s",
+                self.path.name, ROTATE_RETRY_INTERVAL, error
+            )
+            return
+        self._size = 0
+
+        if self.on_rotate is not None:
+            self.on_rotate(segment)
+
+
+class LogMaintenance:
+    """
+    Background thread compressing rotated segments and pruning old ones
+
+    Segments older than retention_days, and the oldest ones beyond
+    max_total_bytes per log, are deleted. Other periodic cleanup (the event
+    store) can be attached with add_task.
+    """
+
+    def __init__(self, log_dir: Path, log_names: List[str], retention_days: int = 30,
+                 max_total_bytes: int = 0, interval: float = 3600.0):
+        """
+        Args:
+            log_dir: Directory holding the logs
+            log_names: Active log file names whose segments are managed
+            retention_days: Age after which segments are deleted (0 keeps them)
+            max_total_bytes: Size budget for the segments of one log (0: none)
+            interval: Seconds between pruning passes
+        """
+        self.log_dir = Path(log_dir)
+        self.log_names = log_names
+        self.retention_days = retention_days
+        self.max_total_bytes = max_total_bytes
+        self.interval = interval
+
+        self._pending: List[Path] = []
+        self._tasks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.compressed = 0
+        self.pruned = 0
+
+    def start(self):
+        """Start the maintenance thread (compresses segments left by a previous run)"""
+        if self._thread is not None:
+            return
+        for name in self.log_names:
+            for segment in self.log_dir.glob(f"{name}.*"):
+                if segment.suffix != '.gz':
+                    self._pending.append(segment)
+
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='defensiq-log-maintenance', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        thread = self._thread
+        if thread is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        thread.join(timeout=10.0)
+        self._thread = None
+
+    def add_task(self, task: Callable[[], None]):
+        """Run task on every pruning pass"""
+        self._tasks.append(task)
+
+    def segment_rotated(self, segment: Path):
+        """Queue a freshly rotated segment for compression (called by handlers)"""
+        with self._lock:
+            self._pending.append(segment)
+        self._wake.set()
+
+    def _run(self):
+        next_prune = 0.0
+        while not self._stopping:
+            self._compress_pending()
+
+            now = time.monotonic()
+            if now >= next_prune:
+                self.prune()
+                next_prune = now + self.interval
+
+            self._wake.wait(min(self.interval, 60.0))
+            self._wake.clear()
+
+    def _compress_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+
+        for segment in pending:
+            if self._stopping:
+                with self._lock:
+                    self._pending.append(segment)
+                continue
+            target = segment.with_name(segment.name + '.gz')
+            try:
+                with open(segment, 'rb') as source, gzip.open(target, 'wb', compresslevel=6) as out:
+                    shutil.copyfileobj(source, out, 1024 * 1024)
+                os.utime(target, (segment.stat().st_atime, segment.stat().st_mtime))
+                segment.unlink()
+                self.compressed += 1
+            except OSError as e:
+                print(f"[WARNING] Could not compress log segment {segment.name}: {e}")
+                try:
+                    target.unlink()
+                except OSError:
+                    pass
+
+    def prune(self):
+        """Delete segments past retention or beyond the size budget"""
+        cutoff = time.time() - self.retention_days * 86400 if self.retention_days else None
+
+        for name in self.log_names:
+            segments = []
+            for segment in self.log_dir.glob(f"{name}.*"):
+                try:
+                    stat = segment.stat()
+                except OSError:
+                    continue
+                segments.append((stat.st_mtime, stat.st_size, segment))
+            segments.sort(reverse=True)  # newest first
+
+            total = 0
+            for mtime, size, segment in segments:
+                total += size
+                expired = cutoff is not None and mtime < cutoff
+                over_budget = self.max_total_bytes and total > self.max_total_bytes
+                if expired or over_budget:
+                    try:
+                        segment.unlink()
+                        self.pruned += 1
+                    except OSError as e:
+                        print(f"[WARNING] Could not delete log segment {segment.name}: {e}")
+
+        for task in self._tasks:
+            try:
+                task()
+            except Exception as e:
+                print(f"[ERROR] Log maintenance task failed: {e}")
+
+    def get_stats(self) -> dict:
+        return {
+            'pending_compression': len(self._pending),
+            'compressed': self.compressed,
+            'pruned': self.pruned
+        }
@@ -0,0 +1,181 @@
+"""
+Log Writer for Defensiq Network Security
+Takes log records off the caller's thread and writes them in batches
+"""
+
+import logging
+import threading
+from collections import deque
+from typing import Callable, List, Optional
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """
+    FileHandler that leaves flushing to its caller
+
+    The stock handler flushes after every record; the log writer flushes
+    once per batch instead, so a batch becomes a few large writes.
+    """
+
+    def emit(self, record: logging.LogRecord):
+        if self.stream is None:
+            self.stream = self._open()
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+class AsyncLogWriter:
+    """
+    Bounded hand-off from logging callers to one writer thread
+
+    submit() is a length check and a deque append (no lock, no wake-up
+    unless a full batch is waiting); the writer thread drains the queue
+    every flush_interval seconds, or as soon as batch_size records wait,
+    and passes them to the sink in batches.
+
+    Overflow policy (explicit, counted in get_stats):
+        'drop'   - records submitted while max_pending are waiting are dropped
+        'sample' - past half of max_pending, sheddable records (bulk traffic
+                   events) are sampled 1 in sample_rate; full queue drops
+    """
+
+    OVERFLOW_DROP = 'drop'
+    OVERFLOW_SAMPLE = 'sample'
+
+    def __init__(self, sink: Callable[[List[tuple]], None], max_pending: int = 65536,
+                 batch_size: int = 512, flush_interval: float = 0.5,
+                 overflow: str = OVERFLOW_DROP, sample_rate: int = 16,
+                 on_flush: Optional[Callable[[], None]] = None,
+                 on_tick: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            sink: Called on the writer thread with each batch of records
+            max_pending: Records allowed to wait before the overflow policy applies
+            batch_size: Records per sink call (and the early-flush threshold)
+            flush_interval: Seconds between drains
+            overflow: 'drop' or 'sample'
+            sample_rate: Keep 1 in sample_rate sheddable records when sampling
+            on_flush: Called after each drain (flush file buffers)
+            on_tick: Called on the writer thread before each drain
+        """
+        self.sink = sink
+        self.on_flush = on_flush
+        self.on_tick = on_tick
+        self.max_pending = max(1, max_pending)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.overflow = overflow if overflow in (self.OVERFLOW_DROP, self.OVERFLOW_SAMPLE) else self.OVERFLOW_DROP
+        self.sample_rate = max(1, sample_rate)
+        self._shed_level = self.max_pending // 2 if self.overflow == self.OVERFLOW_SAMPLE else self.max_pending
+
+        self._queue = deque()
+        self._wake = threading.Event()
+        self._drain_lock = threading.Lock()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._sample_counter = 0
+
+        # Counters are updated without a lock (may be off by a few under contention)
+        self.submitted = 0
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.sampled_out = 0
+
+    def start(self):
+        """Start the writer thread"""
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='defensiq-log-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, record: tuple, sheddable: bool = False) -> bool:
+        """
+        Queue a record for the writer thread
+        Returns: False if the overflow policy discarded it
+        """
+        queue = self._queue
+        pending = len(queue)
+
+        if pending >= self._shed_level:
+            if pending >= self.max_pending:
+                self.dropped += 1
+                return False
+            if sheddable:
+                self._sample_counter += 1
+                if self._sample_counter % self.sample_rate:
+                    self.sampled_out += 1
+                    return False
+
+        queue.append(record)
+        self.submitted += 1
+        if pending == self.batch_size:
+            self._wake.set()
+        return True
+
+    def flush(self):
+        """Write everything queued so far (from any thread)"""
+        with self._drain_lock:
+            self._drain()
+
+    def stop(self, timeout: float = 5.0):
+        """Drain the queue and stop the writer thread"""
+        thread = self._thread
+        if thread is None:
+            self.flush()
+            return
+        self._stopping = True
+        self._wake.set()
+        thread.join(timeout=timeout)
+        self._thread = None
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self.on_tick is not None:
+                try:
+                    self.on_tick()
+                except Exception as e:
+                    print(f"[ERROR] Log writer tick failed: {e}")
+            with self._drain_lock:
+                self._drain()
+        self.flush()
+
+    def _drain(self):
+        """Pass queued records to the sink in batches (holding _drain_lock)"""
+        queue = self._queue
+        if not queue:
+            return
+
+        popleft = queue.popleft
+        while queue:
+            batch = [popleft() for _ in range(min(len(queue), self.batch_size))]
+            try:
+                self.sink(batch)
+            except Exception as e:
+                print(f"[ERROR] Log writer failed to write {len(batch)} records: {e}")
+            self.batches += 1
+            self.written += len(batch)
+
+        if self.on_flush is not None:
+            try:
+                self.on_flush()
+            except Exception as e:
+                print(f"[ERROR] Log writer failed to flush: {e}")
+
+    def get_stats(self) -> dict:
+        """Get queue depth and throughput / overflow counters"""
+        return {
+            'pending': len(self._queue),
+            'max_pending': self.max_pending,
+            'overflow_policy': self.overflow,
+            'submitted': self.submitted,
+            'written': self.written,
+            'batches': self.batches,
+            'dropped': self.dropped,
+            'sampled_out': self.sampled_out
+        }
@@ -3,15 +3,25 @@ Logging Module for Defensiq Network Security
 Provides centralized logging with multiple outputs and formats
 """
 
+import atexit
 import logging
 import os
+import re
+import time
 from pathlib import Path
 from datetime import datetime
-import json
-import csv
-from typing import Dict, List, Any
+import threading
+from typing import Callable, Dict, List, Any, Optional
 from enum import Enum
 
+from .event_aggregator import TrafficAggregator
+from .event_counters import RollingCounters
+from .event_ring import EventRing
+from .event_store import EventStore
+from .log_export import ExportCancelled, export_events
+from .log_rotation import LogMaintenance, RotatingBufferedFileHandler
+from .log_writer import AsyncLogWriter
+
 class LogLevel(Enum):
     """Log levels"""
     DEBUG = logging.DEBUG
@@ -33,11 +43,35 @@ class EventType(Enum):
     SERVICE_STOPPED = "SERVICE_STOPPED"
     ERROR_OCCURRED = "ERROR_OCCURRED"
 
+# Enum member lookups are slow on the hot path; resolve them once
+_TRAFFIC_ALLOWED = EventType.TRAFFIC_ALLOWED
+_TRAFFIC_BLOCKED = EventType.TRAFFIC_BLOCKED
+
+# Bulk per-packet events the writer may sample under overload
+TRAFFIC_EVENT_TYPES = (_TRAFFIC_ALLOWED, _TRAFFIC_BLOCKED)
+
+# Events written to security_events.log
+SECURITY_EVENT_TYPES = (EventType.THREAT_DETECTED, EventType.TRAFFIC_BLOCKED, EventType.CIA_VIOLATION)
+
+# Blocklist category in a filter reason, e.g. "Blocked DNS (malware): ..."
+_REASON_CATEGORY = re.compile(r'\(([a-z_]+)\)')
+
+
 class DefensiqLogger:
     """Enhanced logger for network security events"""
     
-    def __init__(self, log_dir: str = 'logs'):
-        """Initialize logger"""
+    def __init__(self, log_dir: str = 'logs', settings: Dict[str, Any] = None):
+        """
+        Initialize logger
+        Args:
+            log_dir: Directory for log files
+            settings: 'logging' configuration section (default: from ConfigManager)
+        """
+        if settings is None:
+            from .config import get_config
+            settings = get_config().get('logging', {}) or {}
+        self.settings = settings
+        
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(exist_ok=True)
         
@@ -46,12 +80,59 @@ class DefensiqLogger:
         self.security_log = self.log_dir / 'security_events.log'
         self.error_log = self.log_dir / 'errors.log'
         
+        # Rotated segments are compressed and pruned in the background
+        self.maintenance = LogMaintenance(
+            self.log_dir,
+            [self.general_log.name, self.security_log.name, self.error_log.name],
+            retention_days=int(settings.get('retention_days', 30)),
+            max_total_bytes=int(settings.get('max_total_size_mb', 1024)) * 1024 * 1024
+        )
+        
         # Setup Python logging
         self._setup_logging()
         
-        # In-memory event buffer for GUI display
-        self.recent_events: List[Dict[str, Any]] = []
+        # Queryable event history (export_logs, generate_summary_report)
+        self.store: Optional[EventStore] = None
+        if settings.get('event_store', True):
+            try:
+                self.store = EventStore(self.log_dir / 'events.db')
+                self.maintenance.add_task(lambda: self.store.prune(self.maintenance.retention_days))
+            except Exception as e:
+                print(f"[WARNING] Event store unavailable, reports cover recent events only: {e}")
+        
+        self.maintenance.start()
+        
+        # Rolling per-minute/hour/day counts (summary reports, trends)
+        self.counters = RollingCounters(self.log_dir / 'counters.json')
+        
+        # In-memory event rings for GUI display (per-type rings keep rare
+        # events reachable during traffic floods)
         self.max_recent_events = 1000
+        self.events = EventRing(self.max_recent_events)
+        
+        # Repeated traffic events are summarized per flow and window
+        self.aggregator: Optional[TrafficAggregator] = None
+        if settings.get('aggregate_traffic', True):
+            self.aggregator = TrafficAggregator(
+                self._submit_summary,
+                window=float(settings.get('aggregate_window', 10)),
+                max_keys=int(settings.get('aggregate_max_keys', 10000))
+            )
+        
+        # Events are formatted and written off the caller's thread
+        self.writer = AsyncLogWriter(
+            self._write_events,
+            max_pending=int(settings.get('queue_size', 65536)),
+            flush_interval=float(settings.get('flush_interval', 0.5)),
+            overflow=settings.get('overflow_policy', AsyncLogWriter.OVERFLOW_DROP),
+            sample_rate=int(settings.get('sample_rate', 16)),
+            on_flush=self._flush_handlers,
+            on_tick=self._tick
+        )
+        self.async_writes = bool(settings.get('async_writes', True))
+        if self.async_writes:
+            self.writer.start()
+        atexit.register(self.close)
     
     def _setup_logging(self):
         """Setup Python logging configuration"""
@@ -61,19 +142,26 @@ class DefensiqLogger:
             datefmt='%Y-%m-%d %H:%M:%S'
         )
         
+        # Level and rotation size from the 'logging' settings
+        level = logging.getLevelName(str(self.settings.get('level', 'INFO')).upper())
+        if not isinstance(level, int):
+            level = logging.INFO
+        max_bytes = int(self.settings.get('max_log_size_mb', 100)) * 1024 * 1024
+        on_rotate = self.maintenance.segment_rotated
+        
         # General activity logger
         self.general_logger = logging.getLogger('defensiq.general')
-        self.general_logger.setLevel(logging.DEBUG)
+        self.general_logger.setLevel(level)
         
-        general_handler = logging.FileHandler(self.general_log, encoding='utf-8')
+        general_handler = RotatingBufferedFileHandler(self.general_log, max_bytes, on_rotate)
         general_handler.setFormatter(detailed_formatter)
         self.general_logger.addHandler(general_handler)
         
         # Security events logger
         self.security_logger = logging.getLogger('defensiq.security')
-        self.security_logger.setLevel(logging.INFO)
+        self.security_logger.setLevel(max(level, logging.INFO))
         
-        security_handler = logging.FileHandler(self.security_log, encoding='utf-8')
+        security_handler = RotatingBufferedFileHandler(self.security_log, max_bytes, on_rotate)
         security_handler.setFormatter(detailed_formatter)
         self.security_logger.addHandler(security_handler)
         
@@ -81,7 +169,7 @@ class DefensiqLogger:
         self.error_logger = logging.getLogger('defensiq.error')
         self.error_logger.setLevel(logging.ERROR)
         
-        error_handler = logging.FileHandler(self.error_log, encoding='utf-8')
+        error_handler = RotatingBufferedFileHandler(self.error_log, max_bytes, on_rotate)
         error_handler.setFormatter(detailed_formatter)
         self.error_logger.addHandler(error_handler)
         
@@ -101,31 +189,122 @@ class DefensiqLogger:
             message: Human-readable message
             metadata: Additional structured data
         """
-        event = {
-            'timestamp': datetime.now().isoformat(),
-            'type': event_type.value,
-            'message': message,
-            'metadata': metadata or {}
-        }
-        
-        # Add to recent events buffer
-        self.recent_events.append(event)
-        if len(self.recent_events) > self.max_recent_events:
-            self.recent_events.pop(0)
-        
-        # Log to appropriate handler
-        if event_type in [EventType.THREAT_DETECTED, EventType.TRAFFIC_BLOCKED, 
-                          EventType.CIA_VIOLATION]:
-            self.security_logger.warning(f"{event_type.value}: {message} | {metadata}")
-        elif event_type == EventType.ERROR_OCCURRED:
-            self.error_logger.error(f"{message} | {metadata}")
+        self._submit((time.time(), event_type, message, metadata), event_type in TRAFFIC_EVENT_TYPES)
+    
+    def _submit(self, record: tuple, sheddable: bool):
+        if self.async_writes:
+            self.writer.submit(record, sheddable)
         else:
-            self.general_logger.info(f"{event_type.value}: {message} | {metadata}")
+            self._write_events([record])
+            self._flush_handlers()
+    
+    def _submit_summary(self, key: tuple, summary: Dict[str, Any]):
+        """Queue a traffic summary from the aggregator (never sampled away)"""
+        self._submit((time.time(), _TRAFFIC_ALLOWED if key[0] else _TRAFFIC_BLOCKED, None, summary), False)
+    
+    def _write_events(self, records: List[tuple]):
+        """Format and write a batch of events (writer thread)"""
+        events = self.events
+        stored = []
+        
+        for timestamp, event_type, message, metadata in records:
+            if message is None:
+                if 'count' in metadata:
+                    metadata['first_seen'] = datetime.fromtimestamp(metadata['first_seen']).isoformat()
+                    metadata['last_seen'] = datetime.fromtimestamp(metadata['last_seen']).isoformat()
+                message = self._traffic_message(event_type, metadata)
+            
+            event = {
+                'timestamp': datetime.fromtimestamp(timestamp).isoformat(),
+                'type': event_type.value,
+                'message': message,
+                'metadata': metadata or {}
+            }
+            
+            # Add to recent events rings and the rolling counters
+            event['seq'] = events.append(event, event_type)
+            self._count_event(timestamp, event_type, event['metadata'])
+            stored.append((timestamp, event['type'], message, event['metadata']))
+            
+            # Log to appropriate handler, stamped with the event time
+            if event_type in SECURITY_EVENT_TYPES:
+                self._emit(self.security_logger, logging.WARNING, f"{event_type.value}: {message} | {metadata}", timestamp)
+            elif event_type == EventType.ERROR_OCCURRED:
+                self._emit(self.error_logger, logging.ERROR, f"{message} | {metadata}", timestamp)
+            else:
+                self._emit(self.general_logger, logging.INFO, f"{event_type.value}: {message} | {metadata}", timestamp)
+        
+        if self.store is not None:
+            try:
+                self.store.add_batch(stored)
+            except Exception as e:
+                print(f"[ERROR] Failed to store {len(stored)} events: {e}")
+    
+    def _count_event(self, timestamp: float, event_type: EventType, metadata: Dict[str, Any]):
+        keys = ['type:' + event_type.value]
+        count = 1
+        if event_type in TRAFFIC_EVENT_TYPES:
+            keys.append('verdict:allowed' if event_type is _TRAFFIC_ALLOWED else 'verdict:blocked')
+            count = metadata.get('count', 1)
+        if metadata.get('protocol'):
+            keys.append('protocol:' + str(metadata['protocol']))
+        category = metadata.get('category')
+        if category is None and metadata.get('reason'):
+            match = _REASON_CATEGORY.search(metadata['reason'])
+            category = match.group(1) if match else None
+        if category:
+            keys.append('category:' + str(category))
+        self.counters.add(timestamp, keys, count)
+    
+    def _tick(self):
+        """Periodic work on the writer thread"""
+        if self.aggregator is not None:
+            self.aggregator.flush()
+        self.counters.maybe_save()
+    
+    def _emit(self, logger: logging.Logger, level: int, text: str, timestamp: float):
+        if logger.isEnabledFor(level):
+            record = logger.makeRecord(logger.name, level, __file__, 0, text, None, None)
+            record.created = timestamp
+            record.msecs = (timestamp - int(timestamp)) * 1000
+            logger.handle(record)
+    
+    def _flush_handlers(self):
+        """Flush file buffers once per written batch"""
+        for logger in (self.general_logger, self.security_logger, self.error_logger):
+            for handler in logger.handlers:
+                handler.flush()
+    
+    def flush(self):
+        """Write all queued events now"""
+        self.writer.flush()
+    
+    def close(self):
+        """Drain queued events and stop the writer thread"""
+        if self.aggregator is not None:
+            self.aggregator.flush(force=True)
+        self.writer.stop()
+        self.counters.save()
+        self.maintenance.stop()
+    
+    def get_writer_stats(self) -> Dict[str, Any]:
+        """Get log queue depth and drop/sampling counters"""
+        stats = self.writer.get_stats()
+        if self.aggregator is not None:
+            stats['aggregation'] = self.aggregator.get_stats()
+        return stats
     
     def log_traffic(self, allowed: bool, protocol: str, src_ip: str, dst_ip: str, 
-                   dst_port: int, reason: str = ""):
-        """Log network traffic event"""
-        event_type = EventType.TRAFFIC_ALLOWED if allowed else EventType.TRAFFIC_BLOCKED
+                   dst_port: int, reason: str = "", size: int = 0):
+        """
+        Log network traffic event (message is built on the writer thread)
+        With aggregation on, packets are counted and summarized per window.
+        """
+        if self.aggregator is not None:
+            self.aggregator.add(allowed, protocol, src_ip, dst_ip, dst_port, reason, size)
+            return
+        
+        event_type = _TRAFFIC_ALLOWED if allowed else _TRAFFIC_BLOCKED
         
         metadata = {
             'protocol': protocol,
@@ -135,97 +314,149 @@ class DefensiqLogger:
             'reason': reason
         }
         
-        message = f"{'ALLOWED' if allowed else 'BLOCKED'} {protocol} {src_ip} -> {dst_ip}:{dst_port}"
-        if reason:
-            message += f" ({reason})"
-        
-        self.log_event(event_type, message, metadata)
+        self.log_event(event_type, None, metadata)
+    
+    @staticmethod
+    def _traffic_message(event_type: EventType, metadata: Dict[str, Any]) -> str:
+        verdict = 'ALLOWED' if event_type is _TRAFFIC_ALLOWED else 'BLOCKED'
+        message = (f"{verdict} {metadata['protocol']} {metadata['src_ip']} -> "
+                   f"{metadata['dst_ip']}:{metadata['dst_port']}")
+        if metadata.get('reason'):
+            message += f" ({metadata['reason']})"
+        if 'count' in metadata:
+            message += (f" x{metadata['count']} packets, {metadata['bytes']} bytes"
+                        f" [{metadata['first_seen']} - {metadata['last_seen']}]")
+        return message
+    
+    @property
+    def recent_events(self) -> List[Dict[str, Any]]:
+        """All buffered events, oldest first"""
+        return self.events.latest(self.max_recent_events)
+    
+    @property
+    def last_event_seq(self) -> int:
+        """Sequence number of the newest event (0 if none yet)"""
+        return self.events.last_seq
     
     def get_recent_events(self, count: int = 100, event_type: EventType = None) -> List[Dict[str, Any]]:
-        """Get recent events for GUI display"""
-        events = self.recent_events[-count:]
-        
-        if event_type:
-            events = [e for e in events if e['type'] == event_type.value]
-        
-        return events
+        """Get the newest count events (of a type) for GUI display, oldest first"""
+        return self.events.latest(count, event_type)
+    
+    def get_events_since(self, seq: int, event_type: EventType = None, limit: int = None) -> List[Dict[str, Any]]:
+        """
+        Events logged after sequence number seq, oldest first
+        Each event carries its 'seq'; pass the last one back to get the next delta.
+        limit keeps only the newest events of the delta.
+        """
+        return [event for _, event in self.events.since(seq, event_type, limit)]
     
     def export_logs(self, output_path: str, format: str = 'csv', 
-                   start_date: datetime = None, end_date: datetime = None) -> bool:
+                   start_date: datetime = None, end_date: datetime = None,
+                   event_types: List[EventType] = None, ip: str = None, compress: bool = None,
+                   progress: Callable[[int, Optional[int]], None] = None,
+                   cancel: threading.Event = None) -> bool:
         """
-        Export logs to file
+        Export logs to file, streamed from the event store (constant memory)
         
         Args:
-            output_path: Path to save exported logs
-            format: Export format ('csv', 'json', 'txt')
+            output_path: Path to save exported logs (a .gz suffix compresses)
+            format: Export format ('csv', 'jsonl', 'json', 'txt', 'parquet')
             start_date: Filter logs from this date
             end_date: Filter logs until this date
+            event_types: Only export these event types
+            ip: Only export events involving this address
+            compress: gzip the output (default: by file suffix)
+            progress: Called with (events written, total events)
+            cancel: Set from another thread (or the progress callback) to abort
+        Returns: False on failure or cancellation (no partial file is left)
         """
         try:
-            # Filter events by date if specified
-            events = self.recent_events
-            
-            if start_date:
-                events = [e for e in events 
-                         if datetime.fromisoformat(e['timestamp']) >= start_date]
-            
-            if end_date:
-                events = [e for e in events 
-                         if datetime.fromisoformat(e['timestamp']) <= end_date]
-            
-            # Export based on format
-            if format == 'json':
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    json.dump(events, f, indent=2)
-            
-            elif format == 'csv':
-                with open(output_path, 'w', newline='', encoding='utf-8') as f:
-                    if events:
-                        # Flatten metadata for CSV
-                        fieldnames = ['timestamp', 'type', 'message']
-                        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-                        writer.writeheader()
-                        writer.writerows(events)
-            
-            elif format == 'txt':
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    for event in events:
-                        f.write(f"[{event['timestamp']}] {event['type']}: {event['message']}\n")
-            
+            total = self.count_events(start_date, end_date, event_types, ip)
+            events = self.iter_events(start_date, end_date, event_types, ip)
+            export_events(events, output_path, format, compress=compress,
+                          progress=progress, cancel=cancel, total=total)
             return True
         
+        except ExportCancelled:
+            self.general_logger.info(f"Log export to {output_path} cancelled")
+            return False
+        
         except Exception as e:
             self.error_logger.error(f"Failed to export logs: {e}")
             return False
     
+    def count_events(self, start_date: datetime = None, end_date: datetime = None,
+                     event_types: List[EventType] = None, ip: str = None) -> Optional[int]:
+        """Number of events iter_events would yield (None without a store)"""
+        if self.store is None:
+            return None
+        self.flush()
+        return self.store.count(
+            start_date.timestamp() if start_date else None,
+            end_date.timestamp() if end_date else None,
+            [t.value for t in event_types] if event_types else None,
+            ip
+        )
+    
+    def iter_events(self, start_date: datetime = None, end_date: datetime = None,
+                    event_types: List[EventType] = None, ip: str = None):
+        """
+        Stored events in a time range (optionally of some types / involving an IP),
+        oldest first; falls back to the in-memory events without a store
+        """
+        types = [t.value for t in event_types] if event_types else None
+        
+        if self.store is not None:
+            self.flush()
+            return self.store.query(
+                start_date.timestamp() if start_date else None,
+                end_date.timestamp() if end_date else None,
+                types, ip
+            )
+        
+        start = start_date.isoformat() if start_date else None
+        end = end_date.isoformat() if end_date else None
+        return (
+            e for e in self.recent_events
+            if (start is None or e['timestamp'] >= start) and (end is None or e['timestamp'] <= end)
+            and (types is None or e['type'] in types)
+            and (ip is None or ip in (e['metadata'].get('src_ip'), e['metadata'].get('dst_ip')))
+        )
+    
     def generate_summary_report(self, hours: int = 24) -> Dict[str, Any]:
-        """Generate summary report of recent activity"""
-        cutoff_time = datetime.now().timestamp() - (hours * 3600)
+        """
+        Generate summary report of recent activity
+        Summed from the rolling counters; aggregated traffic events count
+        every packet they summarize.
+        """
+        self.flush()
+        totals = self.counters.totals(time.time() - hours * 3600)
         
-        recent = [e for e in self.recent_events 
-                 if datetime.fromisoformat(e['timestamp']).timestamp() > cutoff_time]
+        breakdown: Dict[str, Dict[str, int]] = {'type': {}, 'verdict': {}, 'protocol': {}, 'category': {}}
+        for key, count in totals.items():
+            dimension, _, value = key.partition(':')
+            if dimension in breakdown:
+                breakdown[dimension][value] = count
+        events_by_type = breakdown['type']
         
-        summary = {
+        return {
             'period_hours': hours,
-            'total_events': len(recent),
-            'events_by_type': {},
-            'blocked_connections': 0,
-            'allowed_connections': 0,
-            'threats_detected': 0
+            'total_events': sum(events_by_type.values()),
+            'events_by_type': events_by_type,
+            'events_by_protocol': breakdown['protocol'],
+            'events_by_category': breakdown['category'],
+            'blocked_connections': breakdown['verdict'].get('blocked', 0),
+            'allowed_connections': breakdown['verdict'].get('allowed', 0),
+            'threats_detected': events_by_type.get(EventType.THREAT_DETECTED.value, 0)
         }
-        
-        for event in recent:
-            event_type = event['type']
-            summary['events_by_type'][event_type] = summary['events_by_type'].get(event_type, 0) + 1
-            
-            if event_type == EventType.TRAFFIC_BLOCKED.value:
-                summary['blocked_connections'] += 1
-            elif event_type == EventType.TRAFFIC_ALLOWED.value:
-                summary['allowed_connections'] += 1
-            elif event_type == EventType.THREAT_DETECTED.value:
-                summary['threats_detected'] += 1
-        
-        return summary
+    
+    def get_event_trend(self, key: str, hours: int = 24, resolution: str = 'hour') -> List[tuple]:
+        """
+        (bucket start, count) over the last hours for a counter key such as
+        'verdict:blocked', 'type:THREAT_DETECTED' or 'category:malware'
+        """
+        self.flush()
+        return self.counters.series(key, time.time() - hours * 3600, resolution=resolution)
 
 # Global logger instance
 _logger_instance = None
@@ -4,23 +4,29 @@ PySide6-based GUI with multiple tabs
 """
 
 import sys
+import threading
+import time
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QTabWidget, QLabel, QPushButton, QTableWidget, QTableWidgetItem,
     QGroupBox, QGridLayout, QTextEdit, QMessageBox, QFileDialog,
-    QComboBox, QSpinBox, QCheckBox, QFrame
+    QComboBox, QSpinBox, QCheckBox, QFrame, QProgressDialog
 )
 from PySide6.QtCore import QTimer, Qt
 from PySide6.QtGui import QIcon, QAction
 
 from core.config import get_config
 from core.logger import get_logger, EventType
+from core.log_export import PYARROW_AVAILABLE
 from network.monitor import get_network_monitor
 from network.filter_engine import get_filter_engine, PYDIVERT_AVAILABLE
 from rules.blocklist_manager import get_blocklist_manager, BlocklistCategory
 from security.cia_monitor import get_cia_monitor
 from gui.widgets import StatusIndicator, StatCard, SimpleChart, ToggleSwitch
 
+# Seconds between reads of the hourly blocked trend from the event counters
+TREND_REFRESH_SECONDS = 60
+
 
 class MainDashboard(QMainWindow):
     """Main application window"""
@@ -40,6 +46,7 @@ class MainDashboard(QMainWindow):
         self.setWindowTitle("Defensiq Network Security")
         self.setGeometry(100, 100, 1200, 800)
         
+        self._trend_refreshed_at = 0.0
         self.init_ui()
         
         # Setup update timer
@@ -242,9 +249,11 @@ class MainDashboard(QMainWindow):
         
         self.bandwidth_chart = SimpleChart("Bandwidth (Mbps)", 60)
         self.connections_chart = SimpleChart("Active Connections", 60)
+        self.blocked_trend_chart = SimpleChart("Blocked per Hour (24h)", 25)
         
         charts_layout.addWidget(self.bandwidth_chart)
         charts_layout.addWidget(self.connections_chart)
+        charts_layout.addWidget(self.blocked_trend_chart)
         
         charts_group.setLayout(charts_layout)
         layout.addWidget(charts_group)
@@ -405,6 +414,8 @@ class MainDashboard(QMainWindow):
         self.log_display = QTextEdit()
         self.log_display.setReadOnly(True)
         self.log_display.setStyleSheet("font-family: 'Courier New'; font-size: 10pt;")
+        self.log_display.document().setMaximumBlockCount(500)  # oldest lines trimmed
+        self.last_log_seq = 0
         
         layout.addWidget(self.log_display)
         
@@ -459,7 +470,7 @@ class MainDashboard(QMainWindow):
         self.dos_threshold_spin.setRange(100, 10000)
         self.dos_threshold_spin.setValue(self.config.get('cia_triad.dos_threshold', 1000))
         self.dos_threshold_spin.valueChanged.connect(
-            lambda value: self.config.set('cia_triad.dos_threshold', value)
+            lambda value: self.config.set('cia_triad.dos_threshold', value, debounce=True)
         )
         cia_layout.addWidget(self.dos_threshold_spin)
         
@@ -539,6 +550,7 @@ class MainDashboard(QMainWindow):
             total_bandwidth = stats.get('bandwidth_sent_mbps', 0) + stats.get('bandwidth_recv_mbps', 0)
             self.bandwidth_chart.add_data_point(total_bandwidth)
             self.connections_chart.add_data_point(stats.get('connections_active', 0))
+            self.update_trend()
             
             # Update pie charts with actual data
             # Protocol distribution - use actual connection data
@@ -574,6 +586,16 @@ class MainDashboard(QMainWindow):
             # Log error but don't crash
             print(f"Error updating stats: {e}")
     
+    def update_trend(self):
+        """Redraw the hourly blocked trend (at most every TREND_REFRESH_SECONDS)"""
+        now = time.monotonic()
+        if now - self._trend_refreshed_at < TREND_REFRESH_SECONDS:
+            return
+        self._trend_refreshed_at = now
+        
+        trend = self.logger.get_event_trend('verdict:blocked', hours=24)
+        self.blocked_trend_chart.set_data_points([count for _, count in trend])
+    
     def refresh_connections(self):
         """Refresh connection table"""
         connections = self.monitor.get_active_connections(100)
@@ -616,13 +638,13 @@ class MainDashboard(QMainWindow):
             row += 1
     
     def update_log_display(self):
-        """Update log display with recent events"""
-        events = self.logger.get_recent_events(50)
+        """Append events logged since the last update (newest at the bottom)"""
+        events = self.logger.get_events_since(self.last_log_seq, limit=50)
         
         # Only update if there are new events
         if events:
-            self.log_display.clear()
-            for event in reversed(events):
+            self.last_log_seq = events[-1]['seq']
+            for event in events:
                 timestamp = event['timestamp']
                 event_type = event['type']
                 message = event['message']
@@ -716,7 +738,7 @@ class MainDashboard(QMainWindow):
         from PySide6.QtWidgets import QInputDialog
         
         ip, ok = QInputDialog.getText(
-            self, "Add IP", "Enter IP address to block:"
+            self, "Add IP", "Enter IP address, CIDR or range to block:"
         )
         
         if ok and ip:
@@ -732,14 +754,16 @@ class MainDashboard(QMainWindow):
             self,
             "Import Blocklist",
             "",
-            "All Files (*.txt *.json);;Text Files (*.txt);;JSON Files (*.json)"
+            "All Files (*.txt *.json *.hosts);;Text Files (*.txt);;JSON Files (*.json);;Any File (*)"
         )
         
         if file_path:
-            count = self.blocklist.import_from_file(file_path)
+            result = self.blocklist.import_from_file(file_path)
             self.refresh_blocklist()
             QMessageBox.information(
-                self, "Import Complete", f"Imported {count} entries"
+                self, "Import Complete",
+                f"Imported {result.added} entries\n"
+                f"Skipped {result.duplicates} duplicates and {result.invalid} invalid entries"
             )
     
     def export_blocklist(self):
@@ -759,24 +783,54 @@ class MainDashboard(QMainWindow):
                 QMessageBox.warning(self, "Error", "Failed to export blocklist")
     
     def export_logs(self):
-        """Export logs to file"""
+        """Export logs to file (streamed, with progress and cancel)"""
+        filters = [
+            "CSV Files (*.csv)", "Compressed CSV (*.csv.gz)", "JSON Lines (*.jsonl)",
+            "Compressed JSON Lines (*.jsonl.gz)", "JSON Files (*.json)", "Text Files (*.txt)"
+        ]
+        if PYARROW_AVAILABLE:
+            filters.append("Parquet Files (*.parquet)")
+        
         file_path, selected_filter = QFileDialog.getSaveFileName(
             self,
             "Export Logs",
             "defensiq_logs.csv",
-            "CSV Files (*.csv);;JSON Files (*.json);;Text Files (*.txt)"
+            ";;".join(filters)
         )
         
         if file_path:
+            selected = selected_filter.lower()
             format = 'csv'
-            if 'json' in selected_filter.lower():
+            if 'json lines' in selected:
+                format = 'jsonl'
+            elif 'json' in selected:
                 format = 'json'
-            elif 'txt' in selected_filter.lower():
+            elif 'txt' in selected:
                 format = 'txt'
+            elif 'parquet' in selected:
+                format = 'parquet'
             
-            if self.logger.export_logs(file_path, format):
+            progress_dialog = QProgressDialog("Exporting logs...", "Cancel", 0, 0, self)
+            progress_dialog.setWindowTitle("Export Logs")
+            progress_dialog.setWindowModality(Qt.WindowModal)
+            progress_dialog.setMinimumDuration(500)
+            cancel = threading.Event()
+            
+            def on_progress(written, total):
+                if total:
+                    progress_dialog.setMaximum(total)
+                    progress_dialog.setValue(min(written, total))
+                progress_dialog.setLabelText(f"Exporting logs... {written:,} events")
+                QApplication.processEvents()
+                if progress_dialog.wasCanceled():
+                    cancel.set()
+            
+            exported = self.logger.export_logs(file_path, format, progress=on_progress, cancel=cancel)
+            progress_dialog.close()
+            
+            if exported:
                 QMessageBox.information(self, "Success", "Logs exported")
-            else:
+            elif not cancel.is_set():
                 QMessageBox.warning(self, "Error", "Failed to export logs")
     
     def clear_log_display(self):
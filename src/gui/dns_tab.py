@@ -187,7 +187,6 @@ class DNSSettingsTab(QWidget):
     def on_doh_toggle(self, enabled: bool):
         """Handle DoH enable/disable"""
         self.config.set('dns.use_doh', enabled)
-        self.config.save()
         
         status = "enabled" if enabled else "disabled"
         QMessageBox.information(
@@ -201,7 +200,6 @@ class DNSSettingsTab(QWidget):
         """Handle provider selection change"""
         provider = self.doh_provider_combo.itemData(index)
         self.config.set('dns.provider', provider)
-        self.config.save()
     
     def test_doh_provider(self):
         """Test selected DoH provider"""
@@ -243,7 +241,6 @@ class DNSSettingsTab(QWidget):
             return
         
         self.config.set('nextdns.profile_id', profile_id)
-        self.config.save()
         
         # Update NextDNS client
         self.nextdns.profile_id = profile_id
@@ -294,13 +291,11 @@ class DNSSettingsTab(QWidget):
             )
             return
         
-        # Add to local blocklist
-        added_count = 0
-        for entry in blocklists:
-            if entry['active']:
-                domain = entry['domain']
-                if blocklist_manager.add_domain(domain, category='nextdns'):
-                    added_count += 1
+        # Add to local blocklist in one batch (single save)
+        result = blocklist_manager.bulk_import(
+            (entry['domain'], 'nextdns') for entry in blocklists if entry['active']
+        )
+        added_count = result.added
         
         self.nextdns_status_label.setText(f"✅ Fetched {len(blocklists)} entries")
         self.nextdns_status_label.setStyleSheet("color: #27ae60;")
@@ -186,6 +186,11 @@ class SimpleChart(QFrame):
         
         self.update_plot()
     
+    def set_data_points(self, values: list):
+        """Replace the whole series (e.g. a trend read from the counters)"""
+        self.data_points = list(values)[-self.max_data_points:]
+        self.update_plot()
+    
     def update_plot(self):
         """Update the matplotlib plot"""
         self.ax.clear()
@@ -1,6 +1,8 @@
 # Network package initialization
 from .monitor import NetworkMonitor, get_network_monitor
 from .filter_engine import FilterEngine, get_filter_engine, run_service, PYDIVERT_AVAILABLE
+from .capture import CaptureBackend, WinDivertCapture
+from .pcap_replay import PcapReplayCapture, PcapWriter
 from .nextdns_client import NextDNSClient, get_nextdns_client
 from .doh_resolver import DoHResolver, DoHProvider, get_doh_resolver
 from .app_control import ApplicationControl, AppRule, get_app_control
@@ -9,6 +11,7 @@ __all__ = [
     'NetworkMonitor', 'get_network_monitor',
     'FilterEngine', 'get_filter_engine', 'run_service',
     'PYDIVERT_AVAILABLE',
+    'CaptureBackend', 'WinDivertCapture', 'PcapReplayCapture', 'PcapWriter',
     'NextDNSClient', 'get_nextdns_client',
     'DoHResolver', 'DoHProvider', 'get_doh_resolver',
     'ApplicationControl', 'AppRule', 'get_app_control'
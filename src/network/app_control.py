@@ -63,7 +63,6 @@ class ApplicationControl:
             })
         
         self.config.set('app_control.rules', rules_data)
-        self.config.save()
     
     def add_rule(self, process_name: str, action: str = 'block', 
                  bandwidth_limit: Optional[int] = None) -> bool:
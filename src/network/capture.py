@@ -0,0 +1,193 @@
+"""
+Capture Backends for Defensiq Network Security
+Interface between FilterEngine and the source of diverted packets
+"""
+
+import threading
+from typing import Callable, List, Optional
+
+# Optional PyDivert import (FilterEngine reports when it is missing)
+try:
+    import pydivert
+except ImportError:
+    pydivert = None
+
+
+class CaptureBackend:
+    """
+    Source of packets to judge and sink for the verdicts
+
+    Packets must expose the pydivert.Packet attributes FilterEngine reads
+    (raw, src_addr, dst_addr, src_port, dst_port, tcp, udp, payload).
+    send/drop may be called from several worker threads at once.
+    """
+
+    name = 'capture'
+
+    def open(self, queue_length: Optional[int] = None):
+        """Start capturing (queue_length: packets buffered by the source)"""
+
+    def recv_batch(self, max_count: int) -> List:
+        """
+        Receive up to max_count packets, blocking until at least one arrives
+        Returns: list of packets, empty once the capture has ended or closed
+        """
+        raise NotImplementedError
+
+    def send(self, packets: List):
+        """Reinject allowed packets"""
+        raise NotImplementedError
+
+    def drop(self, packets: List):
+        """Discard blocked packets (default: simply don't reinject them)"""
+
+    def set_filter(self, filter_str: str, on_drained: Optional[Callable[[List], None]] = None):
+        """
+        Change which packets are captured (ignored by recorded sources)
+        Args:
+            filter_str: New filter
+            on_drained: Receives packets still queued under the old filter
+                        (from another thread) so they are judged, not lost
+        """
+
+    def close(self):
+        """Stop capturing; a blocked recv_batch returns an empty list"""
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class WinDivertCapture(CaptureBackend):
+    """
+    Live capture through a WinDivert handle
+
+    pydivert bundles WinDivert 1.3, whose receive and send calls move one
+    packet each, so a batch is whatever one blocking recv returns.
+    """
+
+    name = 'windivert'
+
+    # WinDivert rejects larger queue lengths
+    MAX_QUEUE_LENGTH = 8192
+
+    # Seconds a replaced handle is drained before it is closed
+    DRAIN_SECONDS = 0.25
+
+    def __init__(self, filter_str: str, sniff: bool = False):
+        """
+        Initialize backend for a WinDivert filter expression
+        Args:
+            filter_str: WinDivert filter
+            sniff: Copy packets instead of diverting them (nothing to reinject)
+        """
+        self.filter_str = filter_str
+        self.sniff = sniff
+        self.queue_length: Optional[int] = None
+        self.handle = None
+
+    def open(self, queue_length: Optional[int] = None):
+        """Open the WinDivert handle"""
+        if pydivert is None:
+            raise RuntimeError("PyDivert not available")
+
+        self.queue_length = queue_length
+        self.handle = self._open_handle()
+
+    def _open_handle(self):
+        handle = pydivert.WinDivert(
+            self.filter_str, flags=pydivert.Flag.SNIFF if self.sniff else pydivert.Flag.DEFAULT
+        )
+        handle.open()
+
+        if self.queue_length:
+            try:
+                handle.set_param(pydivert.Param.QUEUE_LEN, min(self.queue_length, self.MAX_QUEUE_LENGTH))
+            except Exception as e:
+                print(f"[WARNING] Could not set WinDivert queue length: {e}")
+        return handle
+
+    def set_filter(self, filter_str: str, on_drained: Optional[Callable[[List], None]] = None):
+        """
+        Reopen the handle with a new filter
+        The new handle is opened before the old one closes, so no packet
+        passes unfiltered. Packets still queued on the old handle are
+        received for DRAIN_SECONDS on a helper thread and passed to
+        on_drained (reinjected as they are without one), then it closes.
+        Call from the receiving thread.
+        """
+        if filter_str == self.filter_str:
+            return
+        self.filter_str = filter_str
+        if self.handle is None:
+            return
+
+        old_handle, self.handle = self.handle, self._open_handle()
+        if old_handle.is_open:
+            threading.Thread(
+                target=self._drain, args=(old_handle, on_drained),
+                name='defensiq-divert-drain', daemon=True
+            ).start()
+
+    def _drain(self, handle, on_drained: Optional[Callable[[List], None]]):
+        """Receive what is left on a replaced handle until it is closed"""
+        # Closing from another thread ends the blocking recv, as in close()
+        closer = threading.Timer(self.DRAIN_SECONDS, handle.close)
+        closer.start()
+        try:
+            while True:
+                packet = handle.recv()
+                if on_drained is not None:
+                    on_drained([packet])
+                else:
+                    handle.send(packet)
+        except OSError:
+            pass
+        finally:
+            closer.cancel()
+            if handle.is_open:
+                handle.close()
+
+    def recv_batch(self, max_count: int) -> List:
+        """Receive the next packet"""
+        handle = self.handle
+        if handle is None:
+            return []
+
+        try:
+            return [handle.recv()]
+        except OSError:
+            # Handle closed by stop()
+            if self.handle is None or not self.handle.is_open:
+                return []
+            raise
+
+    def send(self, packets: List):
+        """Reinject allowed packets"""
+        handle = self.handle
+        if handle is None:
+            return
+
+        sent = 0
+        try:
+            send = handle.send
+            for packet in packets:
+                send(packet)
+                sent += 1
+        except OSError:
+            # Handle replaced by set_filter() mid-batch: inject the rest through the new one
+            if self.handle is None or self.handle is handle:
+                raise
+            send = self.handle.send
+            for packet in packets[sent:]:
+                send(packet)
+
+    def close(self):
+        """Close the WinDivert handle"""
+        handle = self.handle
+        self.handle = None
+        if handle is not None and handle.is_open:
+            handle.close()
@@ -0,0 +1,81 @@
+"""
+Divert Filter for Defensiq Network Security
+Compiles the WinDivert filter expression from the active rules
+"""
+
+from typing import Optional
+
+from rules.ip_ranges import _format_address
+
+# Everything the engine can judge (used when the rules can't be narrowed)
+FULL_FILTER = "(outbound and (tcp or udp)) or (inbound and udp.SrcPort == 53)"
+
+# DNS queries and responses (answers bind resolved IPs to names)
+DNS_FILTER = "(outbound and udp.DstPort == 53) or (inbound and udp.SrcPort == 53)"
+
+# Web flows: the SYN (IP / resolved-name checks), segments carrying the Host
+# header or ClientHello, and FIN/RST so flow cache entries are released
+WEB_FILTER = (
+    "(outbound and (tcp.DstPort == 80 or tcp.DstPort == 443) and "
+    "(tcp.Syn or tcp.Fin or tcp.Rst or tcp.PayloadLength > 0))"
+)
+
+QUIC_FILTER = "(outbound and udp.DstPort == 443)"
+
+# WinDivert 1.3 compiles at most 256 filter tests; leave room for the rest
+MAX_ADDRESS_TESTS = 192
+
+
+def build_divert_filter(blocklist, quic_mode: str = 'inspect') -> str:
+    """
+    Narrowest filter that still diverts every packet a rule could block
+    Args:
+        blocklist: CompiledBlocklist generation the filter is built for
+        quic_mode: filtering.quic_mode ('allow' leaves UDP/443 alone)
+    """
+    clauses = [DNS_FILTER, WEB_FILTER]
+    if quic_mode != 'allow':
+        clauses.append(QUIC_FILTER)
+
+    addresses = _address_tests(blocklist.ips)
+    if addresses is None:
+        return FULL_FILTER
+    if addresses:
+        clauses.append(f"(outbound and (tcp or udp) and ({addresses}))")
+
+    return ' or '.join(clauses)
+
+
+def sniff_filter(divert_filter: str) -> Optional[str]:
+    """Outbound traffic the divert filter leaves alone, or None if there is none"""
+    if divert_filter == FULL_FILTER:
+        return None
+    return f"(outbound and (tcp or udp)) and not ({divert_filter})"
+
+
+def _address_tests(ips) -> Optional[str]:
+    """
+    Destination address tests for every blocked IP entry
+    Returns: filter expression ('' for no entries), or None if the list is
+    too large to express (the full filter is used instead)
+    """
+    if len(ips) > MAX_ADDRESS_TESTS:
+        return None
+
+    tests = []
+    cost = 0
+    for version, start, end in sorted(ips.ranges()):
+        field = 'ip.DstAddr' if version == 4 else 'ipv6.DstAddr'
+        if start == end:
+            tests.append(f"{field} == {_format_address(version, start)}")
+            cost += 1
+        else:
+            tests.append(
+                f"({field} >= {_format_address(version, start)} and "
+                f"{field} <= {_format_address(version, end)})"
+            )
+            cost += 2
+        if cost > MAX_ADDRESS_TESTS:
+            return None
+
+    return ' or '.join(tests)
@@ -0,0 +1,138 @@
+"""
+DNS Address Map for Defensiq Network Security
+Bounded, TTL-aware IP -> domain names map fed from observed DNS answers
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+class DNSAddressMap:
+    """
+    LRU map of IP address -> {name: expiry} learned from DNS responses
+
+    An address can carry several names (CDN addresses serve many hosts).
+    Entries expire with their (clamped) DNS TTL; expiry is amortized:
+    lookups drop expired names they touch and every insert checks the
+    least recently used entries, so no sweep thread is needed.
+    """
+
+    # Clients keep using an address past a zero/short TTL (connection reuse)
+    MIN_TTL = 60
+    MAX_TTL = 86400
+
+    # LRU entries examined for expiry per insert
+    EXPIRY_PROBES = 2
+
+    def __init__(self, max_addresses: int = 65536, max_names_per_address: int = 16):
+        """Initialize map"""
+        self.max_addresses = max_addresses
+        self.max_names_per_address = max_names_per_address
+        self._entries: 'OrderedDict[str, Dict[str, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def add(self, address: str, name: str, ttl: int, now: float = None):
+        """Record that address resolves for name for ttl seconds"""
+        if now is None:
+            now = time.monotonic()
+        expires = now + min(max(ttl, self.MIN_TTL), self.MAX_TTL)
+
+        with self._lock:
+            entries = self._entries
+            names = entries.get(address)
+
+            if names is None:
+                self._expire_oldest(now)
+                if len(entries) >= self.max_addresses:
+                    entries.popitem(last=False)
+                    self.evictions += 1
+                entries[address] = {name: expires}
+                return
+
+            entries.move_to_end(address)
+            if name not in names and len(names) >= self.max_names_per_address:
+                # Drop the name closest to expiry
+                del names[min(names, key=names.get)]
+                self.evictions += 1
+            names[name] = max(names.pop(name, 0), expires)
+
+    def names(self, address: str, now: float = None) -> List[str]:
+        """Live names for an address (most recently learned last)"""
+        if now is None:
+            now = time.monotonic()
+
+        with self._lock:
+            names = self._entries.get(address)
+            if names is None:
+                self.misses += 1
+                return []
+
+            expired = [name for name, expires in names.items() if expires <= now]
+            for name in expired:
+                del names[name]
+            self.expirations += len(expired)
+
+            if not names:
+                del self._entries[address]
+                self.misses += 1
+                return []
+
+            self._entries.move_to_end(address)
+            self.hits += 1
+            return list(names)
+
+    def get(self, address: str, default: Optional[str] = None) -> Optional[str]:
+        """Most recently learned live name for an address"""
+        names = self.names(address)
+        return names[-1] if names else default
+
+    def __contains__(self, address: str) -> bool:
+        return address in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _expire_oldest(self, now: float):
+        """Drop fully expired entries from the LRU end (bounded work)"""
+        entries = self._entries
+        for _ in range(self.EXPIRY_PROBES):
+            if not entries:
+                return
+            address, names = next(iter(entries.items()))
+            if any(expires > now for expires in names.values()):
+                return
+            del entries[address]
+            self.expirations += 1
+
+    def get_stats(self) -> dict:
+        """Get map size, memory estimate and hit/eviction counters"""
+        with self._lock:
+            memory = sys.getsizeof(self._entries) + sum(
+                sys.getsizeof(names) for names in self._entries.values()
+            )
+            names = sum(len(names) for names in self._entries.values())
+            addresses = len(self._entries)
+
+        lookups = self.hits + self.misses
+        return {
+            'addresses': addresses,
+            'names': names,
+            'memory_bytes': memory,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
@@ -0,0 +1,164 @@
+"""
+DNS Parser for Defensiq Network Security
+Zero-copy DNS wire-format parser mapping answer addresses to queried names
+"""
+
+import socket
+import struct
+from typing import Dict, List, Optional, Tuple
+
+TYPE_A = 1
+TYPE_CNAME = 5
+TYPE_AAAA = 28
+CLASS_IN = 1
+
+# Bound on compression pointer jumps / CNAME hops (loops in hostile packets)
+MAX_POINTER_JUMPS = 32
+MAX_CNAME_CHAIN = 16
+
+_HEADER = struct.Struct('!HHHHHH')
+_RECORD = struct.Struct('!HHIH')
+
+
+class DNSMessage:
+    """
+    Parsed DNS message
+
+    names lists the queried name followed by the CNAME chain it resolved
+    through; answers holds every A/AAAA address reached through that chain
+    with the smallest TTL along the way.
+    """
+
+    __slots__ = ('id', 'is_response', 'rcode', 'qname', 'qtype', 'names', 'answers')
+
+    def __init__(self, message_id: int, is_response: bool, rcode: int, qname: str, qtype: int):
+        self.id = message_id
+        self.is_response = is_response
+        self.rcode = rcode
+        self.qname = qname
+        self.qtype = qtype
+        self.names: List[str] = [qname] if qname else []
+        self.answers: List[Tuple[str, int]] = []  # (address, ttl)
+
+
+def read_name(data: memoryview, pos: int) -> Tuple[Optional[str], int]:
+    """
+    Decode a (possibly compressed) domain name
+    Returns: (lowercase name or None if malformed, offset after the name)
+    """
+    labels = []
+    end = -1
+    jumps = 0
+    length_total = 0
+    size = len(data)
+
+    while pos < size:
+        length = data[pos]
+
+        if length == 0:
+            pos += 1
+            break
+
+        if length & 0xC0 == 0xC0:
+            if pos + 1 >= size or jumps >= MAX_POINTER_JUMPS:
+                return (None, size)
+            if end < 0:
+                end = pos + 2
+            pos = ((length & 0x3F) << 8) | data[pos + 1]
+            jumps += 1
+            continue
+
+        if length & 0xC0:
+            # Extended label types (0x40/0x80) are obsolete
+            return (None, size)
+
+        pos += 1
+        if pos + length > size:
+            return (None, size)
+        labels.append(data[pos:pos + length].tobytes())
+        length_total += length + 1
+        if length_total > 255:
+            return (None, size)
+        pos += length
+    else:
+        return (None, size)
+
+    name = b'.'.join(labels).decode('ascii', errors='replace').lower()
+    return (name, end if end >= 0 else pos)
+
+
+def parse_dns_message(payload) -> Optional[DNSMessage]:
+    """
+    Parse a DNS query or response (UDP payload, any bytes-like object)
+    Returns: DNSMessage, or None if the packet isn't usable DNS
+    """
+    data = memoryview(payload)
+    if len(data) < _HEADER.size:
+        return None
+
+    message_id, flags, qdcount, ancount, _, _ = _HEADER.unpack_from(data, 0)
+    if qdcount == 0:
+        return None
+
+    # First question only; multi-question messages don't occur in practice
+    qname, pos = read_name(data, _HEADER.size)
+    if qname is None or pos + 4 > len(data):
+        return None
+    qtype = (data[pos] << 8) | data[pos + 1]
+    pos += 4
+
+    for _ in range(qdcount - 1):
+        _, pos = read_name(data, pos)
+        pos += 4
+
+    message = DNSMessage(message_id, bool(flags & 0x8000), flags & 0x000F, qname, qtype)
+    if not message.is_response or ancount == 0:
+        return message
+
+    cnames: Dict[str, Tuple[str, int]] = {}  # owner -> (target, ttl)
+    addresses: List[Tuple[str, str, int]] = []  # (owner, address, ttl)
+    size = len(data)
+
+    for _ in range(ancount):
+        owner, pos = read_name(data, pos)
+        if owner is None or pos + _RECORD.size > size:
+            break
+        rtype, rclass, ttl, rdlength = _RECORD.unpack_from(data, pos)
+        pos += _RECORD.size
+        rdata_end = pos + rdlength
+        if rdata_end > size:
+            break
+
+        if rclass == CLASS_IN:
+            if rtype == TYPE_A and rdlength == 4:
+                addresses.append((owner, socket.inet_ntop(socket.AF_INET, data[pos:rdata_end]), ttl))
+            elif rtype == TYPE_AAAA and rdlength == 16:
+                addresses.append((owner, socket.inet_ntop(socket.AF_INET6, data[pos:rdata_end]), ttl))
+            elif rtype == TYPE_CNAME:
+                target, _ = read_name(data, pos)
+                if target:
+                    cnames[owner] = (target, ttl)
+
+        pos = rdata_end
+
+    # Follow the CNAME chain from the queried name, tracking the lowest TTL
+    chain_ttl = {qname: None}
+    name = qname
+    ttl_so_far = None
+    for _ in range(MAX_CNAME_CHAIN):
+        link = cnames.get(name)
+        if link is None:
+            break
+        name, ttl = link
+        if name in chain_ttl:
+            break
+        ttl_so_far = ttl if ttl_so_far is None else min(ttl_so_far, ttl)
+        chain_ttl[name] = ttl_so_far
+        message.names.append(name)
+
+    for owner, address, ttl in addresses:
+        if owner in chain_ttl:
+            cname_ttl = chain_ttl[owner]
+            message.answers.append((address, ttl if cname_ttl is None else min(ttl, cname_ttl)))
+
+    return message
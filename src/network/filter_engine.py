@@ -4,11 +4,12 @@ Uses PyDivert (WinDivert) for packet interception and filtering
 CRITICAL: This requires admin privileges and WinDivert driver
 """
 
+import queue
 import socket
 import struct
 import time
 import threading
-from typing import Optional, Callable
+from typing import List, Optional, Callable
 from datetime import datetime
 
 # Optional PyDivert import (will fail gracefully if not available)
@@ -20,38 +21,201 @@ except ImportError:
     print("[WARNING] PyDivert not available. Filtering will be disabled.")
 
 from core.logger import get_logger, EventType
-from core.config import get_config
+from core.config import Settings, get_config
 from rules.blocklist_manager import get_blocklist_manager
+from .capture import CaptureBackend, WinDivertCapture
+from .divert_filter import build_divert_filter, sniff_filter
+from .dns_map import DNSAddressMap
+from .dns_parser import DNSMessage, parse_dns_message
+from .flow_table import FlowTable, flow_key, TCP_FIN, TCP_RST
+from .http_parser import extract_host
+from .quic_parser import CRYPTOGRAPHY_AVAILABLE, CryptoStream, decrypt_initial, is_quic_initial
+from .tls_parser import ClientHello, INCOMPLETE, looks_like_client_hello, parse_client_hello
+
+# ClientHellos split across segments: flows buffered and bytes kept per flow
+TLS_PENDING_FLOWS = 4096
+TLS_REASSEMBLY_LIMIT = 32768
+
+# Client Initial packets read per QUIC flow before giving up on the ClientHello
+QUIC_INITIAL_PACKETS = 4
+
+# Minimum seconds between divert filter recompiles; rule changes arriving
+# faster are picked up together by the next one
+FILTER_REFRESH_INTERVAL = 1.0
+
+
+class _FlowShard:
+    """
+    Flow state owned by a single thread: verdict cache, partial handshakes
+    and counters. Never shared, so none of it needs a lock.
+    """
+    
+    def __init__(self, flows: FlowTable):
+        self.flows = flows
+        
+        # Partial TLS ClientHellos by flow key (first segments only)
+        self.tls_pending = {}
+        
+        # Partial QUIC CRYPTO streams by flow key (client Initial packets only)
+        self.quic_pending = {}
+        
+        self.stats = {
+            'packets_inspected': 0,
+            'packets_allowed': 0,
+            'packets_blocked': 0,
+            'batches': 0,
+            'tls_client_hellos': 0,
+            'tls_ech': 0,
+            'quic_initials': 0,
+            'quic_client_hellos': 0
+        }
+
+
+class _FilterWorker(_FlowShard):
+    """Worker thread judging one shard of flows in batches"""
+    
+    def __init__(self, engine: 'FilterEngine', index: int, queue_depth: int, batch_size: int):
+        super().__init__(FlowTable(
+            max_flows=engine.settings.filtering.flow_cache_size,
+            idle_timeout=engine.settings.filtering.flow_idle_timeout
+        ))
+        self.engine = engine
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=queue_depth)  # (packet, flow_key, tcp_flags) or None
+        self.thread = threading.Thread(target=self.run, name=f"filter-worker-{index}", daemon=True)
+    
+    def run(self):
+        """Drain the queue in batches until the stop sentinel arrives"""
+        engine = self.engine
+        stopping = False
+        
+        while not stopping:
+            item = self.queue.get()
+            if item is None:
+                break
+            
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            sent = False
+            try:
+                allowed, blocked = self._judge_batch(batch)
+                engine._send_batch(allowed)
+                sent = True
+                engine._drop_batch(blocked)
+            except Exception as e:
+                engine.logger.log_event(
+                    EventType.ERROR_OCCURRED,
+                    f"Filter worker error: {e}",
+                    {'exception': str(e)}
+                )
+                # Fail safe: reinject the whole batch rather than lose it
+                if not sent:
+                    try:
+                        engine._send_batch([packet for packet, _, _ in batch])
+                    except Exception as e:
+                        print(f"[ERROR] Failed to reinject batch: {e}")
+    
+    def _judge_batch(self, batch: list) -> tuple:
+        """
+        Decide a batch of packets
+        Returns: (packets to reinject, packets to drop)
+        """
+        engine = self.engine
+        stats = self.stats
+        log_all = engine.settings.monitoring.log_all_traffic
+        allowed = []
+        blocked = []
+        
+        stats['batches'] += 1
+        stats['packets_inspected'] += len(batch)
+        
+        for packet, key, tcp_flags in batch:
+            # Check if packet should be blocked (cached per flow)
+            should_block, reason = engine._flow_verdict(packet, key, tcp_flags, self)
+            
+            if should_block:
+                stats['packets_blocked'] += 1
+                
+                # Log blocked packet, drop it (don't reinject)
+                engine._log_blocked_packet(packet, reason)
+                blocked.append(packet)
+            
+            else:
+                stats['packets_allowed'] += 1
+                
+                # Optionally log allowed traffic
+                if log_all:
+                    engine._log_allowed_packet(packet)
+                
+                allowed.append(packet)
+        
+        return (allowed, blocked)
 
 
 class FilterEngine:
     """Network packet filtering engine using PyDivert"""
     
-    def __init__(self):
-        """Initialize filter engine"""
+    def __init__(self, capture: Optional[CaptureBackend] = None):
+        """
+        Initialize filter engine
+        Args:
+            capture: Packet source (default: live WinDivert capture)
+        """
         self.logger = get_logger()
         self.config = get_config()
         self.blocklist = get_blocklist_manager()
         
+        # Typed settings snapshot, replaced when the configuration changes
+        self.settings = self.config.settings
+        self.config.subscribe(self._on_settings_changed, ['monitoring', 'filtering'])
+        
         # State
         self.running = False
         self.filter_thread: Optional[threading.Thread] = None
-        self.divert_handle = None
+        self.capture = capture
+        self.active_capture: Optional[CaptureBackend] = None
+        
+        # Live capture: WinDivert filter compiled from the rules, and a sniff
+        # handle that logs the rest when all traffic is logged
+        self.divert_filter: Optional[str] = None
+        self.sniffer: Optional[WinDivertCapture] = None
+        self.sniff_thread: Optional[threading.Thread] = None
         
-        # Statistics
+        # Statistics (packet and handshake counters are summed from the workers)
         self.stats = {
             'packets_inspected': 0,
             'packets_allowed': 0,
             'packets_blocked': 0,
+            'queue_stalls': 0,
+            'tls_client_hellos': 0,
+            'tls_ech': 0,
+            'quic_initials': 0,
+            'quic_client_hellos': 0,
+            'filter_reopens': 0,
+            'packets_sniffed': 0,
             'start_time': None
         }
         
-        # Domain cache (IP -> Domain mapping from DNS queries)
-        self.dns_cache = {}
+        # Domain cache (IP -> domain names from DNS answers, TTL-bound LRU)
+        self.dns_cache = DNSAddressMap(
+            max_addresses=self.settings.filtering.dns_cache_size
+        )
+        
+        # Worker pipeline; each worker owns the flow state of its shard
+        self.workers: List[_FilterWorker] = []
     
     def start(self) -> bool:
         """Start the filtering engine"""
-        if not PYDIVERT_AVAILABLE:
+        if self.capture is None and not PYDIVERT_AVAILABLE:
             self.logger.log_event(
                 EventType.ERROR_OCCURRED,
                 "PyDivert not available. Cannot start filtering.",
@@ -59,7 +223,7 @@ class FilterEngine:
             )
             return False
         
-        if not self.config.get('filtering.enabled', False):
+        if not self.settings.filtering.enabled:
             self.logger.log_event(
                 EventType.ERROR_OCCURRED,
                 "Filtering not enabled in configuration",
@@ -70,6 +234,10 @@ class FilterEngine:
         if self.running:
             return True
         
+        if self.settings.filtering.quic_mode == 'inspect' and not CRYPTOGRAPHY_AVAILABLE:
+            print("[WARNING] cryptography not installed; QUIC server names are not inspected "
+                  "(set filtering.quic_mode to 'block' to force TCP fallback)")
+        
         try:
             self.running = True
             self.stats['start_time'] = datetime.now()
@@ -102,10 +270,9 @@ class FilterEngine:
         try:
             self.running = False
             
-            # Close WinDivert handle
-            if self.divert_handle:
-                self.divert_handle.close()
-                self.divert_handle = None
+            # Close capture handle (unblocks the receive loop)
+            if self.active_capture:
+                self.active_capture.close()
             
             # Wait for thread to finish
             if self.filter_thread:
@@ -126,43 +293,80 @@ class FilterEngine:
             )
             return False
     
+    def run(self) -> dict:
+        """
+        Run the filter pipeline in the calling thread until the capture ends
+        Used for replaying recorded traffic (see PcapReplayCapture)
+        """
+        self.running = True
+        self.stats['start_time'] = datetime.now()
+        self._filter_loop()
+        return self.get_stats()
+    
     def _filter_loop(self):
-        """Main filtering loop (runs in separate thread)"""
+        """
+        Receive loop (runs in separate thread)
+        Packets are hashed by flow onto worker queues, so each flow is
+        judged in order by one worker while the receive call keeps running.
+        """
         try:
-            # Open WinDivert handle
-            # Filter: Outbound TCP/UDP traffic on common ports
-            filter_str = "outbound and (tcp or udp)"
+            # Open capture
+            # Filter: only packets some rule could block (DNS, first web
+            # segments, QUIC, blocked addresses); the rest bypasses Python
+            filter_generation = self.blocklist.current.generation
+            filter_settings = self.settings
+            next_refresh = time.monotonic() + FILTER_REFRESH_INTERVAL
+            self.divert_filter = self._build_filter()
             
-            with pydivert.WinDivert(filter_str) as divert:
-                self.divert_handle = divert
-                
-                for packet in divert:
-                    if not self.running:
-                        break
-                    
-                    self.stats['packets_inspected'] += 1
-                    
-                    # Check if packet should be blocked
-                    should_block, reason = self._should_block_packet(packet)
-                    
-                    if should_block:
-                        self.stats['packets_blocked'] += 1
-                        
-                        # Log blocked packet
-                        self._log_blocked_packet(packet, reason)
-                        
-                        # Drop packet (don't reinject)
-                        continue
+            capture = self.capture or WinDivertCapture(self.divert_filter)
+            batch_size = max(1, self.settings.filtering.batch_size)
+            
+            workers = self._start_workers()
+            worker_count = len(workers)
+            stats = self.stats
+            
+            def dispatch(batch):
+                for packet in batch:
+                    key, tcp_flags = flow_key(packet.raw)
+                    worker = workers[hash(key) % worker_count] if key is not None else workers[0]
                     
-                    else:
-                        self.stats['packets_allowed'] += 1
-                        
-                        # Optionally log allowed traffic
-                        if self.config.get('monitoring.log_all_traffic', False):
-                            self._log_allowed_packet(packet)
-                        
-                        # Reinject packet
-                        divert.send(packet)
+                    item = (packet, key, tcp_flags)
+                    try:
+                        worker.queue.put_nowait(item)
+                    except queue.Full:
+                        # Backpressure: let the capture queue absorb the burst
+                        stats['queue_stalls'] += 1
+                        worker.queue.put(item)
+            
+            def dispatch_drained(batch):
+                # Left on a replaced handle: judge them, or pass them on once stopped
+                if self.running:
+                    dispatch(batch)
+                else:
+                    capture.send(batch)
+            
+            capture.open(queue_length=self.settings.filtering.queue_depth)
+            self.active_capture = capture
+            if self.capture is None:
+                self._start_sniffer()
+            
+            while self.running:
+                batch = capture.recv_batch(batch_size)
+                if not batch:
+                    break
+                
+                # Rules or settings changed: reopen the handle if the filter
+                # shape did, at most once per FILTER_REFRESH_INTERVAL
+                generation = self.blocklist.current.generation
+                if self.capture is None and (generation != filter_generation or filter_settings is not self.settings):
+                    now = time.monotonic()
+                    if now >= next_refresh:
+                        filter_generation = generation
+                        filter_settings = self.settings
+                        next_refresh = now + FILTER_REFRESH_INTERVAL
+                        self._refresh_filter(capture, dispatch_drained)
+                
+                dispatch(batch)
         
         except Exception as e:
             self.logger.log_event(
@@ -170,13 +374,169 @@ class FilterEngine:
                 f"Filter loop error: {e}",
                 {'exception': str(e)}
             )
+        
+        finally:
+            self._stop_workers()
+            self._stop_sniffer()
+            if self.active_capture is not None:
+                self.active_capture.close()
             self.running = False
     
-    def _should_block_packet(self, packet) -> tuple:
+    def _build_filter(self) -> str:
+        """WinDivert filter for the current rules and modes"""
+        return build_divert_filter(
+            self.blocklist.current,
+            self.settings.filtering.quic_mode
+        )
+    
+    def _on_settings_changed(self, settings: Settings, changed: set):
+        """Configuration subscriber: swap in the new snapshot (read by the loops)"""
+        self.settings = settings
+    
+    def _refresh_filter(self, capture: CaptureBackend, on_drained: Callable[[List], None] = None):
+        """Recompile the filter; reopen handles only if it changed"""
+        divert_filter = self._build_filter()
+        if divert_filter != self.divert_filter:
+            self.divert_filter = divert_filter
+            capture.set_filter(divert_filter, on_drained)
+            self.stats['filter_reopens'] += 1
+            self._stop_sniffer()
+        
+        # Sniff handle follows monitoring.log_all_traffic
+        if not self.settings.monitoring.log_all_traffic:
+            self._stop_sniffer()
+        elif self.sniffer is None:
+            self._start_sniffer()
+    
+    def _start_sniffer(self):
+        """Log traffic outside the divert filter from a sniff-only handle"""
+        if not self.settings.monitoring.log_all_traffic:
+            return
+        filter_str = sniff_filter(self.divert_filter)
+        if filter_str is None:
+            return
+        
+        sniffer = WinDivertCapture(filter_str, sniff=True)
+        try:
+            sniffer.open()
+        except Exception as e:
+            print(f"[WARNING] Could not open sniff handle, traffic outside the filter is not logged: {e}")
+            return
+        
+        self.sniffer = sniffer
+        self.sniff_thread = threading.Thread(target=self._sniff_loop, args=(sniffer,), daemon=True)
+        self.sniff_thread.start()
+    
+    def _stop_sniffer(self):
+        sniffer, self.sniffer = self.sniffer, None
+        if sniffer is not None:
+            sniffer.close()
+            self.sniff_thread.join(timeout=5.0)
+    
+    def _sniff_loop(self, sniffer: WinDivertCapture):
+        """Log sniffed (never diverted) packets as allowed traffic"""
+        try:
+            while self.running:
+                batch = sniffer.recv_batch(1)
+                if not batch:
+                    break
+                for packet in batch:
+                    self.stats['packets_sniffed'] += 1
+                    self._log_allowed_packet(packet)
+        except Exception as e:
+            print(f"[ERROR] Sniff loop error: {e}")
+    
+    def _start_workers(self) -> List[_FilterWorker]:
+        """Create and start the worker pipeline from configuration"""
+        filtering = self.settings.filtering
+        worker_count = max(1, filtering.workers)
+        queue_depth = max(1, filtering.queue_depth)
+        batch_size = max(1, filtering.batch_size)
+        
+        self.workers = [
+            _FilterWorker(self, index, queue_depth, batch_size)
+            for index in range(worker_count)
+        ]
+        for worker in self.workers:
+            worker.thread.start()
+        return self.workers
+    
+    def _stop_workers(self):
+        """Signal workers to finish their queues and wait for them"""
+        for worker in self.workers:
+            try:
+                worker.queue.put(None, timeout=1.0)
+            except queue.Full:
+                pass
+        
+        for worker in self.workers:
+            worker.thread.join(timeout=5.0)
+    
+    def _send_batch(self, packets: list):
+        """Reinject a batch of allowed packets"""
+        if packets and self.active_capture is not None:
+            self.active_capture.send(packets)
+    
+    def _drop_batch(self, packets: list):
+        """Hand a batch of blocked packets to the capture's drop sink"""
+        if packets and self.active_capture is not None:
+            self.active_capture.drop(packets)
+    
+    def _flow_verdict(self, packet, key: Optional[tuple], tcp_flags: int, shard: _FlowShard) -> tuple:
+        """
+        Verdict for a packet, reusing the cached verdict of its flow
+        Returns: (should_block, reason)
+        """
+        if key is None:
+            return self._should_block_packet(packet, shard)
+        
+        flows = shard.flows
+        now = time.monotonic()
+        entry = flows.lookup(key, self.blocklist.current.generation, now)
+        if entry is not None:
+            should_block, reason = entry[0], entry[1]
+        else:
+            should_block, reason = self._should_block_packet(packet, shard)
+            if self._is_final_verdict(packet, should_block, shard):
+                flows.store(key, should_block, reason, now)
+        
+        if tcp_flags & (TCP_FIN | TCP_RST):
+            flows.discard(key)
+        
+        return (should_block, reason)
+    
+    def _is_final_verdict(self, packet, should_block: bool, shard: _FlowShard) -> bool:
+        """Whether a verdict holds for the rest of the flow"""
+        if should_block:
+            return True
+        
+        dst_port = packet.dst_port if hasattr(packet, 'dst_port') else 0
+        src_port = packet.src_port if hasattr(packet, 'src_port') else 0
+        
+        # Every DNS message carries its own name
+        if dst_port == 53 or src_port == 53:
+            return False
+        
+        # Web flows are allowed on the handshake but may still be blocked
+        # by the first request (Host header / SNI); wait for a payload
+        if dst_port == 80:
+            return bool(packet.payload)
+        if dst_port == 443:
+            key = flow_key(packet.raw)[0]
+            return bool(packet.payload) and key not in shard.tls_pending and key not in shard.quic_pending
+        
+        return True
+    
+    def _should_block_packet(self, packet, shard: _FlowShard) -> tuple:
         """
         Determine if packet should be blocked
+        Args:
+            shard: Flow state of the calling worker (handshake reassembly)
         Returns: (should_block, reason)
         """
+        # One generation for the whole packet, even if a reload swaps mid-way
+        blocklist = self.blocklist.current
+        
         # Extract packet info
         dst_ip = packet.dst_addr
         src_ip = packet.src_addr
@@ -184,108 +544,175 @@ class FilterEngine:
         src_port = packet.src_port if hasattr(packet, 'src_port') else 0
         protocol = 'TCP' if packet.tcp else 'UDP' if packet.udp else 'OTHER'
         
-        # Check IP blocklist
-        is_blocked, category, reason = self.blocklist.is_ip_blocked(dst_ip)
+        # Check IP blocklist (packed address, no string parsing)
+        is_blocked, category, reason = blocklist.is_packed_ip_blocked(
+            self._packed_dst_addr(packet)
+        )
         if is_blocked:
             return (True, f"Blocked IP ({category}): {reason}")
         
         # DNS Query/Response inspection (UDP port 53)
         if protocol == 'UDP' and (dst_port == 53 or src_port == 53):
-            domain = self._extract_dns_domain(packet)
-            if domain:
-                # Cache IP -> Domain mapping from DNS responses
-                if src_port == 53:  # DNS response
-                    self.dns_cache[dst_ip] = domain
+            message = self._parse_dns(packet)
+            if message is not None:
+                domain = message.qname
                 
-                # Check domain blocklist
-                is_blocked, category, reason = self.blocklist.is_domain_blocked(domain)
-                if is_blocked:
-                    return (True, f"Blocked DNS ({category}): {domain} - {reason}")
+                # Cache answer IP -> queried domain mapping from DNS responses
+                if message.is_response:
+                    for address, ttl in message.answers:
+                        self.dns_cache.add(address, domain, ttl)
+                
+                # Check domain blocklist (query name and every CNAME it resolved through)
+                for name in message.names:
+                    is_blocked, category, reason = blocklist.is_domain_blocked(name)
+                    if is_blocked:
+                        if name != domain:
+                            reason = f"{reason} (via CNAME {name})"
+                        return (True, f"Blocked DNS ({category}): {domain} - {reason}")
+        
+        # QUIC (HTTP/3): server name from the client Initial packets
+        if protocol == 'UDP' and dst_port == 443:
+            quic_mode = self.settings.filtering.quic_mode
+            if quic_mode == 'block':
+                return (True, "Blocked QUIC (TCP fallback)")
+            if quic_mode == 'inspect':
+                hello = self._quic_client_hello(packet, shard)
+                if hello is not None and hello.sni:
+                    is_blocked, category, reason = blocklist.is_domain_blocked(hello.sni)
+                    if is_blocked:
+                        return (True, f"Blocked QUIC SNI ({category}): {hello.sni} - {reason}")
         
         # HTTP/HTTPS traffic inspection (check cached domains)
-        if protocol == 'TCP' and (dst_port == 80 or dst_port == 443):
-            # Check if we have domain mapping for this IP
-            if dst_ip in self.dns_cache:
-                domain = self.dns_cache[dst_ip]
-                is_blocked, category, reason = self.blocklist.is_domain_blocked(domain)
+        if (protocol == 'TCP' and (dst_port == 80 or dst_port == 443)) or (protocol == 'UDP' and dst_port == 443):
+            # TLS server name from the flow's ClientHello
+            if protocol == 'TCP' and dst_port == 443:
+                hello = self._client_hello(packet, shard)
+                if hello is not None and hello.sni:
+                    is_blocked, category, reason = blocklist.is_domain_blocked(hello.sni)
+                    if is_blocked:
+                        ech = " (ECH)" if hello.ech else ""
+                        return (True, f"Blocked TLS SNI{ech} ({category}): {hello.sni} - {reason}")
+            
+            # Check every name this IP was resolved for (most restrictive wins)
+            for domain in self.dns_cache.names(dst_ip):
+                is_blocked, category, reason = blocklist.is_domain_blocked(domain)
                 if is_blocked:
                     return (True, f"Blocked HTTP/HTTPS to {domain} ({category}): {reason}")
             
-            # Try to extract Host header from HTTP traffic (port 80 only)
-            if dst_port == 80 and packet.tcp and hasattr(packet, 'payload'):
-                try:
-                    payload = bytes(packet.payload)
-                    if payload.startswith(b'GET ') or payload.startswith(b'POST ') or payload.startswith(b'HEAD '):
-                        # Look for Host header
-                        payload_str = payload.decode('utf-8', errors='ignore')
-                        for line in payload_str.split('\r\n'):
-                            if line.lower().startswith('host:'):
-                                host = line.split(':', 1)[1].strip()
-                                # Remove port if present
-                                host = host.split(':')[0]
-                                
-                                # Cache this mapping
-                                self.dns_cache[dst_ip] = host
-                                
-                                # Check blocklist
-                                is_blocked, category, reason = self.blocklist.is_domain_blocked(host)
-                                if is_blocked:
-                                    return (True, f"Blocked HTTP Host ({category}): {host} - {reason}")
-                except:
-                    pass
+            # Host header of the flow's first request segment (port 80 only)
+            if dst_port == 80 and protocol == 'TCP':
+                host = extract_host(self._tcp_payload(packet))
+                if host:
+                    # Cache this mapping
+                    self.dns_cache.add(dst_ip, host, DNSAddressMap.MIN_TTL)
+                    
+                    is_blocked, category, reason = blocklist.is_domain_blocked(host)
+                    if is_blocked:
+                        return (True, f"Blocked HTTP Host ({category}): {host} - {reason}")
         
         return (False, None)
     
-    def _extract_dns_domain(self, packet) -> Optional[str]:
+    def _packed_dst_addr(self, packet):
+        """Destination address bytes straight from the IP header (no copy)"""
+        raw = packet.raw
+        if raw[0] >> 4 == 6:
+            return raw[24:40]
+        return raw[16:20]
+    
+    def _tcp_payload(self, packet):
+        """TCP payload as a view into packet.raw (no copy)"""
+        raw = packet.raw
+        header_length = 40 if raw[0] >> 4 == 6 else (raw[0] & 0x0F) * 4
+        if len(raw) < header_length + 20:
+            return raw[len(raw):]
+        return raw[header_length + (raw[header_length + 12] >> 4) * 4:]
+    
+    def _client_hello(self, packet, shard: _FlowShard) -> Optional[ClientHello]:
         """
-        Extract domain name from DNS packet
-        Basic DNS parsing implementation
+        ClientHello of the flow once complete, reassembling split records
+        Only the flow's first data segments reach this (flow cache).
         """
-        try:
-            if not hasattr(packet, 'payload') or not packet.payload:
-                return None
-            
-            payload = bytes(packet.payload)
-            
-            # DNS header is 12 bytes, question starts at byte 12
-            if len(payload) < 13:
+        payload = packet.payload
+        if not payload:
+            return None
+        
+        key = flow_key(packet.raw)[0]
+        tls_pending = shard.tls_pending
+        pending = tls_pending.pop(key, None)
+        if pending is None:
+            if not looks_like_client_hello(payload):
                 return None
-            
-            # Skip DNS header (12 bytes)
-            pos = 12
-            
-            # Parse domain name (QNAME)
-            domain_parts = []
-            while pos < len(payload):
-                length = payload[pos]
-                
-                # End of domain name
-                if length == 0:
-                    break
-                
-                # Pointer (compression) - not fully supported
-                if length >= 192:
-                    break
-                
-                pos += 1
-                
-                # Extract label
-                if pos + length <= len(payload):
-                    label = payload[pos:pos + length].decode('utf-8', errors='ignore')
-                    domain_parts.append(label)
-                    pos += length
-                else:
-                    break
-            
-            if domain_parts:
-                domain = '.'.join(domain_parts)
-                return domain.lower()
-            
-        except Exception as e:
-            # DNS parsing can fail, that's okay
-            pass
+            data = payload
+        else:
+            pending += payload
+            data = pending
+        
+        result = parse_client_hello(data)
+        if result is INCOMPLETE:
+            if len(data) < TLS_REASSEMBLY_LIMIT:
+                if len(tls_pending) >= TLS_PENDING_FLOWS:
+                    # Forget the oldest half-seen handshake
+                    tls_pending.pop(next(iter(tls_pending)), None)
+                tls_pending[key] = pending if pending is not None else bytearray(data)
+            return None
+        
+        if result is not None:
+            shard.stats['tls_client_hellos'] += 1
+            if result.ech:
+                shard.stats['tls_ech'] += 1
+        return result
+    
+    def _quic_client_hello(self, packet, shard: _FlowShard) -> Optional[ClientHello]:
+        """
+        ClientHello of a QUIC flow, decrypted from its client Initial packets
+        Short-header and 0-RTT packets are opaque and end the inspection.
+        """
+        raw = packet.raw
+        header_length = 40 if raw[0] >> 4 == 6 else (raw[0] & 0x0F) * 4
+        payload = raw[header_length + 8:]
+        
+        key = flow_key(raw)[0]
+        quic_pending = shard.quic_pending
+        stream = quic_pending.pop(key, None)
+        if not is_quic_initial(payload):
+            return None
+        
+        fragments = decrypt_initial(payload)
+        if fragments is None:
+            return None
+        
+        shard.stats['quic_initials'] += 1
+        if stream is None:
+            stream = CryptoStream()
+        stream.add(fragments)
         
-        return None
+        result = stream.client_hello()
+        if result is INCOMPLETE:
+            if stream.packets < QUIC_INITIAL_PACKETS:
+                if len(quic_pending) >= TLS_PENDING_FLOWS:
+                    quic_pending.pop(next(iter(quic_pending)), None)
+                quic_pending[key] = stream
+            return None
+        
+        if result is not None:
+            shard.stats['quic_client_hellos'] += 1
+        return result
+    
+    def _parse_dns(self, packet) -> Optional[DNSMessage]:
+        """Parse the DNS message in a UDP packet straight from packet.raw"""
+        raw = packet.raw
+        header_length = 40 if raw[0] >> 4 == 6 else (raw[0] & 0x0F) * 4
+        
+        try:
+            return parse_dns_message(raw[header_length + 8:])
+        except (IndexError, ValueError, struct.error):
+            # Malformed DNS is simply not inspected
+            return None
+    
+    def _extract_dns_domain(self, packet) -> Optional[str]:
+        """Extract queried domain name from DNS packet"""
+        message = self._parse_dns(packet)
+        return message.qname if message is not None and message.qname else None
     
     def _log_blocked_packet(self, packet, reason: str):
         """Log blocked packet"""
@@ -300,7 +727,8 @@ class FilterEngine:
             src_ip=src_ip,
             dst_ip=dst_ip,
             dst_port=dst_port,
-            reason=reason
+            reason=reason,
+            size=len(packet.raw)
         )
     
     def _log_allowed_packet(self, packet):
@@ -316,18 +744,39 @@ class FilterEngine:
             src_ip=src_ip,
             dst_ip=dst_ip,
             dst_port=dst_port,
-            reason=""
+            reason="",
+            size=len(packet.raw)
         )
     
     def get_stats(self) -> dict:
         """Get filtering statistics"""
         stats = self.stats.copy()
         
+        # Packet and handshake counters from the worker pipeline
+        stats['workers'] = len(self.workers)
+        for worker in self.workers:
+            for name, value in worker.stats.items():
+                stats[name] = stats.get(name, 0) + value
+        
         if stats['start_time']:
             uptime = (datetime.now() - stats['start_time']).total_seconds()
             stats['uptime_seconds'] = uptime
             stats['packets_per_second'] = stats['packets_inspected'] / uptime if uptime > 0 else 0
         
+        # Blocklist generation currently used by the filter
+        blocklist = self.blocklist.current
+        stats['blocklist_generation'] = blocklist.generation
+        stats['blocklist_swap_latency_ms'] = blocklist.swap_latency * 1000
+        
+        flow_cache = {}
+        for worker in self.workers:
+            for name, value in worker.flows.get_stats().items():
+                flow_cache[name] = flow_cache.get(name, 0) + value
+        lookups = flow_cache.get('hits', 0) + flow_cache.get('misses', 0)
+        flow_cache['hit_rate'] = flow_cache.get('hits', 0) / lookups if lookups else 0.0
+        stats['flow_cache'] = flow_cache
+        stats['dns_cache'] = self.dns_cache.get_stats()
+        
         return stats
 
 
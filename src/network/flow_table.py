@@ -0,0 +1,139 @@
+"""
+Flow Table for Defensiq Network Security
+Bounded per-flow verdict cache keyed by the packet 5-tuple
+"""
+
+from typing import Optional, Tuple
+
+IPPROTO_TCP = 6
+IPPROTO_UDP = 17
+
+# TCP flags that end a flow
+TCP_FIN = 0x01
+TCP_RST = 0x04
+
+
+def flow_key(raw) -> Tuple[Optional[tuple], int]:
+    """
+    5-tuple key straight from the IP/TCP/UDP headers of a raw packet
+    Returns: (key, tcp_flags); key is None for non TCP/UDP packets
+    """
+    first = raw[0]
+    if first == 0x45:
+        # IPv4 without options: addresses and ports are contiguous
+        protocol = raw[9]
+        offset = 20
+        endpoints = raw[12:24].tobytes()
+    elif first >> 4 == 6:
+        protocol = raw[6]
+        offset = 40
+        endpoints = raw[8:44].tobytes()
+    else:
+        protocol = raw[9]
+        offset = (first & 0x0F) * 4
+        endpoints = raw[12:20].tobytes() + raw[offset:offset + 4].tobytes()
+
+    if protocol == IPPROTO_TCP:
+        if len(raw) < offset + 14:
+            return (None, 0)
+        return ((protocol, endpoints), raw[offset + 13])
+
+    if protocol == IPPROTO_UDP and len(raw) >= offset + 8:
+        return ((protocol, endpoints), 0)
+    return (None, 0)
+
+
+class FlowTable:
+    """
+    Verdicts cached per 5-tuple for the lifetime of a flow
+
+    Entries are dropped on TCP FIN/RST, after idle_timeout seconds without
+    packets, and all at once when the blocklist generation changes. When
+    full, idle entries are swept first, then the oldest flows are evicted.
+    """
+
+    def __init__(self, max_flows: int = 65536, idle_timeout: float = 120.0):
+        """Initialize flow table"""
+        self.max_flows = max_flows
+        self.idle_timeout = idle_timeout
+        self.generation = None
+        self._flows = {}  # (protocol, endpoints) -> [blocked, reason, last_seen]
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def lookup(self, key: tuple, generation: int, now: float) -> Optional[list]:
+        """
+        Cached [blocked, reason, last_seen] entry for a flow, or None
+        A generation change invalidates every cached verdict.
+        """
+        if generation != self.generation:
+            if self._flows:
+                self.expirations += len(self._flows)
+                self._flows = {}
+            self.generation = generation
+
+        entry = self._flows.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if now - entry[2] > self.idle_timeout:
+            del self._flows[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        entry[2] = now
+        self.hits += 1
+        return entry
+
+    def store(self, key: tuple, blocked: bool, reason: Optional[str], now: float):
+        """Cache the verdict for a flow"""
+        flows = self._flows
+        if key not in flows and len(flows) >= self.max_flows:
+            self._make_room(now)
+        flows[key] = [blocked, reason, now]
+
+    def discard(self, key: tuple):
+        """Forget a flow (connection closed)"""
+        if self._flows.pop(key, None) is not None:
+            self.expirations += 1
+
+    def clear(self):
+        """Drop all cached verdicts"""
+        self._flows = {}
+
+    def _make_room(self, now: float):
+        """Sweep idle flows, then evict the oldest ones (amortized)"""
+        flows = self._flows
+        idle = [key for key, entry in flows.items() if now - entry[2] > self.idle_timeout]
+        for key in idle:
+            del flows[key]
+        self.expirations += len(idle)
+
+        # Evict an eighth of the table so sweeps stay rare
+        excess = len(flows) - self.max_flows + max(1, self.max_flows // 8)
+        if excess > 0:
+            iterator = iter(flows)
+            oldest = [next(iterator) for _ in range(excess)]
+            for key in oldest:
+                del flows[key]
+            self.evictions += excess
+
+    def __len__(self) -> int:
+        return len(self._flows)
+
+    def get_stats(self) -> dict:
+        """Get flow cache counters"""
+        lookups = self.hits + self.misses
+        return {
+            'flows': len(self._flows),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
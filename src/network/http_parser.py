@@ -0,0 +1,40 @@
+"""
+HTTP Parser for Defensiq Network Security
+Extracts the Host header from the first request segment of a flow
+"""
+
+import re
+from typing import Optional
+
+# Only the start of a request is inspected; Host comes early in practice
+MAX_HEADER_SCAN = 8192
+
+_REQUEST_LINE = re.compile(rb'(?:GET|POST|HEAD|PUT|DELETE|OPTIONS|PATCH|CONNECT) ')
+
+# First header line that is either Host or the blank line ending the headers
+_HOST_OR_END = re.compile(rb'\r\n(?:host[ \t]*:[ \t]*([^\r\n]*)|\r\n)', re.IGNORECASE)
+
+
+def extract_host(payload) -> Optional[str]:
+    """
+    Host header of an HTTP request (any bytes-like object, not copied)
+    Returns: lowercase host without port, or None if the segment doesn't
+    start a request or carries no Host header
+    """
+    if not payload or _REQUEST_LINE.match(payload) is None:
+        return None
+
+    match = _HOST_OR_END.search(payload, 0, MAX_HEADER_SCAN)
+    if match is None or match.group(1) is None:
+        return None
+
+    value = match.group(1).strip()
+    if value.startswith(b'['):
+        # IPv6 literal, port after the bracket
+        value = value[1:value.find(b']')] if b']' in value else b''
+    else:
+        value = value.split(b':', 1)[0]
+
+    if not value:
+        return None
+    return value.decode('ascii', errors='replace').lower().rstrip('.')
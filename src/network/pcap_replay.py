@@ -0,0 +1,380 @@
+"""
+PCAP Replay for Defensiq Network Security
+Pure-Python pcap/pcapng reader and writer used as a capture backend
+"""
+
+import socket
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+from .capture import CaptureBackend
+
+# Link-layer header types (tcpdump.org/linktypes.html)
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LOOP = 108
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_IPV6 = 229
+LINKTYPE_LINUX_SLL2 = 276
+
+PCAP_MAGIC_US = 0xA1B2C3D4
+PCAP_MAGIC_NS = 0xA1B23C4D
+
+PCAPNG_SECTION_HEADER = 0x0A0D0D0A
+PCAPNG_INTERFACE_DESCRIPTION = 0x00000001
+PCAPNG_SIMPLE_PACKET = 0x00000003
+PCAPNG_ENHANCED_PACKET = 0x00000006
+PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+PCAPNG_OPTION_TSRESOL = 9
+
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_IPV6 = 0x86DD
+ETHERTYPE_VLAN = (0x8100, 0x88A8, 0x9100)
+
+
+class ReplayPacket:
+    """
+    Recorded IP packet exposing the pydivert.Packet attributes FilterEngine
+    uses; header fields are decoded from raw on access, like pydivert does.
+    """
+
+    __slots__ = ('raw', 'timestamp')
+
+    def __init__(self, raw: bytes, timestamp: float = 0.0):
+        self.raw = memoryview(raw)
+        self.timestamp = timestamp
+
+    @property
+    def ipv6(self) -> bool:
+        return self.raw[0] >> 4 == 6
+
+    @property
+    def protocol(self) -> int:
+        return self.raw[6] if self.ipv6 else self.raw[9]
+
+    @property
+    def _transport_offset(self) -> int:
+        return 40 if self.ipv6 else (self.raw[0] & 0x0F) * 4
+
+    @property
+    def src_addr(self) -> str:
+        if self.ipv6:
+            return socket.inet_ntop(socket.AF_INET6, self.raw[8:24])
+        return socket.inet_ntop(socket.AF_INET, self.raw[12:16])
+
+    @property
+    def dst_addr(self) -> str:
+        if self.ipv6:
+            return socket.inet_ntop(socket.AF_INET6, self.raw[24:40])
+        return socket.inet_ntop(socket.AF_INET, self.raw[16:20])
+
+    @property
+    def tcp(self) -> Optional[memoryview]:
+        """TCP header bytes, or None"""
+        if self.protocol != socket.IPPROTO_TCP:
+            return None
+        offset = self._transport_offset
+        return self.raw[offset:offset + (self.raw[offset + 12] >> 4) * 4]
+
+    @property
+    def udp(self) -> Optional[memoryview]:
+        """UDP header bytes, or None"""
+        if self.protocol != socket.IPPROTO_UDP:
+            return None
+        offset = self._transport_offset
+        return self.raw[offset:offset + 8]
+
+    @property
+    def src_port(self) -> Optional[int]:
+        if self.protocol not in (socket.IPPROTO_TCP, socket.IPPROTO_UDP):
+            return None
+        return struct.unpack_from('!H', self.raw, self._transport_offset)[0]
+
+    @property
+    def dst_port(self) -> Optional[int]:
+        if self.protocol not in (socket.IPPROTO_TCP, socket.IPPROTO_UDP):
+            return None
+        return struct.unpack_from('!H', self.raw, self._transport_offset + 2)[0]
+
+    @property
+    def payload(self) -> Optional[bytes]:
+        """Transport payload bytes (None for non TCP/UDP packets)"""
+        header = self.tcp
+        if header is None:
+            header = self.udp
+        if header is None:
+            return None
+        return self.raw[self._transport_offset + len(header):].tobytes()
+
+
+def iter_capture_file(path) -> Iterator[Tuple[float, bytes]]:
+    """
+    Stream (timestamp, ip_packet) from a pcap or pcapng file
+    Link-layer headers are stripped; non-IP frames are skipped.
+    """
+    with open(path, 'rb') as f:
+        magic = f.read(4)
+        f.seek(0)
+        if len(magic) < 4:
+            return
+
+        if struct.unpack('<I', magic)[0] == PCAPNG_SECTION_HEADER:
+            records = _iter_pcapng(f)
+        else:
+            records = _iter_pcap(f)
+
+        for timestamp, linktype, frame in records:
+            packet = strip_link_layer(linktype, frame)
+            if packet:
+                yield (timestamp, packet)
+
+
+def _iter_pcap(f: BinaryIO) -> Iterator[Tuple[float, int, bytes]]:
+    """Records of a classic pcap file"""
+    header = f.read(24)
+    if len(header) < 24:
+        return
+
+    for order in ('<', '>'):
+        magic = struct.unpack(order + 'I', header[:4])[0]
+        if magic in (PCAP_MAGIC_US, PCAP_MAGIC_NS):
+            break
+    else:
+        raise ValueError("Not a pcap or pcapng file")
+
+    resolution = 1e-9 if magic == PCAP_MAGIC_NS else 1e-6
+    linktype = struct.unpack(order + 'I', header[20:24])[0] & 0x0FFFFFFF
+    record = struct.Struct(order + 'IIII')
+
+    while True:
+        fields = f.read(16)
+        if len(fields) < 16:
+            return
+        seconds, fraction, captured, _ = record.unpack(fields)
+        frame = f.read(captured)
+        if len(frame) < captured:
+            return
+        yield (seconds + fraction * resolution, linktype, frame)
+
+
+def _iter_pcapng(f: BinaryIO) -> Iterator[Tuple[float, int, bytes]]:
+    """Packet blocks of a pcapng file (all sections and interfaces)"""
+    order = '<'
+    interfaces: List[Tuple[int, float]] = []  # (linktype, timestamp resolution)
+
+    while True:
+        head = f.read(8)
+        if len(head) < 8:
+            return
+
+        block_type = struct.unpack('<I', head[:4])[0]
+        if block_type == PCAPNG_SECTION_HEADER:
+            byte_order = f.read(4)
+            order = '<' if struct.unpack('<I', byte_order)[0] == PCAPNG_BYTE_ORDER_MAGIC else '>'
+            length = struct.unpack(order + 'I', head[4:])[0]
+            f.seek(length - 12, 1)
+            interfaces = []
+            continue
+
+        block_type, length = struct.unpack(order + 'II', head)
+        if length < 12:
+            raise ValueError("Corrupt pcapng block")
+        body = f.read(length - 8)
+        if len(body) < length - 8:
+            return
+        body = body[:-4]  # trailing block length
+
+        if block_type == PCAPNG_INTERFACE_DESCRIPTION:
+            linktype = struct.unpack_from(order + 'H', body, 0)[0]
+            interfaces.append((linktype, _pcapng_resolution(body[8:], order)))
+
+        elif block_type == PCAPNG_ENHANCED_PACKET:
+            interface, high, low, captured = struct.unpack_from(order + 'IIII', body, 0)
+            if interface >= len(interfaces):
+                continue
+            linktype, resolution = interfaces[interface]
+            yield (((high << 32) | low) * resolution, linktype, body[20:20 + captured])
+
+        elif block_type == PCAPNG_SIMPLE_PACKET and interfaces:
+            linktype, _ = interfaces[0]
+            yield (0.0, linktype, body[4:])
+
+
+def _pcapng_resolution(options: bytes, order: str) -> float:
+    """Timestamp resolution from interface options (if_tsresol)"""
+    pos = 0
+    while pos + 4 <= len(options):
+        code, length = struct.unpack_from(order + 'HH', options, pos)
+        if code == 0:
+            break
+        if code == PCAPNG_OPTION_TSRESOL and length >= 1:
+            value = options[pos + 4]
+            if value & 0x80:
+                return 2.0 ** -(value & 0x7F)
+            return 10.0 ** -value
+        pos += 4 + ((length + 3) & ~3)
+    return 1e-6
+
+
+def strip_link_layer(linktype: int, frame: bytes) -> Optional[bytes]:
+    """IP packet inside a link-layer frame, or None for non-IP frames"""
+    if linktype in (LINKTYPE_RAW, LINKTYPE_IPV4, LINKTYPE_IPV6):
+        packet = frame
+
+    elif linktype == LINKTYPE_ETHERNET:
+        if len(frame) < 14:
+            return None
+        offset = 12
+        ethertype = struct.unpack_from('!H', frame, offset)[0]
+        while ethertype in ETHERTYPE_VLAN and len(frame) >= offset + 6:
+            offset += 4
+            ethertype = struct.unpack_from('!H', frame, offset)[0]
+        if ethertype not in (ETHERTYPE_IPV4, ETHERTYPE_IPV6):
+            return None
+        packet = frame[offset + 2:]
+
+    elif linktype in (LINKTYPE_NULL, LINKTYPE_LOOP):
+        packet = frame[4:]
+
+    elif linktype == LINKTYPE_LINUX_SLL:
+        if len(frame) < 16 or struct.unpack_from('!H', frame, 14)[0] not in (ETHERTYPE_IPV4, ETHERTYPE_IPV6):
+            return None
+        packet = frame[16:]
+
+    elif linktype == LINKTYPE_LINUX_SLL2:
+        if len(frame) < 20 or struct.unpack_from('!H', frame, 0)[0] not in (ETHERTYPE_IPV4, ETHERTYPE_IPV6):
+            return None
+        packet = frame[20:]
+
+    else:
+        return None
+
+    if not packet or packet[0] >> 4 not in (4, 6):
+        return None
+    return packet
+
+
+class PcapWriter:
+    """Packet sink writing raw IP packets to a pcap file (thread-safe)"""
+
+    def __init__(self, path):
+        """Create pcap file (LINKTYPE_RAW, microsecond timestamps)"""
+        self.path = Path(path)
+        self.count = 0
+        self._lock = threading.Lock()
+        self._file = open(self.path, 'wb')
+        self._file.write(struct.pack('<IHHiIII', PCAP_MAGIC_US, 2, 4, 0, 0, 65535, LINKTYPE_RAW))
+
+    def write(self, packet):
+        """Append one packet (anything with raw, optionally timestamp)"""
+        raw = packet.raw
+        timestamp = getattr(packet, 'timestamp', None) or time.time()
+        seconds = int(timestamp)
+        micros = int((timestamp - seconds) * 1e6)
+
+        with self._lock:
+            self._file.write(struct.pack('<IIII', seconds, micros, len(raw), len(raw)))
+            self._file.write(raw)
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class PcapReplayCapture(CaptureBackend):
+    """
+    Replays a pcap/pcapng recording through FilterEngine
+
+    Packets are delivered as fast as possible, or spaced by their recorded
+    timestamps when realtime is set (scaled by speed). Reinjected and
+    dropped packets are counted and passed to the optional sinks (any
+    object with write(packet), e.g. PcapWriter).
+    """
+
+    name = 'pcap'
+
+    def __init__(self, path, realtime: bool = False, speed: float = 1.0,
+                 accepted_sink=None, dropped_sink=None):
+        """Initialize replay of a capture file"""
+        self.path = Path(path)
+        self.realtime = realtime
+        self.speed = speed
+        self.accepted_sink = accepted_sink
+        self.dropped_sink = dropped_sink
+
+        self.received = 0
+        self.sent = 0
+        self.dropped = 0
+
+        self._records: Optional[Iterator[Tuple[float, bytes]]] = None
+        self._closed = False
+        self._lock = threading.Lock()
+        self._start_wall = None
+        self._start_recorded = None
+
+    def open(self, queue_length: Optional[int] = None):
+        """Start reading the capture file"""
+        self._records = iter_capture_file(self.path)
+        self._closed = False
+
+    def recv_batch(self, max_count: int) -> List[ReplayPacket]:
+        """Next packets from the recording (empty at end of file)"""
+        if self._closed or self._records is None:
+            return []
+
+        batch = []
+        for timestamp, raw in self._records:
+            if self.realtime:
+                self._wait_until(timestamp)
+            batch.append(ReplayPacket(raw, timestamp))
+            if len(batch) >= max_count or self.realtime:
+                break
+
+        self.received += len(batch)
+        return batch
+
+    def _wait_until(self, timestamp: float):
+        """Sleep until a recorded timestamp is due"""
+        now = time.perf_counter()
+        if self._start_wall is None:
+            self._start_wall = now
+            self._start_recorded = timestamp
+            return
+
+        delay = (timestamp - self._start_recorded) / self.speed - (now - self._start_wall)
+        if delay > 0:
+            time.sleep(delay)
+
+    def send(self, packets: List):
+        """Count (and record) reinjected packets"""
+        with self._lock:
+            self.sent += len(packets)
+        if self.accepted_sink is not None:
+            for packet in packets:
+                self.accepted_sink.write(packet)
+
+    def drop(self, packets: List):
+        """Count (and record) dropped packets"""
+        with self._lock:
+            self.dropped += len(packets)
+        if self.dropped_sink is not None:
+            for packet in packets:
+                self.dropped_sink.write(packet)
+
+    def close(self):
+        """Stop the replay"""
+        self._closed = True
+
+    def get_stats(self) -> dict:
+        """Get replay counters"""
+        return {
+            'received': self.received,
+            'sent': self.sent,
+            'dropped': self.dropped
+        }
@@ -0,0 +1,196 @@
+"""
+QUIC Parser for Defensiq Network Security
+Decrypts QUIC v1 Initial packets (RFC 9001) to reach the TLS ClientHello
+"""
+
+import hashlib
+import hmac
+import struct
+from typing import Dict, List, Optional, Tuple, Union
+
+from .tls_parser import ClientHello, INCOMPLETE, _Incomplete, parse_handshake
+
+# Optional cryptography import (AES for header protection and payload)
+try:
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    from cryptography.exceptions import InvalidTag
+    CRYPTOGRAPHY_AVAILABLE = True
+except ImportError:
+    CRYPTOGRAPHY_AVAILABLE = False
+
+QUIC_VERSION_1 = 0x00000001
+INITIAL_SALT_V1 = bytes.fromhex('38762cf7f55934b34d179ae6a4c80cadccbb7f0a')
+
+# Long header, fixed bit, packet type 0 (Initial) in QUIC v1
+LONG_HEADER = 0x80
+PACKET_TYPE_MASK = 0x30
+PACKET_TYPE_INITIAL = 0x00
+
+FRAME_PADDING = 0x00
+FRAME_PING = 0x01
+FRAME_ACK = 0x02
+FRAME_ACK_ECN = 0x03
+FRAME_CRYPTO = 0x06
+
+# ClientHellos larger than this aren't reassembled
+MAX_CRYPTO_LENGTH = 16384
+
+
+def is_quic_initial(payload) -> bool:
+    """Long-header QUIC v1 Initial packet (cheap check on UDP payload)"""
+    return (len(payload) >= 7 and payload[0] & (LONG_HEADER | PACKET_TYPE_MASK) == LONG_HEADER
+            and payload[1:5] == b'\x00\x00\x00\x01')
+
+
+def read_varint(data, pos: int) -> Tuple[int, int]:
+    """Decode a QUIC variable-length integer; returns (value, next offset)"""
+    first = data[pos]
+    length = 1 << (first >> 6)
+    if pos + length > len(data):
+        raise ValueError("Truncated varint")
+    value = first & 0x3F
+    for i in range(1, length):
+        value = (value << 8) | data[pos + i]
+    return (value, pos + length)
+
+
+def _hkdf_expand_label(secret: bytes, label: bytes, length: int) -> bytes:
+    """TLS 1.3 HKDF-Expand-Label with SHA-256 (single block, empty context)"""
+    full_label = b'tls13 ' + label
+    info = struct.pack('!HB', length, len(full_label)) + full_label + b'\x00'
+    return hmac.new(secret, info + b'\x01', hashlib.sha256).digest()[:length]
+
+
+def initial_keys(dcid: bytes) -> Tuple[bytes, bytes, bytes]:
+    """Client Initial (key, iv, header protection key) derived from the DCID"""
+    initial_secret = hmac.new(INITIAL_SALT_V1, dcid, hashlib.sha256).digest()
+    client_secret = _hkdf_expand_label(initial_secret, b'client in', 32)
+    return (
+        _hkdf_expand_label(client_secret, b'quic key', 16),
+        _hkdf_expand_label(client_secret, b'quic iv', 12),
+        _hkdf_expand_label(client_secret, b'quic hp', 16)
+    )
+
+
+def decrypt_initial(payload) -> Optional[List[Tuple[int, bytes]]]:
+    """
+    Decrypt the client Initial packets in a UDP datagram
+    Returns: CRYPTO frame fragments as (offset, data), or None if the
+    datagram isn't a decryptable QUIC v1 client Initial
+    """
+    if not CRYPTOGRAPHY_AVAILABLE:
+        return None
+
+    data = bytes(payload)
+    fragments = []
+    pos = 0
+
+    # Coalesced packets: keep going while Initial packets follow
+    while pos < len(data) and is_quic_initial(data[pos:pos + 7]):
+        try:
+            packet_end, frames = _decrypt_packet(data, pos)
+        except (IndexError, ValueError, InvalidTag):
+            break
+        fragments.extend(_crypto_frames(frames))
+        pos = packet_end
+
+    return fragments if pos else None
+
+
+def _decrypt_packet(data: bytes, start: int) -> Tuple[int, bytes]:
+    """Remove header protection and decrypt one Initial packet"""
+    pos = start + 5
+    dcid_length = data[pos]
+    dcid = data[pos + 1:pos + 1 + dcid_length]
+    pos += 1 + dcid_length
+    pos += 1 + data[pos]  # source connection id
+
+    token_length, pos = read_varint(data, pos)
+    pos += token_length
+    length, pn_offset = read_varint(data, pos)
+
+    packet_end = pn_offset + length
+    if packet_end > len(data) or pn_offset + 20 > len(data):
+        raise ValueError("Truncated Initial packet")
+
+    key, iv, hp = initial_keys(dcid)
+
+    # Header protection: mask from a ciphertext sample 4 bytes past the packet number
+    sample = data[pn_offset + 4:pn_offset + 20]
+    encryptor = Cipher(algorithms.AES(hp), modes.ECB()).encryptor()
+    mask = encryptor.update(sample) + encryptor.finalize()
+
+    first = data[start] ^ (mask[0] & 0x0F)
+    pn_length = (first & 0x03) + 1
+    packet_number = bytes(
+        data[pn_offset + i] ^ mask[1 + i] for i in range(pn_length)
+    )
+
+    header = bytes((first,)) + data[start + 1:pn_offset] + packet_number
+    nonce = (int.from_bytes(iv, 'big') ^ int.from_bytes(packet_number, 'big')).to_bytes(12, 'big')
+    frames = AESGCM(key).decrypt(nonce, data[pn_offset + pn_length:packet_end], header)
+    return (packet_end, frames)
+
+
+def _crypto_frames(frames: bytes) -> List[Tuple[int, bytes]]:
+    """CRYPTO frame fragments of a decrypted Initial payload"""
+    fragments = []
+    pos = 0
+    size = len(frames)
+
+    while pos < size:
+        frame_type = frames[pos]
+
+        if frame_type == FRAME_PADDING or frame_type == FRAME_PING:
+            pos += 1
+
+        elif frame_type == FRAME_CRYPTO:
+            offset, pos = read_varint(frames, pos + 1)
+            length, pos = read_varint(frames, pos)
+            fragments.append((offset, frames[pos:pos + length]))
+            pos += length
+
+        elif frame_type == FRAME_ACK or frame_type == FRAME_ACK_ECN:
+            pos += 1
+            for _ in range(3):  # largest acknowledged, delay, range count
+                value, pos = read_varint(frames, pos)
+            range_count = value
+            _, pos = read_varint(frames, pos)  # first range
+            for _ in range(2 * range_count + (3 if frame_type == FRAME_ACK_ECN else 0)):
+                _, pos = read_varint(frames, pos)
+
+        else:
+            # Nothing else useful appears in a client Initial
+            break
+
+    return fragments
+
+
+class CryptoStream:
+    """Reassembles CRYPTO fragments (any order) into the ClientHello"""
+
+    __slots__ = ('_fragments', 'packets')
+
+    def __init__(self):
+        self._fragments: Dict[int, bytes] = {}
+        self.packets = 0
+
+    def add(self, fragments: List[Tuple[int, bytes]]):
+        self.packets += 1
+        for offset, data in fragments:
+            if offset + len(data) <= MAX_CRYPTO_LENGTH:
+                self._fragments[offset] = data
+
+    def client_hello(self) -> Union[ClientHello, _Incomplete, None]:
+        """Parse the contiguous prefix of the stream"""
+        prefix = bytearray()
+        for offset in sorted(self._fragments):
+            data = self._fragments[offset]
+            if offset > len(prefix):
+                break
+            prefix += data[len(prefix) - offset:]
+
+        if not prefix:
+            return INCOMPLETE
+        return parse_handshake(prefix)
@@ -0,0 +1,175 @@
+"""
+TLS Parser for Defensiq Network Security
+Extracts SNI and ECH presence from TLS ClientHello messages
+"""
+
+from typing import Optional, Union
+
+RECORD_HANDSHAKE = 0x16
+HANDSHAKE_CLIENT_HELLO = 0x01
+
+EXTENSION_SERVER_NAME = 0x0000
+EXTENSION_ENCRYPTED_CLIENT_HELLO = 0xFE0D
+SERVER_NAME_HOST = 0x00
+
+# Largest TLS plaintext record body
+MAX_RECORD_LENGTH = 16384
+
+
+class ClientHello:
+    """SNI and ECH presence of a ClientHello"""
+
+    __slots__ = ('sni', 'ech')
+
+    def __init__(self, sni: Optional[str], ech: bool):
+        self.sni = sni
+        self.ech = ech
+
+
+class _Incomplete:
+    """Marker: the ClientHello continues in later segments"""
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return 'INCOMPLETE'
+
+
+INCOMPLETE = _Incomplete()
+
+
+def looks_like_client_hello(data) -> bool:
+    """Cheap check of the first bytes of a flow's first data segment"""
+    return len(data) >= 6 and data[0] == RECORD_HANDSHAKE and data[1] == 0x03 and data[5] == HANDSHAKE_CLIENT_HELLO
+
+
+def parse_client_hello(data) -> Union[ClientHello, _Incomplete, None]:
+    """
+    Parse a ClientHello from the start of a TLS stream (bytes-like)
+    The handshake may span several records; data may end mid-message.
+    Returns: ClientHello, INCOMPLETE if more bytes are needed, or None if
+    the data isn't a ClientHello
+    """
+    data = memoryview(data)
+    if len(data) < 6:
+        return INCOMPLETE if len(data) == 0 or data[0] == RECORD_HANDSHAKE else None
+    if not looks_like_client_hello(data):
+        return None
+
+    # Collect handshake bytes from consecutive handshake records
+    fragments = []
+    handshake_length = None
+    collected = 0
+    pos = 0
+
+    while handshake_length is None or collected < handshake_length:
+        if pos + 5 > len(data):
+            return INCOMPLETE
+        if data[pos] != RECORD_HANDSHAKE:
+            return None
+        record_length = (data[pos + 3] << 8) | data[pos + 4]
+        if record_length == 0 or record_length > MAX_RECORD_LENGTH:
+            return None
+
+        body = data[pos + 5:pos + 5 + record_length]
+        fragments.append(body)
+        collected += len(body)
+
+        if handshake_length is None and collected >= 4:
+            first = fragments[0] if len(fragments[0]) >= 4 else memoryview(b''.join(fragments))
+            handshake_length = 4 + ((first[1] << 16) | (first[2] << 8) | first[3])
+
+        if len(body) < record_length:
+            if handshake_length is None or collected < handshake_length:
+                return INCOMPLETE
+            break
+        pos += 5 + record_length
+
+    hello = fragments[0] if len(fragments) == 1 else memoryview(b''.join(fragments))
+    return parse_handshake(hello)
+
+
+def parse_handshake(data) -> Union[ClientHello, _Incomplete, None]:
+    """
+    Parse a bare ClientHello handshake message (no record layer, as carried
+    in QUIC CRYPTO frames)
+    Returns: ClientHello, INCOMPLETE if more bytes are needed, or None
+    """
+    data = memoryview(data)
+    if len(data) < 4:
+        return INCOMPLETE
+    if data[0] != HANDSHAKE_CLIENT_HELLO:
+        return None
+
+    handshake_length = 4 + ((data[1] << 16) | (data[2] << 8) | data[3])
+    if len(data) < handshake_length:
+        return INCOMPLETE
+    return _parse_hello_body(data[4:handshake_length])
+
+
+def _parse_hello_body(body: memoryview) -> Optional[ClientHello]:
+    """Walk a ClientHello body to its extensions"""
+    size = len(body)
+
+    # client_version (2) + random (32)
+    pos = 34
+    if pos + 1 > size:
+        return None
+
+    # session_id
+    pos += 1 + body[pos]
+    if pos + 2 > size:
+        return None
+
+    # cipher_suites
+    pos += 2 + ((body[pos] << 8) | body[pos + 1])
+    if pos + 1 > size:
+        return None
+
+    # compression_methods
+    pos += 1 + body[pos]
+    if pos + 2 > size:
+        # No extensions at all (SSL 3.0-era hello)
+        return ClientHello(None, False) if pos == size else None
+
+    extensions_end = pos + 2 + ((body[pos] << 8) | body[pos + 1])
+    if extensions_end > size:
+        return None
+    pos += 2
+
+    sni = None
+    ech = False
+    while pos + 4 <= extensions_end:
+        extension_type = (body[pos] << 8) | body[pos + 1]
+        extension_length = (body[pos + 2] << 8) | body[pos + 3]
+        pos += 4
+        if pos + extension_length > extensions_end:
+            return None
+
+        if extension_type == EXTENSION_SERVER_NAME:
+            sni = _server_name(body[pos:pos + extension_length])
+        elif extension_type == EXTENSION_ENCRYPTED_CLIENT_HELLO:
+            ech = True
+        pos += extension_length
+
+    return ClientHello(sni, ech)
+
+
+def _server_name(extension: memoryview) -> Optional[str]:
+    """First host_name entry of a server_name extension"""
+    if len(extension) < 2:
+        return None
+    end = min(len(extension), 2 + ((extension[0] << 8) | extension[1]))
+    pos = 2
+
+    while pos + 3 <= end:
+        name_type = extension[pos]
+        length = (extension[pos + 1] << 8) | extension[pos + 2]
+        pos += 3
+        if pos + length > end:
+            return None
+        if name_type == SERVER_NAME_HOST:
+            return extension[pos:pos + length].tobytes().decode('ascii', errors='replace').lower().rstrip('.')
+        pos += length
+
+    return None
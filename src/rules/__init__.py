@@ -1,4 +1,7 @@
 # Rules package initialization
-from .blocklist_manager import BlocklistManager, BlocklistCategory, get_blocklist_manager
+from .blocklist_manager import BlocklistManager, BlocklistCategory, ImportResult, get_blocklist_manager
+from .compiled_blocklist import CompiledBlocklist
+from .domain_trie import DomainTrie
 
-__all__ = ['BlocklistManager', 'BlocklistCategory', 'get_blocklist_manager']
+__all__ = ['BlocklistManager', 'BlocklistCategory', 'ImportResult', 'get_blocklist_manager',
+           'CompiledBlocklist', 'DomainTrie']
@@ -0,0 +1,250 @@
+"""
+Blocklist Delta for Defensiq Network Security
+Small edit overlay on top of a frozen, published blocklist index
+"""
+
+import socket
+from bisect import bisect_right
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .ip_ranges import IPRangeIndex, parse_ip_entry
+
+# Delta value recording that an entry was removed from the base
+TOMBSTONE = None
+
+_MISSING = object()
+
+
+class DomainOverlay:
+    """
+    Domain lookups against a frozen base index plus an edit delta
+
+    The delta maps domain -> category, or TOMBSTONE for a removed entry.
+    At every suffix the delta takes precedence over the base, so edits are
+    visible without copying the base index.
+    """
+
+    __slots__ = ('_base', '_delta')
+
+    def __init__(self, base, delta: Dict[str, Optional[str]]):
+        """
+        Args:
+            base: Domain index with lookup(domain) (DomainTrie or snapshot)
+            delta: domain -> category / TOMBSTONE (not modified afterwards)
+        """
+        self._base = base
+        self._delta = delta
+
+    def lookup(self, domain: str) -> Optional[Tuple[str, str, bool]]:
+        """
+        Find the longest blocked ancestor of a domain (including itself)
+        Returns: (matched_domain, category, exact) or None
+        """
+        if domain.endswith('.'):
+            domain = domain[:-1]
+
+        delta = self._delta
+        match = self._base.lookup(domain)
+        position = 0
+
+        while True:
+            suffix = domain[position:] if position else domain
+            next_position = domain.find('.', position) + 1
+
+            category = delta.get(suffix, _MISSING)
+            if category is not _MISSING and category is not TOMBSTONE:
+                return (suffix, category, position == 0)
+            if match is not None and match[0] == suffix:
+                if category is not TOMBSTONE:
+                    return (suffix, match[1], position == 0)
+                # Removed from the base: look for a shorter base ancestor
+                match = self._base.lookup(domain[next_position:]) if next_position else None
+
+            if next_position == 0:
+                return None
+            position = next_position
+
+    def __contains__(self, domain: str) -> bool:
+        category = self._delta.get(domain, _MISSING)
+        if category is not _MISSING:
+            return category is not TOMBSTONE
+        return domain in self._base
+
+
+class IPOverlay:
+    """
+    IP lookups against a frozen base index plus an edit delta
+
+    Added entries get their own small IPRangeIndex; the narrower of its
+    match and the base match wins, as in a single index. A base match on
+    an entry the delta removed or recategorized is answered from the shadow
+    index instead, built up front so lookups never scan the base.
+    """
+
+    __slots__ = ('_base', '_delta', '_added', '_shadow')
+
+    def __init__(self, base, delta: Dict[str, Optional[str]],
+                 shadow: Optional[IPRangeIndex] = None):
+        """
+        Args:
+            base: IP index with lookup_packed/networks/ranges (IPRangeIndex or snapshot)
+            delta: entry -> category / TOMBSTONE (not modified afterwards)
+            shadow: build_shadow(base, hidden_entries(base, delta)) to reuse
+        """
+        self._base = base
+        self._delta = delta
+        self._added = IPRangeIndex({
+            entry: category for entry, category in delta.items() if category is not TOMBSTONE
+        })
+        if shadow is None:
+            shadow = build_shadow(base, hidden_entries(base, delta))
+        self._shadow = shadow
+
+    def lookup_packed(self, packed) -> Optional[Tuple[str, str, bool]]:
+        """
+        Look up a packed address (4 or 16 bytes, any bytes-like object)
+        Returns: (matched_entry, category, exact) or None
+        """
+        added = self._added.lookup_packed(packed)
+        base = self._base.lookup_packed(packed)
+        if base is not None and base[0] in self._delta:
+            base = self._shadow.lookup_packed(packed)
+
+        if base is None:
+            return added
+        if added is None:
+            return base
+        return added if _width(added) <= _width(base) else base
+
+    def lookup(self, ip: str) -> Optional[Tuple[str, str, bool]]:
+        """Look up a textual address"""
+        try:
+            family = socket.AF_INET6 if ':' in ip else socket.AF_INET
+            return self.lookup_packed(socket.inet_pton(family, ip.strip()))
+        except (OSError, ValueError):
+            return None
+
+    def ranges(self) -> List[Tuple[int, int, int]]:
+        """Every entry as (version, first_address, last_address)"""
+        hidden = {parse_ip_entry(entry) for entry in self._delta}
+        result = [parsed for parsed in self._base.ranges() if parsed not in hidden]
+        result.extend(self._added.ranges())
+        return result
+
+    def __contains__(self, entry: str) -> bool:
+        category = self._delta.get(entry, _MISSING)
+        if category is not _MISSING:
+            return category is not TOMBSTONE
+        return entry in self._base
+
+    def __len__(self) -> int:
+        return _delta_length(self._base, self._delta)
+
+
+class DeltaView(Mapping):
+    """Read-only entry -> category mapping of a base mapping with a delta applied"""
+
+    def __init__(self, base: Mapping, delta: Dict[str, Optional[str]]):
+        self._base = base
+        self._delta = delta
+        self._length: Optional[int] = None
+
+    def __getitem__(self, key: str) -> str:
+        category = self._delta.get(key, _MISSING)
+        if category is TOMBSTONE:
+            raise KeyError(key)
+        if category is not _MISSING:
+            return category
+        return self._base[key]
+
+    def __contains__(self, key) -> bool:
+        category = self._delta.get(key, _MISSING)
+        if category is not _MISSING:
+            return category is not TOMBSTONE
+        return key in self._base
+
+    def __len__(self) -> int:
+        if self._length is None:
+            self._length = _delta_length(self._base, self._delta)
+        return self._length
+
+    def __iter__(self) -> Iterator[str]:
+        for key, _ in self.items():
+            yield key
+
+    def items(self):
+        """Iterate (entry, category) pairs without per-key lookups"""
+        delta = self._delta
+        for key, category in self._base.items():
+            if key not in delta:
+                yield key, category
+        for key, category in delta.items():
+            if category is not TOMBSTONE:
+                yield key, category
+
+    def values(self):
+        """Iterate categories"""
+        return (category for _, category in self.items())
+
+
+class _IntervalUnion:
+    """Union of (version, start, end) intervals with an overlap test"""
+
+    def __init__(self, intervals):
+        self._starts = {4: [], 6: []}
+        self._ends = {4: [], 6: []}
+        for version, start, end in sorted(iv for iv in intervals if iv is not None):
+            starts, ends = self._starts[version], self._ends[version]
+            if ends and start <= ends[-1] + 1:
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
+
+    def overlaps(self, interval) -> bool:
+        if interval is None:
+            return False
+        version, start, end = interval
+        i = bisect_right(self._starts[version], end) - 1
+        return i >= 0 and self._ends[version][i] >= start
+
+
+def hidden_entries(base, delta: Dict[str, Optional[str]]) -> frozenset:
+    """Base entries the delta removes or recategorizes"""
+    return frozenset(entry for entry in delta if entry in base)
+
+
+def build_shadow(base, hidden: frozenset) -> IPRangeIndex:
+    """
+    Base networks (other than hidden ones) overlapping a hidden entry
+    When the narrowest base match is hidden, the next narrowest base match
+    is one of these: a base host only ever covers its own address.
+    """
+    if not hidden:
+        return IPRangeIndex()
+    union = _IntervalUnion(parse_ip_entry(entry) for entry in hidden)
+    return IPRangeIndex({
+        entry: category for entry, category, parsed in base.networks()
+        if entry not in hidden and union.overlaps(parsed)
+    })
+
+
+def _width(match: Tuple[str, str, bool]) -> int:
+    """Number of addresses an IP match covers (narrower entries win)"""
+    if match[2]:
+        return 1
+    parsed = parse_ip_entry(match[0])
+    return parsed[2] - parsed[1] + 1 if parsed is not None else 1
+
+
+def _delta_length(base, delta: Dict[str, Optional[str]]) -> int:
+    """Entry count of base with delta applied"""
+    length = len(base)
+    for key, category in delta.items():
+        present = key in base
+        if category is TOMBSTONE:
+            length -= present
+        else:
+            length += not present
+    return length
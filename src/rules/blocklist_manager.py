@@ -4,11 +4,37 @@ Manages domain/IP blocking rules with categorization
 """
 
 import json
+import os
 import re
+import hashlib
+import threading
+import time
 from pathlib import Path
-from typing import List, Dict, Set, Any
+from typing import List, Dict, Set, Any, Iterable, Mapping, Optional, Tuple
+from dataclasses import dataclass
 from enum import Enum
 
+from core.file_lock import FileLock, fsync_directory
+from core.file_watcher import get_file_watcher
+from .domain_trie import DomainTrie
+from .pattern_matcher import PatternMatcher
+from .ip_ranges import IPRangeIndex, normalize_ip_entry, parse_ip_entry
+from .blocklist_parser import iter_blocklist_file
+from .blocklist_snapshot import BlocklistSnapshot
+from .blocklist_delta import (
+    TOMBSTONE, DeltaView, DomainOverlay, IPOverlay, build_shadow, hidden_entries
+)
+from .compiled_blocklist import CompiledBlocklist
+
+# Journal size past which it is folded back into blocklist.json
+JOURNAL_COMPACT_BYTES = 1024 * 1024
+
+# Edits arriving within this window are published as one generation
+PUBLISH_DELAY = 0.05
+
+# Delta size past which it is merged into a new base index
+DELTA_MERGE_ENTRIES = 1024
+
 class BlocklistCategory(Enum):
     """Blocklist categories"""
     MALWARE = "malware"
@@ -18,234 +44,813 @@ class BlocklistCategory(Enum):
     ADULT = "adult"
     CUSTOM = "custom"
 
+@dataclass
+class ImportResult:
+    """Outcome of a bulk blocklist import"""
+    added: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+
 class BlocklistManager:
     """Manages domain and IP blocklists with categorization"""
     
-    def __init__(self, blocklist_dir: str = 'config'):
-        """Initialize blocklist manager"""
+    def __init__(self, blocklist_dir: str = 'config', watch: bool = True):
+        """
+        Initialize blocklist manager
+        Args:
+            blocklist_dir: Directory holding blocklist.json and its journal
+            watch: Pick up edits another process (service / GUI) makes to them
+        """
         self.blocklist_dir = Path(blocklist_dir)
         self.blocklist_dir.mkdir(exist_ok=True)
         
         self.blocklist_file = self.blocklist_dir / 'blocklist.json'
+        self.snapshot_file = self.blocklist_dir / 'blocklist.snapshot'
+        self.journal_file = self.blocklist_dir / 'blocklist.journal'
+        
+        # _lock guards in-memory state; _journal_lock serializes journal
+        # appends and compaction with other processes; _save_lock orders
+        # full rewrites; _merge_lock lets one new base be built at a time.
+        # Lock order: _save_lock -> _journal_lock -> _merge_lock -> _lock;
+        # never take an earlier one while holding a later one (only _lock
+        # is reentrant). load_blocklist(compact=False) takes only _lock and
+        # never saves, so any lock holder may call it.
+        self._lock = threading.RLock()
+        self._journal_lock = FileLock(self.blocklist_dir / 'blocklist.lock')
+        self._save_lock = threading.Lock()
+        self._merge_lock = threading.Lock()
+        self._compact_thread: Optional[threading.Thread] = None
+        self._publish_thread: Optional[threading.Thread] = None
+        self._merge_thread: Optional[threading.Thread] = None
+        
+        # Base blocklist as last loaded or merged; never modified once built.
+        # Parsed from JSON on first listing when the snapshot serves lookups.
+        self._blocked_domains: Optional[DomainTrie] = DomainTrie()  # domain -> category
+        self._blocked_ips: Optional[Dict[str, str]] = {}  # ip/cidr/range -> category
+        self.ip_index: Optional[IPRangeIndex] = IPRangeIndex()
+        self.snapshot: Optional[BlocklistSnapshot] = None
+        self._blocked_patterns: List[tuple] = []  # (regex, category)
+        self.pattern_matcher = PatternMatcher(self._blocked_patterns)
+        
+        # Indexes lookups run against (the base structures or the snapshot)
+        # and the edits made since: entry -> category, TOMBSTONE if removed
+        self._base_domains = self._blocked_domains
+        self._base_ips = self.ip_index
+        self._domain_delta: Dict[str, Optional[str]] = {}
+        self._ip_delta: Dict[str, Optional[str]] = {}
+        # Set once readers hold the delta dicts (published or viewed): they
+        # are shared, not copied, so the next edit copies them first
+        self._delta_shared = False
+        # (ip base, hidden entries, shadow index) reused while both match
+        self._shadow_cache: Optional[tuple] = None
+        
+        # Published generation used for lookups (base plus a delta overlay)
+        self.generation = 0
+        self.current = CompiledBlocklist(0, self._base_domains, self._base_ips, self.pattern_matcher)
+        self._pending_since: Optional[float] = None
         
-        # In-memory blocklist for fast lookups
-        self.blocked_domains: Dict[str, str] = {}  # domain -> category
-        self.blocked_ips: Dict[str, str] = {}  # ip -> category
-        self.blocked_patterns: List[tuple] = []  # (regex, category)
+        # Bytes of the journal applied in memory (later ones came from elsewhere)
+        # and the blocklist.json they apply to, as (inode, mtime, size)
+        self._journal_offset = 0
+        self._blocklist_stamp: Optional[tuple] = None
+        self.watcher = get_file_watcher() if watch else None
         
-        # Load existing blocklist
-        self.load_blocklist()
+        # Load existing blocklist (first run: create an empty one)
+        if self.load_blocklist() is None:
+            self.save_blocklist({'domains': [], 'ips': [], 'patterns': []})
+        
+        if self.watcher is not None:
+            self.watcher.watch(self.blocklist_file, self._on_blocklist_changed)
+            # Own appends too: one can hide another process's entry written just before it
+            self.watcher.watch(self.journal_file, self._on_journal_changed, self_writes=True)
+    
+    @property
+    def blocked_domains(self) -> Mapping[str, str]:
+        self._ensure_loaded()
+        with self._lock:
+            if not self._domain_delta:
+                return self._blocked_domains
+            self._delta_shared = True
+            return DeltaView(self._blocked_domains, self._domain_delta)
+    
+    @blocked_domains.setter
+    def blocked_domains(self, value: DomainTrie):
+        self._blocked_domains = value
+    
+    @property
+    def blocked_ips(self) -> Mapping[str, str]:
+        self._ensure_loaded()
+        with self._lock:
+            if not self._ip_delta:
+                return self._blocked_ips
+            self._delta_shared = True
+            return DeltaView(self._blocked_ips, self._ip_delta)
+    
+    @blocked_ips.setter
+    def blocked_ips(self, value: Dict[str, str]):
+        self._blocked_ips = value
     
-    def load_blocklist(self) -> bool:
-        """Load blocklist from file"""
+    @property
+    def blocked_patterns(self) -> List[tuple]:
+        return self._blocked_patterns
+    
+    @blocked_patterns.setter
+    def blocked_patterns(self, value: List[tuple]):
+        self._blocked_patterns = value
+    
+    def load_blocklist(self, compact: bool = True) -> Optional[bool]:
+        """
+        Load blocklist from file (via compiled snapshot when up to date)
+        Never saves: callers holding locks may use it (see the lock order).
+        Args:
+            compact: Repair a torn journal tail and fold leftover entries into
+                     blocklist.json on a background thread (startup; not when
+                     another process owns them)
+        Returns: True if loaded, False on error, None if blocklist.json does
+                 not exist (the current generation is kept; the caller may
+                 create the file with save_blocklist once it holds no locks)
+        """
         if not self.blocklist_file.exists():
-            # Create default blocklist with examples
-            default_blocklist = {
-                'domains': [],
-                'ips': [],
-                'patterns': []
-            }
-            self.save_blocklist(default_blocklist)
-            return True
+            return None
         
         try:
-            with open(self.blocklist_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Load domains
-            self.blocked_domains = {}
-            for entry in data.get('domains', []):
-                domain = entry.get('value', '').lower()
-                category = entry.get('category', BlocklistCategory.CUSTOM.value)
-                self.blocked_domains[domain] = category
-            
-            # Load IPs
-            self.blocked_ips = {}
-            for entry in data.get('ips', []):
-                ip = entry.get('value', '')
-                category = entry.get('category', BlocklistCategory.CUSTOM.value)
-                self.blocked_ips[ip] = category
+            with open(self.blocklist_file, 'rb') as f:
+                raw = f.read()
+                self._blocklist_stamp = self._file_stamp(os.fstat(f.fileno()))
+            checksum = hashlib.sha256(raw).hexdigest()
             
-            # Load patterns (regex)
-            self.blocked_patterns = []
-            for entry in data.get('patterns', []):
-                pattern = entry.get('value', '')
-                category = entry.get('category', BlocklistCategory.CUSTOM.value)
+            # Serve lookups straight from the mapped snapshot if it matches
+            snapshot = BlocklistSnapshot.load(self.snapshot_file, checksum)
+            if snapshot is not None:
                 try:
-                    compiled_pattern = re.compile(pattern, re.IGNORECASE)
-                    self.blocked_patterns.append((compiled_pattern, category))
-                except re.error:
-                    print(f"[WARNING] Invalid regex pattern: {pattern}")
+                    self._use_snapshot(snapshot)
+                except Exception as e:
+                    # Never fail open: a bad snapshot just means parsing JSON
+                    print(f"[WARNING] Blocklist snapshot unusable, loading JSON: {e}")
+                    snapshot.close()
+                    snapshot = None
+            if snapshot is None:
+                data = json.loads(raw)
+                self._apply_data(data)
+                self._write_snapshot(data, checksum)
             
+            # Re-apply mutations that hadn't been compacted yet
+            if self._replay_journal(repair=compact):
+                self.publish_pending()
+                if compact:
+                    self.compact_async()
             return True
         
         except Exception as e:
             print(f"[ERROR] Failed to load blocklist: {e}")
             return False
     
+    def _apply_data(self, data: Dict[str, Any], publish: bool = True):
+        """
+        Build in-memory blocklist and indexes from blocklist.json data
+        Without publish only the listing behind a serving snapshot is filled in.
+        """
+        # Load domains
+        blocked_domains = DomainTrie()
+        for entry in data.get('domains', []):
+            domain = self._normalize_domain(entry.get('value', ''))
+            category = entry.get('category', BlocklistCategory.CUSTOM.value)
+            if domain:
+                blocked_domains[domain] = category
+        
+        # Load IPs
+        blocked_ips = {}
+        for entry in data.get('ips', []):
+            ip = entry.get('value', '')
+            category = entry.get('category', BlocklistCategory.CUSTOM.value)
+            blocked_ips[normalize_ip_entry(ip) or ip] = category
+        ip_index = IPRangeIndex(blocked_ips)
+        
+        if not publish:
+            with self._lock:
+                self._blocked_domains = blocked_domains
+                self._blocked_ips = blocked_ips
+                self.ip_index = ip_index
+            return
+        
+        # Load patterns (regex)
+        blocked_patterns = []
+        for entry in data.get('patterns', []):
+            pattern = entry.get('value', '')
+            category = entry.get('category', BlocklistCategory.CUSTOM.value)
+            try:
+                compiled_pattern = re.compile(pattern, re.IGNORECASE)
+                blocked_patterns.append((compiled_pattern, category))
+            except re.error:
+                print(f"[WARNING] Invalid regex pattern: {pattern}")
+        
+        with self._lock:
+            self._blocked_patterns = blocked_patterns
+            self.pattern_matcher = PatternMatcher(blocked_patterns)
+            # The snapshot stays mapped until no generation references it
+            self.snapshot = None
+            self._set_base(blocked_domains, blocked_ips, ip_index)
+            self._publish()
+    
+    def _use_snapshot(self, snapshot: BlocklistSnapshot):
+        """Serve lookups from a mapped snapshot, deferring the JSON parse"""
+        patterns = snapshot.compiled_patterns()
+        
+        with self._lock:
+            self.snapshot = snapshot
+            self._blocked_domains = None
+            self._blocked_ips = None
+            self.ip_index = None
+            self._blocked_patterns = patterns
+            self.pattern_matcher = PatternMatcher(patterns)
+            
+            self._base_domains = snapshot.domains
+            self._base_ips = snapshot.ips
+            self._domain_delta = {}
+            self._ip_delta = {}
+            self._delta_shared = False
+            self._publish()
+    
+    def _set_base(self, domains: DomainTrie, ips: Dict[str, str], ip_index: IPRangeIndex):
+        """Make freshly built structures the base and drop the delta (holding _lock)"""
+        self._blocked_domains = domains
+        self._blocked_ips = ips
+        self.ip_index = ip_index
+        self._base_domains = domains
+        self._base_ips = ip_index
+        self._domain_delta = {}
+        self._ip_delta = {}
+        self._delta_shared = False
+    
+    def _ensure_loaded(self):
+        """Parse blocklist.json into memory before listing the snapshot's entries"""
+        if self._blocked_domains is not None:
+            return
+        
+        # Same content as the snapshot base, so nothing to publish
+        with open(self.blocklist_file, 'r', encoding='utf-8') as f:
+            self._apply_data(json.load(f), publish=False)
+    
+    def _publish(self):
+        """Swap in a new generation of base plus delta (single reference assignment)"""
+        now = time.perf_counter()
+        latency = now - self._pending_since if self._pending_since is not None else 0.0
+        self._pending_since = None
+        
+        domains = self._base_domains
+        if self._domain_delta:
+            domains = DomainOverlay(domains, self._domain_delta)
+            self._delta_shared = True
+        ips = self._base_ips
+        if self._ip_delta:
+            ips = IPOverlay(ips, self._ip_delta, self._shadow_for(ips, self._ip_delta))
+            self._delta_shared = True
+        
+        self.generation += 1
+        self.current = CompiledBlocklist(self.generation, domains, ips, self.pattern_matcher,
+                                         self.snapshot, latency)
+    
+    def _shadow_for(self, base, delta: Dict[str, Optional[str]]) -> IPRangeIndex:
+        """
+        Shadow index for an IP overlay, built here before the swap (never on
+        a lookup) and reused until the base or the hidden entries change
+        """
+        hidden = hidden_entries(base, delta)
+        cached = self._shadow_cache
+        if cached is None or cached[0] is not base or cached[1] != hidden:
+            cached = (base, hidden, build_shadow(base, hidden))
+            self._shadow_cache = cached
+        return cached[2]
+    
+    def _unshare_delta(self):
+        """Copy the delta dicts before editing them if readers hold them (holding _lock)"""
+        if self._delta_shared:
+            self._domain_delta = dict(self._domain_delta)
+            self._ip_delta = dict(self._ip_delta)
+            self._delta_shared = False
+    
+    def publish_pending(self):
+        """Publish outstanding edits now instead of after PUBLISH_DELAY"""
+        with self._lock:
+            if self._pending_since is not None:
+                self._publish()
+    
+    def _schedule_publish(self):
+        """Publish edits on the publisher thread once they settle"""
+        if self._pending_since is None:
+            self._pending_since = time.perf_counter()
+        
+        if self._publish_thread is None:
+            self._publish_thread = threading.Thread(target=self._publish_loop, daemon=True)
+            self._publish_thread.start()
+        
+        if len(self._domain_delta) + len(self._ip_delta) > DELTA_MERGE_ENTRIES:
+            self.merge_async()
+    
+    def _publish_loop(self):
+        """Publisher thread: coalesce edits, then swap generations"""
+        while True:
+            time.sleep(PUBLISH_DELAY)
+            with self._lock:
+                if self._pending_since is None:
+                    self._publish_thread = None
+                    return
+                self._publish()
+    
+    def merge_async(self):
+        """Fold the delta into a new base index on a background thread"""
+        if self._merge_thread is not None and self._merge_thread.is_alive():
+            return
+        
+        self._merge_thread = threading.Thread(target=self._merge_delta, daemon=True)
+        self._merge_thread.start()
+    
+    def _merge_delta(self, domain_batch: Dict[str, str] = None,
+                     ip_batch: Dict[str, str] = None) -> bool:
+        """
+        Build a new base from base plus delta (plus an imported batch), off
+        the edit path, and publish it as a new generation
+        Returns: False if the base was reloaded or cleared meanwhile
+        """
+        self._ensure_loaded()
+        with self._merge_lock:
+            with self._lock:
+                domains, ips, ip_index = self._blocked_domains, self._blocked_ips, self.ip_index
+                domain_delta = self._domain_delta
+                ip_delta = self._ip_delta
+                self._delta_shared = True
+            if domains is None:
+                return False
+            
+            merged_domains = domains.copy()
+            for domain, category in domain_delta.items():
+                if category is TOMBSTONE:
+                    merged_domains.pop(domain, None)
+                else:
+                    merged_domains[domain] = category
+            
+            merged_ips = dict(ips)
+            merged_index = ip_index.copy()
+            for ip, category in ip_delta.items():
+                if category is TOMBSTONE:
+                    if merged_ips.pop(ip, None) is not None:
+                        merged_index.remove(ip)
+                else:
+                    merged_ips[ip] = category
+                    merged_index.add(ip, category)
+            
+            if domain_batch:
+                for domain, category in domain_batch.items():
+                    merged_domains[domain] = category
+            if ip_batch:
+                # Rebuild the interval tables once rather than per network
+                for ip, category in ip_batch.items():
+                    merged_ips[ip] = category
+                    merged_index.add(ip, category, rebuild=False)
+                if any('/' in ip or '-' in ip for ip in ip_batch):
+                    merged_index.rebuild()
+            
+            with self._lock:
+                if self._blocked_domains is not domains or self._blocked_ips is not ips:
+                    return False  # reloaded or cleared while merging
+                
+                # Keep only the edits made while merging
+                domain_delta = {
+                    key: category for key, category in self._domain_delta.items()
+                    if key not in domain_delta or domain_delta[key] != category
+                }
+                ip_delta = {
+                    key: category for key, category in self._ip_delta.items()
+                    if key not in ip_delta or ip_delta[key] != category
+                }
+                self.snapshot = None
+                self._set_base(merged_domains, merged_ips, merged_index)
+                self._domain_delta = domain_delta
+                self._ip_delta = ip_delta
+                self._publish()
+                return True
+    
+    def _write_snapshot(self, data: Dict[str, Any], checksum: str):
+        """Compile data into the snapshot file for the next start"""
+        try:
+            BlocklistSnapshot.write(self.snapshot_file, data, checksum)
+        except Exception as e:
+            # Lookups still work from JSON; the next load just reparses it
+            print(f"[WARNING] Failed to write blocklist snapshot: {e}")
+    
     def save_blocklist(self, data: Dict[str, Any] = None) -> bool:
-        """Save blocklist to file"""
-        if data is None:
-            # Convert current in-memory blocklist to saveable format
-            data = {
-                'domains': [
-                    {'value': domain, 'category': category}
-                    for domain, category in self.blocked_domains.items()
-                ],
-                'ips': [
-                    {'value': ip, 'category': category}
-                    for ip, category in self.blocked_ips.items()
-                ],
-                'patterns': [
-                    {'value': pattern.pattern, 'category': category}
-                    for pattern, category in self.blocked_patterns
-                ]
-            }
+        """
+        Save full blocklist to file (and refresh its compiled snapshot)
+        Journal entries included in the written data are removed afterwards.
+        Holds the journal lock throughout, so no process appends or compacts
+        between reading the journal offset and truncating the journal.
+        """
+        with self._save_lock, self._journal_lock:
+            if data is None:
+                self._catch_up()
+            return self._write_blocklist(data)
+    
+    def _write_blocklist(self, data: Dict[str, Any] = None) -> bool:
+        """Write blocklist.json, snapshot and journal (holding _save_lock and _journal_lock)"""
+        with self._lock:
+            # Only entries applied in memory are in the data; another
+            # process's entries the watcher hasn't replayed yet stay
+            journal_offset = self._journal_offset if data is None else 0
+            if data is None:
+                data = self._serialize()
         
         try:
-            with open(self.blocklist_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2)
-            return True
+            raw = json.dumps(data, indent=2).encode('utf-8')
+            temp_file = self.blocklist_file.with_name(self.blocklist_file.name + '.tmp')
+            with open(temp_file, 'wb') as f:
+                f.write(raw)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.blocklist_file)
+            fsync_directory(self.blocklist_dir)
+            self._blocklist_stamp = self._file_stamp(self.blocklist_file.stat())
+            if self.watcher is not None:
+                self.watcher.note_write(self.blocklist_file)
         
         except Exception as e:
             print(f"[ERROR] Failed to save blocklist: {e}")
             return False
+        
+        self._write_snapshot(data, hashlib.sha256(raw).hexdigest())
+        self._truncate_journal(journal_offset)
+        return True
+    
+    def compact_async(self):
+        """Fold the journal into blocklist.json on a background thread"""
+        if self._compact_thread is not None and self._compact_thread.is_alive():
+            return
+        
+        self._compact_thread = threading.Thread(target=self.save_blocklist, daemon=True)
+        self._compact_thread.start()
+    
+    def _serialize(self) -> Dict[str, Any]:
+        """Convert current in-memory blocklist to saveable format"""
+        return {
+            'domains': [
+                {'value': domain, 'category': category}
+                for domain, category in self.blocked_domains.items()
+            ],
+            'ips': [
+                {'value': ip, 'category': category}
+                for ip, category in self.blocked_ips.items()
+            ],
+            'patterns': [
+                {'value': pattern.pattern, 'category': category}
+                for pattern, category in self.blocked_patterns
+            ]
+        }
+    
+    def _journal(self, op: str, value: str, category: str = None) -> bool:
+        """Append one mutation to the journal (constant cost, fsynced)"""
+        entry = {'op': op, 'value': value}
+        if category is not None:
+            entry['category'] = category
+        
+        try:
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                start = f.tell()
+                f.write(json.dumps(entry) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+                size = f.tell()
+        
+        except Exception as e:
+            print(f"[ERROR] Failed to write blocklist journal: {e}")
+            return False
+        
+        # Entries another process appended first are applied by the watcher
+        if start == self._journal_offset:
+            self._journal_offset = size
+        if self.watcher is not None:
+            self.watcher.note_write(self.journal_file)
+        
+        if size > JOURNAL_COMPACT_BYTES:
+            self.compact_async()
+        return True
+    
+    @staticmethod
+    def _file_stamp(stat: os.stat_result) -> tuple:
+        """Identity of one version of a file (changes when it is replaced)"""
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    
+    def _catch_up(self):
+        """
+        Apply what other processes persisted before compacting (holding _journal_lock)
+        Another process's compaction rewrites blocklist.json first, so an
+        unchanged file means the journal offset is still valid.
+        """
+        try:
+            stamp = self._file_stamp(self.blocklist_file.stat())
+        except OSError:
+            return
+        
+        if stamp != self._blocklist_stamp:
+            self.load_blocklist(compact=False)
+        else:
+            with self._lock:
+                if self._replay_journal(self._journal_offset, repair=False):
+                    self.publish_pending()
+    
+    def _truncate_journal(self, offset: int):
+        """
+        Drop the first offset bytes of the journal (already persisted)
+        Caller holds _journal_lock, so nothing is appended meanwhile.
+        """
+        if offset == 0:
+            return
+        
+        with self._lock:
+            try:
+                with open(self.journal_file, 'rb') as f:
+                    f.seek(offset)
+                    remaining = f.read()
+                
+                if not remaining:
+                    self.journal_file.unlink()
+                else:
+                    temp_file = self.journal_file.with_name(self.journal_file.name + '.tmp')
+                    with open(temp_file, 'wb') as f:
+                        f.write(remaining)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(temp_file, self.journal_file)
+                fsync_directory(self.blocklist_dir)
+                
+                self._journal_offset = max(0, self._journal_offset - offset)
+                if self.watcher is not None:
+                    self.watcher.note_write(self.journal_file)
+            
+            except OSError as e:
+                # Replaying persisted entries is harmless, just slower
+                print(f"[WARNING] Failed to truncate blocklist journal: {e}")
+    
+    def _replay_journal(self, offset: int = 0, repair: bool = True) -> int:
+        """
+        Apply journaled mutations on top of the loaded blocklist
+        A torn final line from a crash mid-append is skipped.
+        Args:
+            offset: Replay entries from this byte offset (0 if the journal shrank)
+            repair: Truncate a torn tail (only safe when no other process appends)
+        Returns: Number of entries replayed
+        """
+        if not self.journal_file.exists():
+            self._journal_offset = 0
+            return 0
+        
+        with open(self.journal_file, 'rb') as f:
+            raw = f.read()
+        if offset > len(raw):
+            offset = 0
+        
+        # Cut a torn tail so the next append starts on a fresh line
+        complete = raw.rfind(b'\n') + 1
+        if repair and complete < len(raw):
+            with self._journal_lock, open(self.journal_file, 'r+b') as f:
+                # Unless another process appended (completing the line) meanwhile
+                if os.fstat(f.fileno()).st_size == len(raw):
+                    f.truncate(complete)
+        
+        entries = []
+        for line in raw[offset:complete].splitlines():
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+        
+        with self._lock:
+            for entry in entries:
+                self._apply_op(entry.get('op'), entry.get('value', ''), entry.get('category'))
+            self._journal_offset = max(complete, offset)
+        
+        return len(entries)
+    
+    def _on_blocklist_changed(self, path: Path, external: bool):
+        """
+        File watcher: another process rewrote blocklist.json
+        Takes only _journal_lock (blocklist.json and the journal are read as
+        one pair) and never saves; a missing file keeps the current generation.
+        """
+        with self._journal_lock:
+            loaded = self.load_blocklist(compact=False)
+        if loaded:
+            print("[INFO] Blocklist reloaded after external change")
+        elif loaded is None:
+            print("[WARNING] Blocklist file missing, keeping the current blocklist")
+    
+    def _on_journal_changed(self, path: Path, external: bool):
+        """
+        File watcher: the journal changed - apply entries past the applied offset
+        Checked for every change, whether or not it was classed as our own write.
+        """
+        try:
+            size = self.journal_file.stat().st_size
+        except OSError:
+            size = 0
+        
+        with self._lock:
+            if size == self._journal_offset:
+                return
+            replayed = self._replay_journal(self._journal_offset, repair=False)
+        if replayed:
+            self.publish_pending()
+    
+    def _apply_op(self, op: str, value: str, category: str = None) -> bool:
+        """
+        Apply one mutation to the in-memory blocklist
+        Domain and IP edits only touch the delta; the base stays shared with
+        published generations. Ops are idempotent so replaying
+        already-persisted entries is safe.
+        Returns: True if the blocklist changed
+        """
+        if op == 'add_domain':
+            self._unshare_delta()
+            self._domain_delta[value] = category
+        
+        elif op == 'remove_domain':
+            if not self._contains(self._domain_delta, self._base_domains, value):
+                return False
+            self._unshare_delta()
+            self._domain_delta[value] = TOMBSTONE
+        
+        elif op == 'add_ip':
+            self._unshare_delta()
+            self._ip_delta[value] = category
+        
+        elif op == 'remove_ip':
+            if not self._contains(self._ip_delta, self._base_ips, value):
+                return False
+            self._unshare_delta()
+            self._ip_delta[value] = TOMBSTONE
+        
+        elif op == 'add_pattern':
+            if any(p.pattern == value and c == category for p, c in self._blocked_patterns):
+                return False
+            self._blocked_patterns.append((re.compile(value, re.IGNORECASE), category))
+            self.pattern_matcher = PatternMatcher(self._blocked_patterns)
+        
+        elif op == 'clear_category':
+            blocked_domains = DomainTrie({d: c for d, c in self.blocked_domains.items() if c != value})
+            blocked_ips = {i: c for i, c in self.blocked_ips.items() if c != value}
+            self.snapshot = None
+            self._set_base(blocked_domains, blocked_ips, IPRangeIndex(blocked_ips))
+            self._blocked_patterns = [(p, c) for p, c in self._blocked_patterns if c != value]
+            self.pattern_matcher = PatternMatcher(self._blocked_patterns)
+        
+        else:
+            return False
+        
+        self._schedule_publish()
+        return True
+    
+    @staticmethod
+    def _contains(delta: Dict[str, Optional[str]], base, key: str) -> bool:
+        """Whether key is blocked once delta is applied to base"""
+        if key in delta:
+            return delta[key] is not TOMBSTONE
+        return key in base
     
     def add_domain(self, domain: str, category: str = BlocklistCategory.CUSTOM.value) -> bool:
         """Add domain to blocklist"""
-        domain = domain.lower().strip()
+        domain = self._normalize_domain(domain)
         
-        # Basic validation
-        if not domain or '/' in domain:
+        if domain is None:
             return False
         
-        self.blocked_domains[domain] = category
-        return self.save_blocklist()
+        with self._journal_lock, self._lock:
+            self._apply_op('add_domain', domain, category)
+            return self._journal('add_domain', domain, category)
     
     def add_ip(self, ip: str, category: str = BlocklistCategory.CUSTOM.value) -> bool:
-        """Add IP address to blocklist"""
-        ip = ip.strip()
+        """Add IP address, CIDR or range to blocklist"""
+        ip = normalize_ip_entry(ip)
         
-        # Basic IP validation (simple check)
-        if not self._is_valid_ip(ip):
+        if ip is None:
             return False
         
-        self.blocked_ips[ip] = category
-        return self.save_blocklist()
+        with self._journal_lock, self._lock:
+            self._apply_op('add_ip', ip, category)
+            return self._journal('add_ip', ip, category)
     
     def add_pattern(self, pattern: str, category: str = BlocklistCategory.CUSTOM.value) -> bool:
         """Add regex pattern to blocklist"""
         try:
-            compiled_pattern = re.compile(pattern, re.IGNORECASE)
-            self.blocked_patterns.append((compiled_pattern, category))
-            return self.save_blocklist()
+            re.compile(pattern, re.IGNORECASE)
         except re.error:
             return False
+        
+        with self._journal_lock, self._lock:
+            if not self._apply_op('add_pattern', pattern, category):
+                return True
+            return self._journal('add_pattern', pattern, category)
     
     def remove_domain(self, domain: str) -> bool:
         """Remove domain from blocklist"""
-        domain = domain.lower().strip()
-        if domain in self.blocked_domains:
-            del self.blocked_domains[domain]
-            return self.save_blocklist()
+        domain = self._normalize_domain(domain)
+        
+        if domain is None:
+            return False
+        
+        with self._journal_lock, self._lock:
+            if self._apply_op('remove_domain', domain):
+                return self._journal('remove_domain', domain)
         return False
     
     def remove_ip(self, ip: str) -> bool:
         """Remove IP from blocklist"""
-        ip = ip.strip()
-        if ip in self.blocked_ips:
-            del self.blocked_ips[ip]
-            return self.save_blocklist()
+        ip = normalize_ip_entry(ip) or ip.strip()
+        with self._journal_lock, self._lock:
+            if self._apply_op('remove_ip', ip):
+                return self._journal('remove_ip', ip)
         return False
     
     def is_domain_blocked(self, domain: str) -> tuple:
         """
-        Check if domain is blocked
+        Check if domain is blocked (against the published generation)
         Returns: (is_blocked, category, reason)
         """
-        domain = domain.lower().strip()
-        
-        # Exact match
-        if domain in self.blocked_domains:
-            return (True, self.blocked_domains[domain], "Exact match")
-        
-        # Subdomain match (e.g., block all *.example.com)
-        parts = domain.split('.')
-        for i in range(len(parts)):
-            parent_domain = '.'.join(parts[i:])
-            if parent_domain in self.blocked_domains:
-                return (True, self.blocked_domains[parent_domain], f"Parent domain match: {parent_domain}")
-        
-        # Pattern match
-        for pattern, category in self.blocked_patterns:
-            if pattern.search(domain):
-                return (True, category, f"Pattern match: {pattern.pattern}")
-        
-        return (False, None, None)
+        return self.current.is_domain_blocked(domain)
     
     def is_ip_blocked(self, ip: str) -> tuple:
         """
         Check if IP is blocked
         Returns: (is_blocked, category, reason)
         """
-        ip = ip.strip()
-        
-        if ip in self.blocked_ips:
-            return (True, self.blocked_ips[ip], "Exact match")
-        
-        return (False, None, None)
+        return self.current.is_ip_blocked(ip)
+    
+    def is_packed_ip_blocked(self, packed) -> tuple:
+        """
+        Check if a packed (4 or 16 byte) address is blocked
+        Returns: (is_blocked, category, reason)
+        """
+        return self.current.is_packed_ip_blocked(packed)
     
-    def import_from_file(self, file_path: str, category: str = BlocklistCategory.CUSTOM.value) -> int:
+    def import_from_file(self, file_path: str, category: str = BlocklistCategory.CUSTOM.value) -> ImportResult:
         """
-        Import blocklist from file (TXT or JSON)
-        Returns: Number of entries imported
+        Import blocklist from file (TXT, hosts-file, adblock or JSON)
+        Returns: ImportResult with added/duplicate/invalid counts
         """
         file_path = Path(file_path)
         
         if not file_path.exists():
-            return 0
-        
-        count = 0
+            return ImportResult()
         
         try:
-            if file_path.suffix.lower() == '.json':
-                # Import JSON
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                for entry in data.get('domains', []):
-                    if self.add_domain(entry.get('value', ''), 
-                                      entry.get('category', category)):
-                        count += 1
-                
-                for entry in data.get('ips', []):
-                    if self.add_ip(entry.get('value', ''), 
-                                  entry.get('category', category)):
-                        count += 1
-            
-            else:
-                # Import TXT (one entry per line)
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        line = line.strip()
-                        
-                        # Skip comments and empty lines
-                        if not line or line.startswith('#'):
-                            continue
-                        
-                        # Try to detect if it's an IP or domain
-                        if self._is_valid_ip(line):
-                            if self.add_ip(line, category):
-                                count += 1
-                        else:
-                            if self.add_domain(line, category):
-                                count += 1
-            
-            return count
+            return self.bulk_import(iter_blocklist_file(file_path, category))
         
         except Exception as e:
             print(f"[ERROR] Failed to import blocklist: {e}")
-            return count
+            return ImportResult()
+    
+    def bulk_import(self, entries: Iterable[Tuple[str, str]]) -> ImportResult:
+        """
+        Validate, dedupe and apply many (value, category) entries at once
+        Values may be domains, IPs, CIDRs or ranges. The blocklist is only
+        modified after the whole batch is parsed, and saved a single time.
+        """
+        result = ImportResult()
+        new_domains: Dict[str, str] = {}
+        new_ips: Dict[str, str] = {}
+        
+        for value, category in entries:
+            ip = normalize_ip_entry(value) if value else None
+            if ip is not None:
+                if ip in new_ips or self._contains(self._ip_delta, self._base_ips, ip):
+                    result.duplicates += 1
+                else:
+                    new_ips[ip] = category
+                continue
+            
+            domain = self._normalize_domain(value)
+            if domain is None:
+                result.invalid += 1
+            elif domain in new_domains or self._contains(self._domain_delta, self._base_domains, domain):
+                result.duplicates += 1
+            else:
+                new_domains[domain] = category
+        
+        result.added = len(new_domains) + len(new_ips)
+        if not result.added:
+            return result
+        
+        # One full rewrite instead of journaling every entry; catch up first
+        # so a reload can't discard the batch before it is written. The
+        # batch goes into a new base built outside _lock, not the edit delta.
+        with self._save_lock, self._journal_lock:
+            self._catch_up()
+            if not self._merge_delta(new_domains, new_ips):
+                # Base still being parsed or swapped: apply as edits instead
+                with self._lock:
+                    self._unshare_delta()
+                    self._domain_delta.update(new_domains)
+                    self._ip_delta.update(new_ips)
+                    self._schedule_publish()
+            self._write_blocklist()
+        return result
     
     def export_to_file(self, file_path: str, format: str = 'json') -> bool:
         """Export blocklist to file"""
@@ -306,21 +911,23 @@ class BlocklistManager:
     
     def clear_category(self, category: str) -> bool:
         """Clear all entries of a specific category"""
-        self.blocked_domains = {d: c for d, c in self.blocked_domains.items() if c != category}
-        self.blocked_ips = {i: c for i, c in self.blocked_ips.items() if c != category}
-        self.blocked_patterns = [(p, c) for p, c in self.blocked_patterns if c != category]
-        return self.save_blocklist()
+        with self._journal_lock, self._lock:
+            self._apply_op('clear_category', category)
+            return self._journal('clear_category', category)
     
-    def _is_valid_ip(self, ip: str) -> bool:
-        """Simple IP validation"""
-        parts = ip.split('.')
-        if len(parts) != 4:
-            return False
+    def _normalize_domain(self, domain: str) -> Optional[str]:
+        """Normalize domain for storage, or None if it isn't usable"""
+        domain = domain.lower().strip().strip('.')
         
-        try:
-            return all(0 <= int(part) <= 255 for part in parts)
-        except ValueError:
-            return False
+        # Basic validation
+        if not domain or '/' in domain or any(c.isspace() for c in domain):
+            return None
+        
+        return domain
+    
+    def _is_valid_ip(self, ip: str) -> bool:
+        """IP validation (IPv4/IPv6 address, CIDR or range)"""
+        return parse_ip_entry(ip) is not None
 
 
 # Global blocklist instance
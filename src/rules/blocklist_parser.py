@@ -0,0 +1,122 @@
+"""
+Blocklist Parser for Defensiq Network Security
+Streams entries out of TXT, hosts-file, adblock and JSON blocklists
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Tuple
+
+from .ip_ranges import parse_ip_entry
+
+# Host names that appear in hosts files but are never blocklist entries
+HOSTS_LOCAL_NAMES = {
+    'localhost', 'localhost.localdomain', 'local', 'broadcasthost',
+    'ip6-localhost', 'ip6-loopback', 'ip6-localnet', 'ip6-mcastprefix',
+    'ip6-allnodes', 'ip6-allrouters', 'ip6-allhosts', '0.0.0.0'
+}
+
+# Adblock cosmetic/scriptlet separators (element hiding, not network rules)
+COSMETIC_SEPARATORS = ('##', '#@#', '#?#', '#$#')
+
+# Dot-separated labels of [a-z0-9_-], none starting or ending with a hyphen
+DOMAIN_PATTERN = re.compile(
+    r'(?:[a-z0-9_](?:[a-z0-9_-]*[a-z0-9_])?\.)+[a-z0-9_](?:[a-z0-9_-]*[a-z0-9_])?\.?',
+    re.IGNORECASE
+)
+
+# Marker yielded for lines that look like entries but can't be used
+INVALID = ''
+
+
+def iter_blocklist_file(file_path: str, category: str) -> Iterator[Tuple[str, str]]:
+    """
+    Stream (value, category) pairs from a blocklist file
+    JSON files use the export format; everything else is parsed line by line.
+    Unusable lines are yielded with value INVALID so callers can count them.
+    """
+    file_path = Path(file_path)
+
+    if file_path.suffix.lower() == '.json':
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        for section in ('domains', 'ips'):
+            for entry in data.get(section, []):
+                yield (entry.get('value', '') or INVALID, entry.get('category', category))
+        return
+
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+        yield from iter_blocklist_lines(f, category)
+
+
+def iter_blocklist_lines(lines: Iterable[str], category: str) -> Iterator[Tuple[str, str]]:
+    """Stream (value, category) pairs from TXT, hosts-file or adblock lines"""
+    for line in lines:
+        for value in parse_blocklist_line(line):
+            yield (value, category)
+
+
+def parse_blocklist_line(line: str) -> Tuple[str, ...]:
+    """
+    Extract entries from a single line
+    Returns: tuple of values (INVALID for unusable entries), empty to skip
+    """
+    line = line.strip()
+
+    # Comments, adblock headers, exception and cosmetic rules
+    if not line or line[0] in '#!;[' or line.startswith('@@'):
+        return ()
+    if any(separator in line for separator in COSMETIC_SEPARATORS):
+        return ()
+
+    # Adblock: ||domain^ with optional $options
+    if line.startswith('||'):
+        domain = _parse_adblock_rule(line)
+        return (domain if domain and is_domain(domain) else INVALID,)
+
+    # Trailing comments (hosts "# comment", Spamhaus DROP "; SBL123")
+    line = line.split('#', 1)[0].split(';', 1)[0].strip()
+    if not line:
+        return ()
+
+    parts = line.split()
+
+    # Spaced IP range: "1.2.3.4 - 1.2.3.9"
+    if len(parts) == 3 and parts[1] == '-':
+        value = ''.join(parts)
+        return (value if parse_ip_entry(value) is not None else INVALID,)
+
+    # Hosts file: "0.0.0.0 domain [domain ...]"
+    if len(parts) > 1 and parse_ip_entry(parts[0]) is not None:
+        return tuple(
+            name if is_domain(name) else INVALID
+            for name in parts[1:] if name.lower() not in HOSTS_LOCAL_NAMES
+        )
+
+    if len(parts) > 1:
+        return (INVALID,)
+    if is_domain(parts[0]) or parse_ip_entry(parts[0]) is not None:
+        return (parts[0],)
+    return (INVALID,)
+
+
+def is_domain(value: str) -> bool:
+    """Whether value is a domain name (at least two labels, see DOMAIN_PATTERN)"""
+    return DOMAIN_PATTERN.fullmatch(value) is not None
+
+
+def _parse_adblock_rule(rule: str) -> Optional[str]:
+    """Domain from a ||domain^ rule, or None for rules that aren't plain domains"""
+    body = rule[2:]
+    end = len(body)
+    for terminator in ('^', '$'):
+        position = body.find(terminator)
+        if position != -1 and position < end:
+            end = position
+    domain = body[:end]
+
+    if not domain or any(c in domain for c in '/*|'):
+        return None
+    return domain
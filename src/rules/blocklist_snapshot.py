@@ -0,0 +1,441 @@
+"""
+Blocklist Snapshot for Defensiq Network Security
+Compiled, memory-mapped binary form of blocklist.json for zero-parse loading
+"""
+
+import hashlib
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .ip_ranges import _IntervalTable, normalize_ip_entry, parse_ip_entry
+
+SNAPSHOT_MAGIC = b'DFQBLKSN'
+# 2: IP entries stored normalized
+SNAPSHOT_VERSION = 2
+
+# Section order is part of the on-disk format; append only
+SECTIONS = (
+    ('category_offsets', 'I'),
+    ('category_blob', 'B'),
+    ('domain_buckets', 'I'),       # first hash index per top-16-bit prefix
+    ('domain_hashes', 'Q'),        # sorted 64-bit hashes of blocked domains
+    ('domain_categories', 'H'),    # category id per hash
+    ('v4_starts', 'I'),            # sorted disjoint IPv4 intervals
+    ('v4_ends', 'I'),
+    ('v4_owners', 'I'),            # ip entry id per interval
+    ('v6_starts_hi', 'Q'),         # IPv6 bounds split into high/low 64 bits
+    ('v6_starts_lo', 'Q'),
+    ('v6_ends_hi', 'Q'),
+    ('v6_ends_lo', 'Q'),
+    ('v6_owners', 'I'),
+    ('ip_entry_offsets', 'I'),
+    ('ip_entry_blob', 'B'),
+    ('ip_entry_categories', 'H'),
+    ('pattern_offsets', 'I'),
+    ('pattern_blob', 'B'),
+    ('pattern_categories', 'H'),
+)
+
+# magic, version, byte order of the arrays, sha256 of source JSON (hex), section table
+HEADER = struct.Struct('<8sII64s' + 'Q' * (2 * len(SECTIONS)))
+NATIVE_BYTE_ORDER = 1 if sys.byteorder == 'little' else 2
+SECTION_ALIGNMENT = 8
+BUCKET_SHIFT = 48
+_LO_MASK = (1 << 64) - 1
+
+
+def domain_hash(name) -> int:
+    """Stable 64-bit hash of a domain name (bytes-like)"""
+    return int.from_bytes(hashlib.blake2b(name, digest_size=8).digest(), 'little')
+
+
+class _SnapshotDomains:
+    """Domain lookups against the mapped hash table"""
+
+    def __init__(self, buckets: memoryview, hashes: memoryview, category_ids: memoryview,
+                 categories: List[str]):
+        self._buckets = buckets
+        self._hashes = hashes
+        self._category_ids = category_ids
+        self._categories = categories
+
+    def lookup(self, domain: str) -> Optional[Tuple[str, str, bool]]:
+        """
+        Find the longest blocked ancestor of a domain (including itself)
+        Suffixes are hashed from slices of one encoded buffer
+        Returns: (matched_domain, category, exact) or None
+        """
+        if domain.endswith('.'):
+            domain = domain[:-1]
+
+        data = domain.encode('utf-8')
+        view = memoryview(data)
+        buckets = self._buckets
+        hashes = self._hashes
+        position = 0
+
+        while True:
+            h = domain_hash(view[position:])
+            bucket = h >> BUCKET_SHIFT
+            end = buckets[bucket + 1]
+            i = bisect_left(hashes, h, buckets[bucket], end)
+            if i < end and hashes[i] == h:
+                category = self._categories[self._category_ids[i]]
+                if position == 0:
+                    return (domain, category, True)
+                return (data[position:].decode('utf-8'), category, False)
+
+            position = data.find(b'.', position) + 1
+            if position == 0:
+                return None
+
+    def __contains__(self, domain: str) -> bool:
+        match = self.lookup(domain)
+        return match is not None and match[2]
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+
+class _SnapshotIPs:
+    """IP lookups against the mapped interval tables"""
+
+    def __init__(self, sections: Dict[str, memoryview], entries: List[str], categories: List[str]):
+        self._v4_starts = sections['v4_starts']
+        self._v4_ends = sections['v4_ends']
+        self._v4_owners = sections['v4_owners']
+        # IPv6 starts joined once into ints so lookups bisect them directly
+        self._v6_starts = [(hi << 64) | lo for hi, lo in
+                           zip(sections['v6_starts_hi'], sections['v6_starts_lo'])]
+        self._v6_ends_hi = sections['v6_ends_hi']
+        self._v6_ends_lo = sections['v6_ends_lo']
+        self._v6_owners = sections['v6_owners']
+        self._entry_categories = sections['ip_entry_categories']
+        self._entries = entries
+        self._entry_set: Optional[frozenset] = None
+        self._categories = categories
+
+    def lookup_packed(self, packed) -> Optional[Tuple[str, str, bool]]:
+        """
+        Look up a packed address (4 or 16 bytes, any bytes-like object)
+        Returns: (matched_entry, category, exact) or None
+        """
+        address = int.from_bytes(packed, 'big')
+
+        if len(packed) == 4:
+            i = bisect_right(self._v4_starts, address) - 1
+            if i < 0 or address > self._v4_ends[i]:
+                return None
+            owner = self._v4_owners[i]
+        else:
+            i = bisect_right(self._v6_starts, address) - 1
+            if i < 0 or address > ((self._v6_ends_hi[i] << 64) | self._v6_ends_lo[i]):
+                return None
+            owner = self._v6_owners[i]
+
+        entry = self._entries[owner]
+        category = self._categories[self._entry_categories[owner]]
+        return (entry, category, '/' not in entry and '-' not in entry)
+
+    def lookup(self, ip: str) -> Optional[Tuple[str, str, bool]]:
+        """Look up a textual address"""
+        parsed = parse_ip_entry(ip)
+        if parsed is None or parsed[1] != parsed[2]:
+            return None
+        version, address, _ = parsed
+        return self.lookup_packed(address.to_bytes(4 if version == 4 else 16, 'big'))
+
+    def ranges(self) -> List[Tuple[int, int, int]]:
+        """Every entry as (version, first_address, last_address)"""
+        return [parsed for parsed in map(parse_ip_entry, self._entries) if parsed is not None]
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """Iterate (entry, category) pairs"""
+        categories = self._categories
+        return ((entry, categories[category_id])
+                for entry, category_id in zip(self._entries, self._entry_categories))
+
+    def networks(self) -> Iterator[Tuple[str, str, Tuple[int, int, int]]]:
+        """Iterate network and range entries as (entry, category, (version, first, last))"""
+        for entry, category in self.items():
+            if '/' in entry or '-' in entry:
+                parsed = parse_ip_entry(entry)
+                if parsed is not None:
+                    yield entry, category, parsed
+
+    def __contains__(self, entry: str) -> bool:
+        if self._entry_set is None:
+            self._entry_set = frozenset(self._entries)
+        return entry in self._entry_set
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class BlocklistSnapshot:
+    """
+    Read-only, memory-mapped compiled blocklist
+
+    Domains are stored as sorted 64-bit hashes, IPs as packed disjoint
+    intervals and patterns as source strings, each with a category id.
+    The file records the SHA-256 of the blocklist.json it was built from
+    and is ignored whenever that checksum no longer matches.
+    """
+
+    def __init__(self, path: Path, mapped: mmap.mmap, sections: Dict[str, memoryview]):
+        self.path = path
+        self._mmap = mapped
+        self._sections = sections
+
+        self.categories = self._read_strings('category_offsets', 'category_blob')
+        self.domains = _SnapshotDomains(
+            sections['domain_buckets'], sections['domain_hashes'],
+            sections['domain_categories'], self.categories
+        )
+        self.ips = _SnapshotIPs(
+            sections, self._read_strings('ip_entry_offsets', 'ip_entry_blob'), self.categories
+        )
+
+    @classmethod
+    def load(cls, path, checksum: str) -> Optional['BlocklistSnapshot']:
+        """Map snapshot file if it exists, is readable and matches checksum"""
+        path = Path(path)
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        view = None
+        sections: Dict[str, memoryview] = {}
+        try:
+            fields = HEADER.unpack_from(mapped, 0)
+            magic, version, byte_order, stored_checksum = fields[:4]
+            if (magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION
+                    or byte_order != NATIVE_BYTE_ORDER
+                    or stored_checksum.decode('ascii') != checksum):
+                raise ValueError("stale or foreign snapshot")
+
+            view = memoryview(mapped)
+            for index, (name, typecode) in enumerate(SECTIONS):
+                offset, length = fields[4 + 2 * index], fields[5 + 2 * index]
+                item_size = struct.calcsize(typecode)
+                if offset + length > len(mapped) or length % item_size or offset % item_size:
+                    raise ValueError(f"section {name} out of bounds")
+                sections[name] = view[offset:offset + length].cast(typecode)
+            view.release()
+            view = None
+
+            cls._validate(sections)
+            return cls(path, mapped, sections)
+
+        except (struct.error, ValueError, TypeError, IndexError, UnicodeDecodeError):
+            # Views must go before the map, or close() raises BufferError
+            for section in sections.values():
+                section.release()
+            if view is not None:
+                view.release()
+            mapped.close()
+            return None
+
+    @staticmethod
+    def _validate(sections: Dict[str, memoryview]):
+        """Check the cross-section invariants lookups rely on (ValueError if broken)"""
+        def check(condition: bool, message: str):
+            if not condition:
+                raise ValueError(f"corrupt snapshot: {message}")
+
+        def check_strings(offsets_name: str, blob_name: str) -> int:
+            offsets = sections[offsets_name]
+            check(len(offsets) >= 1 and offsets[0] == 0, f"{offsets_name} empty")
+            check(offsets[-1] == len(sections[blob_name]), f"{offsets_name} does not match blob")
+            check(all(a <= b for a, b in zip(offsets, offsets[1:])), f"{offsets_name} not sorted")
+            return len(offsets) - 1
+
+        category_count = check_strings('category_offsets', 'category_blob')
+        entry_count = check_strings('ip_entry_offsets', 'ip_entry_blob')
+        pattern_count = check_strings('pattern_offsets', 'pattern_blob')
+
+        buckets = sections['domain_buckets']
+        hashes = sections['domain_hashes']
+        check(len(buckets) == (1 << (64 - BUCKET_SHIFT)) + 1, "domain bucket table size")
+        check(buckets[0] == 0 and buckets[-1] == len(hashes), "domain bucket bounds")
+        check(all(a <= b for a, b in zip(buckets, buckets[1:])), "domain buckets not sorted")
+        check(len(sections['domain_categories']) == len(hashes), "domain categories length")
+
+        v4 = [sections[name] for name in ('v4_starts', 'v4_ends', 'v4_owners')]
+        v6 = [sections[name] for name in ('v6_starts_hi', 'v6_starts_lo', 'v6_ends_hi',
+                                          'v6_ends_lo', 'v6_owners')]
+        check(len({len(column) for column in v4}) == 1, "IPv4 interval columns differ")
+        check(len({len(column) for column in v6}) == 1, "IPv6 interval columns differ")
+        check(len(sections['ip_entry_categories']) == entry_count, "ip entry categories length")
+        check(len(sections['pattern_categories']) == pattern_count, "pattern categories length")
+
+        for owners in (v4[2], v6[4]):
+            check(not owners or max(owners) < entry_count, "interval owner out of range")
+        for name in ('domain_categories', 'ip_entry_categories', 'pattern_categories'):
+            ids = sections[name]
+            check(not ids or max(ids) < category_count, f"{name} out of range")
+
+    @classmethod
+    def write(cls, path, data: Dict[str, Any], checksum: str):
+        """Compile blocklist data (blocklist.json format) into a snapshot file"""
+        path = Path(path)
+        categories: Dict[str, int] = {}
+
+        def category_id(name: str) -> int:
+            return categories.setdefault(name, len(categories))
+
+        # Domains: sorted hashes with parallel category ids
+        hashed = {}
+        for entry in data.get('domains', []):
+            domain = entry.get('value', '').lower().strip().strip('.')
+            if domain:
+                hashed.setdefault(domain_hash(domain.encode('utf-8')),
+                                  category_id(entry.get('category', 'custom')))
+        domain_keys = sorted(hashed)
+
+        # Bucket table narrows each bisect to the hashes sharing a prefix
+        domain_buckets = array('I', bytes(4 * ((1 << (64 - BUCKET_SHIFT)) + 1)))
+        for key in domain_keys:
+            domain_buckets[(key >> BUCKET_SHIFT) + 1] += 1
+        for bucket in range(1, len(domain_buckets)):
+            domain_buckets[bucket] += domain_buckets[bucket - 1]
+
+        # IPs: normalized as when loading from JSON (later duplicates win),
+        # flattened per version, owners index into the entry table
+        normalized: Dict[str, str] = {}
+        for entry in data.get('ips', []):
+            value = normalize_ip_entry(entry.get('value', ''))
+            if value is not None:
+                normalized[value] = entry.get('category', 'custom')
+
+        ip_entries: List[str] = []
+        ip_categories = array('H')
+        intervals = {4: [], 6: []}
+        for value, category in normalized.items():
+            version, start, end = parse_ip_entry(value)
+            intervals[version].append((start, end, len(ip_entries), ''))
+            ip_entries.append(value)
+            ip_categories.append(category_id(category))
+
+        v4 = _IntervalTable(intervals[4], packed=False)
+        v6 = _IntervalTable(intervals[6], packed=False)
+
+        pattern_sources: List[str] = []
+        pattern_categories = array('H')
+        for entry in data.get('patterns', []):
+            pattern_sources.append(entry.get('value', ''))
+            pattern_categories.append(category_id(entry.get('category', 'custom')))
+
+        category_offsets, category_blob = cls._string_table(list(categories))
+        ip_offsets, ip_blob = cls._string_table(ip_entries)
+        pattern_offsets, pattern_blob = cls._string_table(pattern_sources)
+
+        payloads = {
+            'category_offsets': category_offsets,
+            'category_blob': category_blob,
+            'domain_buckets': domain_buckets,
+            'domain_hashes': array('Q', domain_keys),
+            'domain_categories': array('H', (hashed[k] for k in domain_keys)),
+            'v4_starts': array('I', v4.starts),
+            'v4_ends': array('I', v4.ends),
+            'v4_owners': array('I', (owner for owner, _ in v4.owners)),
+            'v6_starts_hi': array('Q', (s >> 64 for s in v6.starts)),
+            'v6_starts_lo': array('Q', (s & _LO_MASK for s in v6.starts)),
+            'v6_ends_hi': array('Q', (e >> 64 for e in v6.ends)),
+            'v6_ends_lo': array('Q', (e & _LO_MASK for e in v6.ends)),
+            'v6_owners': array('I', (owner for owner, _ in v6.owners)),
+            'ip_entry_offsets': ip_offsets,
+            'ip_entry_blob': ip_blob,
+            'ip_entry_categories': ip_categories,
+            'pattern_offsets': pattern_offsets,
+            'pattern_blob': pattern_blob,
+            'pattern_categories': pattern_categories,
+        }
+
+        # Lay out sections after the header, each aligned for casting
+        table = []
+        chunks = []
+        offset = HEADER.size
+        for name, _ in SECTIONS:
+            raw = payloads[name].tobytes() if isinstance(payloads[name], array) else payloads[name]
+            padding = -offset % SECTION_ALIGNMENT
+            chunks.append(b'\0' * padding)
+            offset += padding
+            table.extend((offset, len(raw)))
+            chunks.append(raw)
+            offset += len(raw)
+
+        header = HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, NATIVE_BYTE_ORDER,
+                             checksum.encode('ascii'), *table)
+
+        # Write to a temp file and swap in, readers keep their old mapping
+        # (per-process name: the service and GUI may both rebuild it)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(temp_path, 'wb') as f:
+            f.write(header)
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.replace(temp_path, path)
+        except OSError:
+            # Windows refuses to replace a file another process still has
+            # mapped; keep the old one, whose checksum no longer matches,
+            # so loads fall back to JSON until a later write succeeds
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    @staticmethod
+    def _string_table(strings: List[str]) -> Tuple[array, bytes]:
+        """Encode strings as (u32 offsets[n + 1], utf-8 blob)"""
+        offsets = array('I', [0])
+        encoded = []
+        total = 0
+        for value in strings:
+            raw = value.encode('utf-8')
+            encoded.append(raw)
+            total += len(raw)
+            offsets.append(total)
+        return offsets, b''.join(encoded)
+
+    def _read_strings(self, offsets_name: str, blob_name: str) -> List[str]:
+        """Decode a string table"""
+        offsets = self._sections[offsets_name]
+        blob = self._sections[blob_name]
+        return [str(blob[offsets[i]:offsets[i + 1]], 'utf-8') for i in range(len(offsets) - 1)]
+
+    def compiled_patterns(self) -> List[tuple]:
+        """Compile pattern table into (regex, category) pairs"""
+        sources = self._read_strings('pattern_offsets', 'pattern_blob')
+        category_ids = self._sections['pattern_categories']
+
+        patterns = []
+        for source, category_id in zip(sources, category_ids):
+            try:
+                patterns.append((re.compile(source, re.IGNORECASE), self.categories[category_id]))
+            except re.error:
+                print(f"[WARNING] Invalid regex pattern: {source}")
+        return patterns
+
+    def close(self):
+        """Release mapped sections and unmap the file"""
+        for view in self._sections.values():
+            view.release()
+        self._sections = {}
+        self._mmap.close()
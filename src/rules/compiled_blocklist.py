@@ -0,0 +1,89 @@
+"""
+Compiled Blocklist for Defensiq Network Security
+Immutable generation of blocklist indexes read by the packet filter
+"""
+
+import time
+from typing import Optional
+
+
+class CompiledBlocklist:
+    """
+    One published generation of the blocklist lookup indexes
+
+    A generation is never modified after it is published; BlocklistManager
+    layers edits over the frozen base indexes as a small delta overlay and
+    swaps in a new generation by plain reference assignment. Readers grab
+    `manager.current` once and keep using that object, so they never see a
+    half-applied change.
+    """
+
+    __slots__ = ('generation', 'domains', 'ips', 'patterns', 'snapshot',
+                 'published_at', 'swap_latency')
+
+    def __init__(self, generation: int, domains, ips, patterns, snapshot=None,
+                 swap_latency: float = 0.0):
+        """
+        Args:
+            generation: Monotonic generation number
+            domains: Domain index with lookup(domain)
+            ips: IP index with lookup(ip) / lookup_packed(packed)
+            patterns: PatternMatcher
+            snapshot: BlocklistSnapshot backing the indexes (kept mapped while referenced)
+            swap_latency: Seconds from the first pending change to publication
+        """
+        self.generation = generation
+        self.domains = domains
+        self.ips = ips
+        self.patterns = patterns
+        self.snapshot = snapshot
+        self.published_at = time.time()
+        self.swap_latency = swap_latency
+
+    def is_domain_blocked(self, domain: str) -> tuple:
+        """
+        Check if domain is blocked
+        Returns: (is_blocked, category, reason)
+        """
+        domain = domain.lower().strip()
+
+        # Exact or longest parent match (e.g., block all *.example.com)
+        match = self.domains.lookup(domain)
+        if match:
+            parent_domain, category, exact = match
+            if exact:
+                return (True, category, "Exact match")
+            return (True, category, f"Parent domain match: {parent_domain}")
+
+        # Pattern match
+        match = self.patterns.search(domain)
+        if match:
+            pattern, category = match
+            return (True, category, f"Pattern match: {pattern.pattern}")
+
+        return (False, None, None)
+
+    def is_ip_blocked(self, ip: str) -> tuple:
+        """
+        Check if IP is blocked
+        Returns: (is_blocked, category, reason)
+        """
+        return self._ip_match_result(self.ips.lookup(ip))
+
+    def is_packed_ip_blocked(self, packed) -> tuple:
+        """
+        Check if a packed (4 or 16 byte) address is blocked
+        Returns: (is_blocked, category, reason)
+        """
+        return self._ip_match_result(self.ips.lookup_packed(packed))
+
+    @staticmethod
+    def _ip_match_result(match: Optional[tuple]) -> tuple:
+        """Convert an IP index match to (is_blocked, category, reason)"""
+        if match:
+            entry, category, exact = match
+            if exact:
+                return (True, category, "Exact match")
+            return (True, category, f"Range match: {entry}")
+
+        return (False, None, None)
@@ -0,0 +1,206 @@
+"""
+Domain Trie for Defensiq Network Security
+Reversed-label suffix trie used for fast parent-domain blocklist lookups
+"""
+
+import sys
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, Optional, Tuple
+
+# Key under which an interior node stores its own category
+_TERMINAL = None
+
+
+class DomainTrie(MutableMapping):
+    """
+    Suffix trie keyed on reversed domain labels (com -> example -> ads)
+
+    Leaf entries store the category string directly in the parent node,
+    interior entries are dicts that carry their category under _TERMINAL.
+    Labels and categories are interned so repeated labels ("www", "com")
+    and category names are shared across millions of entries.
+
+    Behaves like the dict of domain -> category it replaces, so existing
+    callers (GUI table, statistics, save/export) keep working unchanged.
+    """
+
+    __slots__ = ('_root', '_size')
+
+    def __init__(self, entries: Dict[str, str] = None):
+        """Initialize trie, optionally from a domain -> category mapping"""
+        self._root: dict = {}
+        self._size = 0
+
+        if entries:
+            for domain, category in entries.items():
+                self[domain] = category
+
+    @staticmethod
+    def _labels(domain: str) -> list:
+        """Split a normalized domain into labels"""
+        return domain.lower().strip().rstrip('.').split('.')
+
+    def __setitem__(self, domain: str, category: str):
+        labels = self._labels(domain)
+        if not labels[0]:
+            raise KeyError(domain)
+
+        category = sys.intern(category)
+        node = self._root
+        last = len(labels) - 1
+
+        for i in range(last, 0, -1):
+            label = sys.intern(labels[i])
+            child = node.get(label)
+            if child is None:
+                child = {}
+                node[label] = child
+            elif not isinstance(child, dict):
+                # Promote leaf to interior node, keeping its category
+                child = {_TERMINAL: child}
+                node[label] = child
+            node = child
+
+        label = sys.intern(labels[0])
+        child = node.get(label)
+        if isinstance(child, dict):
+            if _TERMINAL not in child:
+                self._size += 1
+            child[_TERMINAL] = category
+        else:
+            if child is None:
+                self._size += 1
+            node[label] = category
+
+    def __getitem__(self, domain: str) -> str:
+        node = self._root
+        for label in reversed(self._labels(domain)):
+            if not isinstance(node, dict):
+                raise KeyError(domain)
+            node = node.get(label)
+            if node is None:
+                raise KeyError(domain)
+
+        if isinstance(node, dict):
+            if _TERMINAL in node:
+                return node[_TERMINAL]
+            raise KeyError(domain)
+        return node
+
+    def __delitem__(self, domain: str):
+        labels = self._labels(domain)
+        path = []
+        node = self._root
+
+        for label in reversed(labels):
+            if not isinstance(node, dict) or label not in node:
+                raise KeyError(domain)
+            path.append((node, label))
+            node = node[label]
+
+        parent, label = path[-1]
+        if isinstance(node, dict):
+            if _TERMINAL not in node:
+                raise KeyError(domain)
+            del node[_TERMINAL]
+            if len(node) == 0:
+                del parent[label]
+        else:
+            del parent[label]
+        self._size -= 1
+
+        # Prune interior nodes left empty (or holding only a category)
+        for parent, label in reversed(path[:-1]):
+            child = parent[label]
+            if len(child) == 0:
+                del parent[label]
+            elif len(child) == 1 and _TERMINAL in child:
+                parent[label] = child[_TERMINAL]
+                break
+            else:
+                break
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[str]:
+        for domain, _ in self._walk():
+            yield domain
+
+    def items(self):
+        """Iterate (domain, category) pairs without per-key lookups"""
+        return self._walk()
+
+    def values(self):
+        """Iterate categories"""
+        return (category for _, category in self._walk())
+
+    def clear(self):
+        self._root = {}
+        self._size = 0
+
+    def copy(self) -> 'DomainTrie':
+        """Independent copy (interior nodes copied, labels/categories shared)"""
+        clone = DomainTrie()
+        clone._size = self._size
+        clone._root = dict(self._root)
+
+        stack = [clone._root]
+        while stack:
+            node = stack.pop()
+            for label, child in node.items():
+                if isinstance(child, dict):
+                    child = dict(child)
+                    node[label] = child
+                    stack.append(child)
+        return clone
+
+    def _walk(self) -> Iterator[Tuple[str, str]]:
+        """Depth-first walk rebuilding full domain strings"""
+        stack = [(self._root, ())]
+        while stack:
+            node, suffix = stack.pop()
+            for label, child in node.items():
+                if label is _TERMINAL:
+                    yield '.'.join(reversed(suffix)), child
+                elif isinstance(child, dict):
+                    stack.append((child, suffix + (label,)))
+                else:
+                    yield '.'.join(reversed(suffix + (label,))), child
+
+    def lookup(self, domain: str) -> Optional[Tuple[str, str, bool]]:
+        """
+        Find the longest blocked ancestor of a domain (including itself)
+        Single pass over the reversed labels, no intermediate strings
+        Returns: (matched_domain, category, exact) or None
+        """
+        labels = domain.split('.')
+        if not labels[-1]:
+            labels.pop()
+
+        node = self._root
+        depth = 0
+        match_depth = 0
+        match_category = None
+
+        for label in reversed(labels):
+            child = node.get(label)
+            if child is None:
+                break
+            depth += 1
+            if child.__class__ is str:
+                match_depth = depth
+                match_category = child
+                break
+            category = child.get(_TERMINAL)
+            if category is not None:
+                match_depth = depth
+                match_category = category
+            node = child
+
+        if match_category is None:
+            return None
+
+        exact = match_depth == len(labels)
+        matched = domain if exact else '.'.join(labels[-match_depth:])
+        return (matched, match_category, exact)
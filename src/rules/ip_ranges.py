@@ -0,0 +1,341 @@
+"""
+IP Range Index for Defensiq Network Security
+Longest-prefix matching of IPv4/IPv6 addresses against CIDRs and ranges
+"""
+
+import heapq
+import socket
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# 32-bit unsigned typecode for packed IPv4 interval arrays
+_V4_TYPECODE = 'I' if array('I').itemsize == 4 else 'L'
+
+
+def parse_ip_entry(value: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Parse an IP, CIDR ("10.0.0.0/8") or range ("1.2.3.4-1.2.3.9")
+    Returns: (version, first_address, last_address) as integers, or None
+    """
+    value = value.strip()
+    if not value:
+        return None
+
+    try:
+        if '/' in value:
+            address, prefix = value.split('/', 1)
+            version, start = _parse_address(address)
+            bits = 32 if version == 4 else 128
+            prefix = int(prefix)
+            if not 0 <= prefix <= bits:
+                return None
+            host_mask = (1 << (bits - prefix)) - 1
+            start &= ~host_mask
+            return (version, start, start | host_mask)
+
+        if '-' in value:
+            first, last = value.split('-', 1)
+            version, start = _parse_address(first.strip())
+            last_version, end = _parse_address(last.strip())
+            if version != last_version or end < start:
+                return None
+            return (version, start, end)
+
+        version, address = _parse_address(value)
+        return (version, address, address)
+
+    except (OSError, ValueError):
+        return None
+
+
+def normalize_ip_entry(value: str) -> Optional[str]:
+    """Canonical string form of an IP, CIDR or range entry, or None if invalid"""
+    parsed = parse_ip_entry(value)
+    if parsed is None:
+        return None
+
+    version, start, end = parsed
+    if start == end:
+        return _format_address(version, start)
+
+    # Prefer CIDR notation when the range is exactly one prefix
+    size = end - start + 1
+    if size & (size - 1) == 0 and start % size == 0:
+        bits = 32 if version == 4 else 128
+        prefix = bits - (size.bit_length() - 1)
+        return f"{_format_address(version, start)}/{prefix}"
+
+    return f"{_format_address(version, start)}-{_format_address(version, end)}"
+
+
+def _parse_address(address: str) -> Tuple[int, int]:
+    """Parse a single address into (version, integer)"""
+    if ':' in address:
+        return (6, int.from_bytes(socket.inet_pton(socket.AF_INET6, address), 'big'))
+    return (4, int.from_bytes(socket.inet_pton(socket.AF_INET, address), 'big'))
+
+
+def _format_address(version: int, address: int) -> str:
+    """Format an integer address back to text"""
+    if version == 4:
+        return socket.inet_ntop(socket.AF_INET, address.to_bytes(4, 'big'))
+    return socket.inet_ntop(socket.AF_INET6, address.to_bytes(16, 'big'))
+
+
+class _IntervalTable:
+    """Sorted disjoint intervals searched with bisect (one per IP version)"""
+
+    __slots__ = ('starts', 'ends', 'owners', 'overlapping')
+
+    def __init__(self, intervals: List[Tuple[int, int, str, str]], packed: bool):
+        """Build from (start, end, entry, category), narrowest entry wins on overlap"""
+        intervals.sort(key=lambda iv: (iv[0], -iv[1]))
+
+        starts: List[int] = []
+        ends: List[int] = []
+        owners: List[Tuple[str, str]] = []
+
+        self.overlapping = not self._disjoint(intervals)
+        if not self.overlapping:
+            for start, end, entry, category in intervals:
+                starts.append(start)
+                ends.append(end)
+                owners.append((entry, category))
+        else:
+            self._flatten(intervals, starts, ends, owners)
+
+        if packed:
+            self.starts = array(_V4_TYPECODE, starts)
+            self.ends = array(_V4_TYPECODE, ends)
+        else:
+            self.starts = starts
+            self.ends = ends
+        self.owners = owners
+
+    @staticmethod
+    def _disjoint(intervals) -> bool:
+        previous_end = -1
+        for start, end, _, _ in intervals:
+            if start <= previous_end:
+                return False
+            previous_end = end
+        return True
+
+    @staticmethod
+    def _flatten(intervals, starts, ends, owners):
+        """Split overlapping intervals into segments owned by the narrowest cover"""
+        points = sorted({iv[0] for iv in intervals} | {iv[1] + 1 for iv in intervals})
+        active = []  # heap of (size, index)
+        next_index = 0
+
+        for k in range(len(points) - 1):
+            seg_start = points[k]
+            seg_end = points[k + 1] - 1
+
+            while next_index < len(intervals) and intervals[next_index][0] <= seg_start:
+                start, end = intervals[next_index][0], intervals[next_index][1]
+                heapq.heappush(active, (end - start, next_index))
+                next_index += 1
+
+            while active and intervals[active[0][1]][1] < seg_start:
+                heapq.heappop(active)
+
+            if not active:
+                continue
+
+            _, _, entry, category = intervals[active[0][1]]
+            if owners and ends[-1] + 1 == seg_start and owners[-1][0] == entry:
+                ends[-1] = seg_end
+            else:
+                starts.append(seg_start)
+                ends.append(seg_end)
+                owners.append((entry, category))
+
+    def try_insert(self, start: int, end: int, entry: str, category: str) -> bool:
+        """Insert in place if the interval overlaps nothing (else caller rebuilds)"""
+        if self.overlapping:
+            return False
+
+        i = bisect_right(self.starts, start)
+        if (i > 0 and self.ends[i - 1] >= start) or (i < len(self.starts) and self.starts[i] <= end):
+            return False
+
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.owners.insert(i, (entry, category))
+        return True
+
+    def try_remove(self, start: int, end: int, entry: str) -> bool:
+        """Remove in place if the entry owns exactly one whole segment"""
+        if self.overlapping:
+            return False
+
+        i = bisect_right(self.starts, start) - 1
+        if i < 0 or self.starts[i] != start or self.ends[i] != end or self.owners[i][0] != entry:
+            return False
+
+        del self.starts[i]
+        del self.ends[i]
+        del self.owners[i]
+        return True
+
+    def copy(self) -> '_IntervalTable':
+        clone = _IntervalTable.__new__(_IntervalTable)
+        clone.starts = self.starts[:]
+        clone.ends = self.ends[:]
+        clone.owners = self.owners[:]
+        clone.overlapping = self.overlapping
+        return clone
+
+    def find(self, address: int) -> Optional[Tuple[str, str]]:
+        i = bisect_right(self.starts, address) - 1
+        if i >= 0 and address <= self.ends[i]:
+            return self.owners[i]
+        return None
+
+    def __len__(self) -> int:
+        return len(self.owners)
+
+
+class IPRangeIndex:
+    """
+    Longest-prefix-match index over blocked IPs, CIDRs and ranges
+
+    Single addresses live in per-version dicts keyed by integer (always the
+    most specific match). Networks and ranges are flattened into sorted
+    disjoint interval arrays, so a lookup is one dict probe plus one bisect.
+    """
+
+    def __init__(self, entries: Dict[str, str] = None):
+        """Build index from an entry -> category mapping"""
+        self._hosts = {4: {}, 6: {}}
+        self._networks: Dict[str, Tuple[int, int, int, str]] = {}
+        self._tables = {4: None, 6: None}
+
+        for entry, category in (entries or {}).items():
+            self.add(entry, category, rebuild=False)
+        self.rebuild()
+
+    def add(self, entry: str, category: str, rebuild: bool = True) -> bool:
+        """Add an entry; overlapping networks rebuild the interval tables"""
+        parsed = parse_ip_entry(entry)
+        if parsed is None:
+            return False
+
+        version, start, end = parsed
+        if start == end:
+            self._hosts[version][start] = category
+        else:
+            replaced = entry in self._networks
+            self._networks[entry] = (version, start, end, category)
+            if rebuild:
+                table = self._tables[version]
+                if replaced or table is None or not table.try_insert(start, end, entry, category):
+                    self.rebuild()
+        return True
+
+    def remove(self, entry: str, rebuild: bool = True) -> bool:
+        """Remove an entry"""
+        if entry in self._networks:
+            version, start, end, _ = self._networks.pop(entry)
+            if rebuild:
+                table = self._tables[version]
+                if table is None or not table.try_remove(start, end, entry):
+                    self.rebuild()
+            return True
+
+        parsed = parse_ip_entry(entry)
+        if parsed is None:
+            return False
+        return self._hosts[parsed[0]].pop(parsed[1], None) is not None
+
+    def copy(self) -> 'IPRangeIndex':
+        """Independent copy that can be edited without affecting this index"""
+        clone = IPRangeIndex.__new__(IPRangeIndex)
+        clone._hosts = {version: dict(hosts) for version, hosts in self._hosts.items()}
+        clone._networks = dict(self._networks)
+        clone._tables = {
+            version: table.copy() if table is not None else None
+            for version, table in self._tables.items()
+        }
+        return clone
+
+    def rebuild(self):
+        """Rebuild interval tables from network entries"""
+        intervals = {4: [], 6: []}
+        for entry, (version, start, end, category) in self._networks.items():
+            intervals[version].append((start, end, entry, category))
+
+        for version in (4, 6):
+            self._tables[version] = (
+                _IntervalTable(intervals[version], packed=(version == 4))
+                if intervals[version] else None
+            )
+
+    def lookup_packed(self, packed) -> Optional[Tuple[str, str, bool]]:
+        """
+        Look up a packed address (4 or 16 bytes, any bytes-like object)
+        Returns: (matched_entry, category, exact) or None
+        """
+        version = 4 if len(packed) == 4 else 6
+        address = int.from_bytes(packed, 'big')
+
+        category = self._hosts[version].get(address)
+        if category is not None:
+            return (_format_address(version, address), category, True)
+
+        table = self._tables[version]
+        if table is not None:
+            owner = table.find(address)
+            if owner is not None:
+                return (owner[0], owner[1], False)
+
+        return None
+
+    def lookup(self, ip: str) -> Optional[Tuple[str, str, bool]]:
+        """Look up a textual address"""
+        try:
+            family = socket.AF_INET6 if ':' in ip else socket.AF_INET
+            return self.lookup_packed(socket.inet_pton(family, ip.strip()))
+        except (OSError, ValueError):
+            return None
+
+    def ranges(self) -> List[Tuple[int, int, int]]:
+        """Every entry as (version, first_address, last_address)"""
+        result = [
+            (version, address, address)
+            for version, hosts in self._hosts.items() for address in hosts
+        ]
+        result.extend((version, start, end) for version, start, end, _ in self._networks.values())
+        return result
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """Iterate (entry, category) pairs"""
+        for version, hosts in self._hosts.items():
+            for address, category in hosts.items():
+                yield _format_address(version, address), category
+        for entry, (_, _, _, category) in self._networks.items():
+            yield entry, category
+
+    def networks(self) -> Iterator[Tuple[str, str, Tuple[int, int, int]]]:
+        """Iterate network and range entries as (entry, category, (version, first, last))"""
+        for entry, (version, start, end, category) in self._networks.items():
+            yield entry, category, (version, start, end)
+
+    def __contains__(self, entry: str) -> bool:
+        if entry in self._networks:
+            return True
+        parsed = parse_ip_entry(entry)
+        return parsed is not None and parsed[1] == parsed[2] and parsed[1] in self._hosts[parsed[0]]
+
+    def __len__(self) -> int:
+        return len(self._hosts[4]) + len(self._hosts[6]) + len(self._networks)
+
+    def get_statistics(self) -> Dict[str, int]:
+        """Get index size statistics"""
+        return {
+            'hosts': len(self._hosts[4]) + len(self._hosts[6]),
+            'networks': len(self._networks),
+            'intervals': sum(len(t) for t in self._tables.values() if t is not None)
+        }
@@ -0,0 +1,244 @@
+"""
+Pattern Matcher for Defensiq Network Security
+Compiles blocklist regex patterns into a single multi-pattern matcher
+"""
+
+import re
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+# Literals shorter than this match too many domains to be a useful prefilter
+MIN_LITERAL_LENGTH = 3
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton over literal strings, reporting matched ids"""
+
+    __slots__ = ('_goto', '_fail', '_out')
+
+    def __init__(self, literals: Dict[str, List[int]]):
+        """Build automaton from literal -> list of ids"""
+        goto: List[Dict[str, int]] = [{}]
+        out: List[tuple] = [()]
+
+        # Trie of all literals
+        for literal, ids in literals.items():
+            state = 0
+            for ch in literal:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(())
+                state = nxt
+            out[state] = out[state] + tuple(ids)
+
+        # Failure links (breadth-first), merging outputs along the chain
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                if out[fail[nxt]]:
+                    out[nxt] = out[nxt] + out[fail[nxt]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def search(self, text: str) -> set:
+        """Return ids of all literals occurring in text"""
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        state = 0
+        hits = set()
+
+        for ch in text:
+            nxt = goto[state].get(ch)
+            while nxt is None and state:
+                state = fail[state]
+                nxt = goto[state].get(ch)
+            state = nxt or 0
+            if out[state]:
+                hits.update(out[state])
+
+        return hits
+
+
+class PatternMatcher:
+    """
+    Multi-pattern matcher for blocklist regexes
+
+    Patterns with a required literal (e.g. "tracker" in r"^tracker\\d+\\.")
+    are only run when an Aho-Corasick scan finds that literal in the domain.
+    Patterns without one are merged into a single alternation of named
+    groups, so a miss costs one prefilter scan plus one regex search
+    regardless of how many patterns are loaded.
+    """
+
+    def __init__(self, patterns: List[Tuple[re.Pattern, str]]):
+        """Build matcher from a list of (compiled_pattern, category)"""
+        self.patterns = list(patterns)
+
+        literals: Dict[str, List[int]] = {}
+        unfiltered: List[int] = []
+        self._standalone: List[int] = []
+        self._combined_indices: List[int] = []
+
+        for index, (pattern, _) in enumerate(self.patterns):
+            parsed = self._parse(pattern)
+            if parsed is None or pattern.groupindex or self._has_group_refs(parsed):
+                # Back-references can't survive being renumbered, and user
+                # group names may clash with each other once combined
+                self._standalone.append(index)
+                continue
+
+            literal = self._required_literal(parsed).lower()
+            if len(literal) >= MIN_LITERAL_LENGTH:
+                literals.setdefault(literal, []).append(index)
+            else:
+                unfiltered.append(index)
+
+        self._prefilter = AhoCorasick(literals) if literals else None
+        self._combined = self._compile_combined(unfiltered)
+
+    def search(self, domain: str) -> Optional[Tuple[re.Pattern, str]]:
+        """
+        Find the first pattern (in list order) that matches domain
+        Returns: (compiled_pattern, category) or None
+        """
+        best = None
+
+        if self._prefilter is not None:
+            candidates = self._prefilter.search(domain)
+            if candidates:
+                for index in sorted(candidates):
+                    if self.patterns[index][0].search(domain):
+                        best = index
+                        break
+
+        if self._combined is not None:
+            match = self._combined.search(domain)
+            if match:
+                # The alternation reports the leftmost match, which may not
+                # be the first pattern in list order: try the earlier ones
+                index = int(match.lastgroup[1:])
+                for earlier in self._combined_indices:
+                    if earlier >= index or (best is not None and earlier >= best):
+                        break
+                    if self.patterns[earlier][0].search(domain):
+                        index = earlier
+                        break
+                if best is None or index < best:
+                    best = index
+
+        for index in self._standalone:
+            if best is not None and index > best:
+                break
+            if self.patterns[index][0].search(domain):
+                best = index
+                break
+
+        if best is None:
+            return None
+        return self.patterns[best]
+
+    def _compile_combined(self, indices: List[int]) -> Optional[re.Pattern]:
+        """Compile patterns into one alternation of named groups p<index>"""
+        if not indices:
+            return None
+
+        def group(index):
+            return f"(?P<p{index}>{self.patterns[index][0].pattern})"
+
+        try:
+            combined = re.compile('|'.join(group(i) for i in indices), re.IGNORECASE)
+            self._combined_indices = list(indices)
+            return combined
+        except re.error:
+            pass
+
+        # Some pattern doesn't combine (inline global flags, group names);
+        # keep those on the standalone path and combine the rest
+        combinable = []
+        for index in indices:
+            try:
+                re.compile(group(index), re.IGNORECASE)
+                combinable.append(index)
+            except re.error:
+                self._standalone.append(index)
+
+        combined = None
+        if combinable:
+            try:
+                combined = re.compile('|'.join(group(i) for i in combinable), re.IGNORECASE)
+                self._combined_indices = combinable
+            except re.error:
+                self._standalone.extend(combinable)
+        self._standalone.sort()
+        return combined
+
+    @staticmethod
+    def _parse(pattern: re.Pattern):
+        """Parse pattern source into an sre subpattern"""
+        try:
+            return sre_parse.parse(pattern.pattern, pattern.flags)
+        except Exception:
+            return None
+
+    @classmethod
+    def _has_group_refs(cls, parsed) -> bool:
+        """Check for back-references or conditional groups"""
+        for op, av in parsed:
+            if op in (sre_parse.GROUPREF, sre_parse.GROUPREF_EXISTS):
+                return True
+            for item in (av if isinstance(av, (tuple, list)) else ()):
+                if isinstance(item, sre_parse.SubPattern) and cls._has_group_refs(item):
+                    return True
+                if isinstance(item, list):
+                    for branch in item:
+                        if isinstance(branch, sre_parse.SubPattern) and cls._has_group_refs(branch):
+                            return True
+        return False
+
+    @classmethod
+    def _required_literal(cls, parsed) -> str:
+        """Longest literal run that every match of the pattern must contain"""
+        best = ''
+        run = []
+
+        for op, av in parsed:
+            if op is sre_parse.LITERAL:
+                run.append(chr(av))
+                continue
+
+            if len(run) > len(best):
+                best = ''.join(run)
+            run = []
+
+            # Mandatory groups and repeats still guarantee their own literals
+            inner = None
+            if op is sre_parse.SUBPATTERN:
+                inner = av[-1]
+            elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and av[0] >= 1:
+                inner = av[2]
+            if inner is not None:
+                candidate = cls._required_literal(inner)
+                if len(candidate) > len(best):
+                    best = candidate
+
+        if len(run) > len(best):
+            best = ''.join(run)
+        return best
@@ -4,6 +4,7 @@ Monitors Confidentiality, Integrity, and Availability aspects
 """
 
 import hashlib
+import threading
 import time
 from pathlib import Path
 from typing import Dict, List, Any
@@ -11,7 +12,8 @@ from datetime import datetime, timedelta
 from collections import deque
 
 from core.logger import get_logger, EventType
-from core.config import get_config
+from core.config import Settings, get_config
+from core.file_watcher import get_file_watcher
 
 
 class CIATriadMonitor:
@@ -22,13 +24,22 @@ class CIATriadMonitor:
         self.logger = get_logger()
         self.config = get_config()
         
+        # Typed cia_triad settings, re-cached when the section changes
+        self.settings = self.config.settings.cia_triad
+        self.config.subscribe(self._on_settings_changed, ['cia_triad'])
+        
         # Confidentiality monitoring
         self.http_connections = deque(maxlen=100)
         self.cleartext_protocols = deque(maxlen=100)
         
-        # Integrity monitoring
+        # Integrity monitoring (files are re-hashed only when the watcher
+        # reports a change; external changes queue alerts for check_integrity)
         self.config_checksums = {}
         self.file_integrity_status = {}
+        self.watcher = get_file_watcher()
+        self._watched_files: Dict[Path, str] = {}
+        self._integrity_alerts: List[Dict[str, Any]] = []
+        self._integrity_lock = threading.Lock()
         
         # Availability monitoring
         self.packet_rate_history = deque(maxlen=60)  # Last 60 seconds
@@ -50,6 +61,45 @@ class CIATriadMonitor:
             if path.exists():
                 checksum = self._calculate_file_checksum(path)
                 self.config_checksums[str(path)] = checksum
+            
+            self._watched_files[path.resolve()] = str(path)
+            self.watcher.watch(path, self._on_file_changed, self_writes=True)
+    
+    def _on_file_changed(self, path: Path, external: bool):
+        """
+        File watcher: re-hash a critical file that changed
+        Changes written by this process just move the baseline; external
+        ones are integrity violations.
+        """
+        file_path = self._watched_files.get(path.resolve())
+        if file_path is None or not path.exists():
+            return  # missing files are reported by check_integrity
+        
+        current_checksum = self._calculate_file_checksum(path)
+        stored_checksum = self.config_checksums.get(file_path)
+        self.config_checksums[file_path] = current_checksum
+        
+        if not external or stored_checksum is None or current_checksum == stored_checksum:
+            return
+        
+        with self._integrity_lock:
+            self._integrity_alerts.append({
+                'type': 'FILE_MODIFIED',
+                'severity': 'WARNING',
+                'message': f"File integrity check failed: {file_path}",
+                'timestamp': datetime.now().isoformat()
+            })
+        
+        # Log the violation
+        self.logger.log_event(
+            EventType.CIA_VIOLATION,
+            f"Integrity violation detected: {file_path}",
+            {'file': file_path, 'expected': stored_checksum, 'actual': current_checksum}
+        )
+    
+    def _on_settings_changed(self, settings: Settings, changed: set):
+        """Configuration subscriber"""
+        self.settings = settings.cia_triad
     
     # ===================
     # Confidentiality
@@ -129,41 +179,21 @@ class CIATriadMonitor:
     def check_integrity(self) -> Dict[str, Any]:
         """
         Check integrity of critical configuration files
+        Reports external modifications seen by the file watcher since the
+        last check (no hashing here) and missing files.
         Returns: integrity status and alerts
         """
-        alerts = []
+        with self._integrity_lock:
+            alerts, self._integrity_alerts = self._integrity_alerts, []
         
-        for file_path, stored_checksum in self.config_checksums.items():
-            path = Path(file_path)
-            
-            if not path.exists():
+        for file_path in self.config_checksums:
+            if not Path(file_path).exists():
                 alerts.append({
                     'type': 'FILE_MISSING',
                     'severity': 'CRITICAL',
                     'message': f"Critical file missing: {file_path}",
                     'timestamp': datetime.now().isoformat()
                 })
-                continue
-            
-            current_checksum = self._calculate_file_checksum(path)
-            
-            if current_checksum != stored_checksum:
-                alerts.append({
-                    'type': 'FILE_MODIFIED',
-                    'severity': 'WARNING',
-                    'message': f"File integrity check failed: {file_path}",
-                    'timestamp': datetime.now().isoformat()
-                })
-                
-                # Log the violation
-                self.logger.log_event(
-                    EventType.CIA_VIOLATION,
-                    f"Integrity violation detected: {file_path}",
-                    {'file': file_path, 'expected': stored_checksum, 'actual': current_checksum}
-                )
-                
-                # Update checksum (file may have been legitimately modified by user)
-                self.config_checksums[file_path] = current_checksum
         
         return {
             'status': 'INTACT' if not alerts else 'COMPROMISED',
@@ -232,7 +262,7 @@ class CIATriadMonitor:
         })
         
         # Check for abnormally high packet rate (potential DoS)
-        dos_threshold = self.config.get('cia_triad.dos_threshold', 1000)
+        dos_threshold = self.settings.dos_threshold
         
         if current_packet_rate > dos_threshold:
             alert = {